@@ -3,83 +3,65 @@ import sys
 import json
 import argparse
 from . import process_data
+from . import matchups
+from . import coverage
+from . import server
+from . import sqlite_source
+from . import batch
+from . import diff
+from . import teammates
 
-def find_pokemon_countered_by(target_pokemon, stats_file):
+def load_matchup_graph(stats_file):
     print(f"Loading stats from {stats_file}...")
-    usage_data_full = process_data.load_data(stats_file)
+    usage_data_full = process_data.load_stats(stats_file)
     if not usage_data_full:
         print("Failed to load stats file.")
-        return []
+        return None
 
-    usage_data = usage_data_full.get("data", {})
+    return matchups.MatchupGraph(usage_data_full.get("data", {}))
+
+def find_pokemon_countered_by(target_pokemon, stats_file, min_score=matchups.DEFAULT_MIN_SCORE, max_stddev=matchups.DEFAULT_MAX_STDDEV, graph=None):
+    if graph is None:
+        graph = load_matchup_graph(stats_file)
+    if graph is None:
+        return []
     
-    matched_target = process_data.fuzzy_match(target_pokemon, usage_data.keys())
-    if not matched_target:
+    target = graph.resolve(target_pokemon)
+    if target is None:
         print(f"Pokemon '{target_pokemon}' not found in data.")
         return []
     
-    print(f"Analyzing data for '{matched_target}'...")
-    target_pokemon = matched_target
-    
-    countered_list = []
-    
-    all_pokemon = list(usage_data.keys())
+    print(f"Analyzing data for '{graph.names[target]}'...")
     
-    for pokemon in all_pokemon:
-        counters = process_data.extract_checks_and_counters(usage_data, pokemon)
+    return [{
+        "name": entry["name"],
+        "rank": entry["rank"],
+        "score": entry["score"],
+        "count": entry["count"]
+    } for entry in graph.countered_by(target, min_score, max_stddev)]
 
-        for rank, counter in enumerate(counters):
-            if counter['name'] == target_pokemon:
-                countered_list.append({
-                    "name": pokemon,
-                    "rank": rank + 1,
-                    "score": counter['score'],
-                    "count": counter['count']
-                })
-                break
-                
-    countered_list.sort(key=lambda x: x['score'], reverse=True)
-    
-    return countered_list
+def find_two_hop_checks(target_pokemon, stats_file, min_score=matchups.DEFAULT_MIN_SCORE, max_stddev=matchups.DEFAULT_MAX_STDDEV, graph=None):
+    if graph is None:
+        graph = load_matchup_graph(stats_file)
+    if graph is None:
+        return []
 
-def generate_counters_leaderboard(stats_file, top_n=50, show_victims=False):
-    print(f"Loading stats from {stats_file}...")
-    usage_data_full = process_data.load_data(stats_file)
-    if not usage_data_full:
-        print("Failed to load stats file.")
-        return
+    target = graph.resolve(target_pokemon)
+    if target is None:
+        print(f"Pokemon '{target_pokemon}' not found in data.")
+        return []
 
-    usage_data = usage_data_full.get("data", {})
-    all_pokemon = list(usage_data.keys())
-    
-    counter_stats = {}
+    return graph.two_hop(target, min_score, max_stddev)
+
+def generate_counters_leaderboard(stats_file, top_n=50, show_victims=False, min_score=matchups.DEFAULT_MIN_SCORE, max_stddev=matchups.DEFAULT_MAX_STDDEV, graph=None):
+    if graph is None:
+        graph = load_matchup_graph(stats_file)
+    if graph is None:
+        return
     
-    print(f"Analyzing counters for {len(all_pokemon)} Pokemon...")
+    print(f"Analyzing counters for {len(graph)} Pokemon...")
     
-    for pokemon in all_pokemon:
-        counters = process_data.extract_checks_and_counters(usage_data, pokemon)
-        
-        for counter in counters:
-            c_name = counter['name']
-            c_score = counter['score']
-            
-            if c_name not in counter_stats:
-                counter_stats[c_name] = { "count": 0, "total_score": 0, "victims": [] }
-            
-            counter_stats[c_name]["count"] += 1
-            counter_stats[c_name]["total_score"] += c_score
-            counter_stats[c_name]["victims"].append(pokemon)
-
-    leaderboard = []
-    for name, stats in counter_stats.items():
-        avg_score = stats["total_score"] / stats["count"] if stats["count"] > 0 else 0
-        leaderboard.append({
-            "name": name,
-            "count": stats["count"],
-            "avg_score": avg_score
-        })
-        
-    leaderboard.sort(key=lambda x: (x['count'], x['avg_score']), reverse=True)
+    leaderboard = graph.leaderboard(min_score, max_stddev)
     
     print(f"\n--- Top {top_n} Most Common Counters ---")
     if not show_victims:
@@ -89,11 +71,63 @@ def generate_counters_leaderboard(stats_file, top_n=50, show_victims=False):
     for i, entry in enumerate(leaderboard[:top_n]):
         if show_victims:
             print(f"\n#{i+1} {entry['name']} (Counters {entry['count']} Pokemon, Avg Score: {entry['avg_score']:.2f})")
-            victims = counter_stats[entry['name']]['victims']
+            victims = graph.victims(entry['index'], min_score, max_stddev)
             print(f"Countered: {', '.join(victims)}")
         else:
             print(f"{i+1:<5} | {entry['name']:<25} | {entry['count']:<15} | {entry['avg_score']:<10.2f}")
 
+def analyze_team(team_names, stats_file, min_usage=coverage.DEFAULT_MIN_USAGE, min_score=matchups.DEFAULT_MIN_SCORE, max_stddev=matchups.DEFAULT_MAX_STDDEV, graph=None):
+    if graph is None:
+        graph = load_matchup_graph(stats_file)
+    if graph is None:
+        return None
+
+    team = []
+    for name in team_names:
+        member = graph.resolve(name)
+        if member is None:
+            print(f"Pokemon '{name}' not found in data.")
+            return None
+        if member not in team:
+            team.append(member)
+
+    if len(team) > coverage.MAX_TEAM_SIZE:
+        print(f"A team has at most {coverage.MAX_TEAM_SIZE} Pokemon.")
+        return None
+
+    return coverage.analyze_team(graph, team, min_usage=min_usage, min_score=min_score, max_stddev=max_stddev)
+
+def suggest_teammates(team_names, stats_file, top_n=teammates.DEFAULT_TOP):
+    print(f"Loading stats from {stats_file}...")
+    usage_data_full = process_data.load_stats(stats_file)
+    if not usage_data_full:
+        print("Failed to load stats file.")
+        return None
+    
+    matrix = teammates.TeammateMatrix(usage_data_full.get("data", {}))
+    team = []
+    for name in team_names:
+        member = matrix.resolve(name)
+        if member is None:
+            print(f"Pokemon '{name}' not found in data.")
+            return None
+        if member not in team:
+            team.append(member)
+    
+    return [matrix.names[i] for i in team], matrix.suggest(team, top_n)
+
+def find_stats_file(format_id, date=None):
+    DATE = date or process_data.get_latest_date()
+    if not DATE:
+        print("No date folder found in data directory.")
+        return None
+        
+    filename = process_data.get_best_stats_file(os.path.join("data", DATE), format_id)
+    if not filename:
+        print(f"No stats file found for format '{format_id}' in {DATE}.")
+        return None
+    return os.path.join("data", DATE, "data", filename)
+
 def get_stats(pokemon_name, format_id, date=None):
     DATE = date or process_data.get_latest_date()
     if not DATE:
@@ -108,7 +142,7 @@ def get_stats(pokemon_name, format_id, date=None):
     META_DIR = os.path.join("data", "meta")
     
     print(f"Loading stats from {STATS_FILE}...")
-    usage_data_full = process_data.load_data(STATS_FILE)
+    usage_data_full = process_data.load_stats(STATS_FILE)
     if not usage_data_full:
         print(f"Failed to load stats file: {STATS_FILE}")
         return
@@ -137,6 +171,84 @@ def get_stats(pokemon_name, format_id, date=None):
     else:
         print(f"Pokemon '{pokemon_name}' not found.")
 
+def diff_stats(new_format, old_format, new_date=None, old_date=None, pokemon_name=None, top_n=diff.DEFAULT_TOP):
+    files = []
+    for format_id, date in ((old_format, old_date), (new_format, new_date)):
+        stats_file = find_stats_file(format_id, date)
+        if not stats_file:
+            return None
+        # Progress goes to stderr so --json output stays parseable
+        print(f"Loading stats from {stats_file}...", file=sys.stderr)
+        usage_data_full = process_data.load_stats(stats_file)
+        if not usage_data_full:
+            print(f"Failed to load stats file: {stats_file}", file=sys.stderr)
+            return None
+        files.append((stats_file, usage_data_full.get("data", {})))
+    
+    META_DIR = os.path.join("data", "meta")
+    names = diff.display_names({
+        "moves": process_data.load_data(os.path.join(META_DIR, "moves.json")),
+        "items": process_data.load_data(os.path.join(META_DIR, "items.json")),
+    })
+    
+    (old_file, old_data), (new_file, new_data) = files
+    usage_diff = diff.UsageDiff(old_data, new_data, names)
+    
+    pokemon = None
+    if pokemon_name:
+        pokemon = usage_diff.ids.get(process_data.fuzzy_match(pokemon_name, usage_diff.names))
+        if pokemon is None:
+            print(f"Pokemon '{pokemon_name}' not found in data.", file=sys.stderr)
+            return None
+    
+    report = usage_diff.report(top_n, pokemon)
+    report["old"] = old_file
+    report["new"] = new_file
+    return report
+
+def print_diff(report):
+    print(f"\nDiff: {report['old']} -> {report['new']}")
+    
+    if "pokemon" in report:
+        entry = report["pokemon"]
+        print(f"\n{entry['name']}: {entry['old_usage']}% (#{entry['old_rank']}) -> {entry['new_usage']}% (#{entry['new_rank']})")
+    else:
+        for title, key in (("Risers", "risers"), ("Fallers", "fallers"), ("New Entries", "entered"), ("Dropped", "left")):
+            print(f"\n--- Usage {title} ---")
+            print(f"{'Pokemon':<25} | {'Old %':<8} | {'New %':<8} | {'Delta':<8} | {'Rank':<12}")
+            print("-" * 72)
+            for entry in report["usage"][key]:
+                print(f"{entry['name']:<25} | {entry['old_usage']:<8} | {entry['new_usage']:<8} | {entry['delta']:<+8} | {entry['old_rank']:>4} -> {entry['new_rank']:<4}")
+    
+    for section in diff.SECTIONS:
+        for title, key in (("Gains", "gains"), ("Losses", "losses")):
+            print(f"\n--- {section.title()} {title} ---")
+            print(f"{'Pokemon':<25} | {'Name':<20} | {'Old %':<8} | {'New %':<8} | {'Delta':<8}")
+            print("-" * 80)
+            for entry in report[section][key]:
+                print(f"{entry['pokemon']:<25} | {entry['name']:<20} | {entry['old_percent']:<8} | {entry['new_percent']:<8} | {entry['delta']:<+8}")
+
+def get_stats_sqlite(pokemon_name, format_id):
+    source = sqlite_source.open_format(format_id)
+    if source is None:
+        return
+    
+    if not pokemon_name:
+        print("No Pokemon specified. Using top Pokemon of the format...")
+        pokemon_name = source.top_pokemon()
+        if not pokemon_name:
+            print("Could not determine top Pokemon.")
+            return
+        print(f"Top Pokemon is: {pokemon_name}")
+    
+    index = source.resolve(pokemon_name)
+    stats = source.stats(index) if index is not None else None
+    
+    if stats:
+        print(json.dumps(stats, indent=2))
+    else:
+        print(f"Pokemon '{pokemon_name}' not found.")
+
 def main():
     parser = argparse.ArgumentParser(description="Pokemon Stats Analysis Tool")
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
@@ -145,6 +257,7 @@ def main():
     stats_parser = subparsers.add_parser("stats", help="Get detailed stats for a Pokemon")
     stats_parser.add_argument("pokemon", nargs="?", help="Name of the Pokemon")
     stats_parser.add_argument("--format", default="gen9ou", help="Format to use (default: gen9ou)")
+    stats_parser.add_argument("--source", choices=["json", "sqlite"], default="json", help="Read raw stats JSON or the databases built by build_db (default: json)")
     
     # Counters command
     counters_parser = subparsers.add_parser("counters", help="Find what a Pokemon counters")
@@ -152,23 +265,79 @@ def main():
     counters_parser.add_argument("--format", default="gen9ou", help="Format to use (default: gen9ou)")
     counters_parser.add_argument("--chart", action="store_true", help="Show leaderboard of top counters")
     counters_parser.add_argument("--top5", action="store_true", help="Show detailed victims for top 5 counters")
+    counters_parser.add_argument("--two-hop", action="store_true", help="Show the checks of the Pokemon's checks")
+    counters_parser.add_argument("--min-score", type=float, default=matchups.DEFAULT_MIN_SCORE, help="Minimum check score, 0-1 (default: 0.5)")
+    counters_parser.add_argument("--max-stddev", type=float, default=matchups.DEFAULT_MAX_STDDEV, help="Maximum score deviation (default: 0.1)")
+    counters_parser.add_argument("--source", choices=["json", "sqlite"], default="json", help="Read raw stats JSON or the databases built by build_db (default: json)")
+    
+    # Team command
+    team_parser = subparsers.add_parser("team", help="Find threats a team doesn't check and suggest replacements")
+    team_parser.add_argument("pokemon", nargs="+", help="Team members (up to 6)")
+    team_parser.add_argument("--format", default="gen9ou", help="Format to use (default: gen9ou)")
+    team_parser.add_argument("--min-usage", type=float, default=coverage.DEFAULT_MIN_USAGE * 100, help="Usage percent for an opponent to count as a threat (default: 1.0)")
+    team_parser.add_argument("--min-score", type=float, default=matchups.DEFAULT_MIN_SCORE, help="Minimum check score, 0-1 (default: 0.5)")
+    team_parser.add_argument("--max-stddev", type=float, default=matchups.DEFAULT_MAX_STDDEV, help="Maximum score deviation (default: 0.1)")
+    team_parser.add_argument("--top", type=int, default=20, help="Number of threats to list (default: 20)")
+    
+    # Suggest command
+    suggest_parser = subparsers.add_parser("suggest", help="Suggest teammates for a partial team")
+    suggest_parser.add_argument("pokemon", nargs="*", help="Current team members")
+    suggest_parser.add_argument("--format", default="gen9ou", help="Format to use (default: gen9ou)")
+    suggest_parser.add_argument("--top", type=int, default=teammates.DEFAULT_TOP, help=f"Number of suggestions (default: {teammates.DEFAULT_TOP})")
+    
+    # Similar command
+    similar_parser = subparsers.add_parser("similar", help="Find Pokemon used most like a given Pokemon (needs build_db)")
+    similar_parser.add_argument("pokemon", help="Name of the Pokemon")
+    similar_parser.add_argument("--format", default="gen9ou", help="Format to use (default: gen9ou)")
+    similar_parser.add_argument("--across-formats", action="store_true", help="Search other formats of the same generation")
+    similar_parser.add_argument("--top", type=int, default=10, help="Number of results (default: 10)")
+    
+    # Diff command
+    diff_parser = subparsers.add_parser("diff", help="Compare two ratings or months of a format")
+    diff_parser.add_argument("--format", default="gen9ou", help="Format (optionally with rating, e.g. gen9ou-1825) to report on (default: gen9ou)")
+    diff_parser.add_argument("--date", help="Month of --format (default: latest)")
+    diff_parser.add_argument("--against", help="Format/rating to compare against (default: same as --format)")
+    diff_parser.add_argument("--against-date", help="Month to compare against (default: same as --date, or the previous month if --against is not given either)")
+    diff_parser.add_argument("--pokemon", help="Only diff this Pokemon's moves, items and teammates")
+    diff_parser.add_argument("--top", type=int, default=diff.DEFAULT_TOP, help=f"Movers to show per section (default: {diff.DEFAULT_TOP})")
+    diff_parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    
+    # Batch command
+    batch_parser = subparsers.add_parser("batch", help="Answer NDJSON stats queries from a file or stdin")
+    batch_parser.add_argument("input", nargs="?", default="-", help="NDJSON file of {format, pokemon, sections, date} queries (default: stdin)")
+    batch_parser.add_argument("--output", default="-", help="Write NDJSON results here (default: stdout)")
+    batch_parser.add_argument("--workers", type=int, help="Stats files processed in parallel (default: CPU count)")
+    
+    # Serve command
+    serve_parser = subparsers.add_parser("serve", help="Answer stats/counters/team queries over a local JSON API")
+    serve_parser.add_argument("--host", default=server.DEFAULT_HOST, help=f"Host to bind (default: {server.DEFAULT_HOST})")
+    serve_parser.add_argument("--port", type=int, default=server.DEFAULT_PORT, help=f"Port to bind (default: {server.DEFAULT_PORT})")
+    serve_parser.add_argument("--socket", help="Listen on this Unix socket instead of TCP")
+    serve_parser.add_argument("--cache-mb", type=float, default=server.DEFAULT_CACHE_MB, help=f"Memory budget for loaded formats (default: {server.DEFAULT_CACHE_MB})")
+    serve_parser.add_argument("--preload", action="append", metavar="FORMAT", help="Load this format at startup (repeatable)")
     
     args = parser.parse_args()
     
     if args.command == "stats":
-        get_stats(args.pokemon, args.format)
+        if args.source == "sqlite":
+            get_stats_sqlite(args.pokemon, args.format)
+        else:
+            get_stats(args.pokemon, args.format)
         
     elif args.command == "counters":
-        DATE = process_data.get_latest_date()
-        if not DATE:
-            print("No date folder found in data directory.")
-            sys.exit(1)
-            
-        filename = process_data.get_best_stats_file(os.path.join("data", DATE), args.format)
-        if not filename:
-            print(f"No stats file found for format '{args.format}' in {DATE}.")
+        if args.source == "sqlite":
+            if not sqlite_source.supports_thresholds(args.min_score, args.max_stddev):
+                print(sqlite_source.THRESHOLDS_MESSAGE)
+                sys.exit(1)
+            STATS_FILE = None
+            graph = sqlite_source.open_format(args.format)
+        else:
+            STATS_FILE = find_stats_file(args.format)
+            if not STATS_FILE:
+                sys.exit(1)
+            graph = load_matchup_graph(STATS_FILE)
+        if graph is None:
             sys.exit(1)
-        STATS_FILE = os.path.join("data", DATE, "data", filename)
         
         mode = "search"
         target = args.pokemon
@@ -177,19 +346,33 @@ def main():
             mode = "chart"
         elif args.top5 or (target and target.lower() == "top5-detailed"):
             mode = "top5"
+        elif args.two_hop:
+            mode = "two-hop"
+        
+        thresholds = {"min_score": args.min_score, "max_stddev": args.max_stddev}
         
         if mode == "chart":
-            generate_counters_leaderboard(STATS_FILE)
+            generate_counters_leaderboard(STATS_FILE, graph=graph, **thresholds)
         elif mode == "top5":
-            generate_counters_leaderboard(STATS_FILE, top_n=5, show_victims=True)
+            generate_counters_leaderboard(STATS_FILE, top_n=5, show_victims=True, graph=graph, **thresholds)
         else:
             if not target:
-                usage_data_full = process_data.load_data(STATS_FILE)
-                usage_data = usage_data_full.get("data", {})
-                target = process_data.get_top_pokemon(usage_data)
+                target = graph.top_pokemon()
                 print(f"Top Pokemon is: {target}")
+            
+            if mode == "two-hop":
+                results = find_two_hop_checks(target, STATS_FILE, graph=graph, **thresholds)
+                if results:
+                    print(f"\nPokemon that check the checks of '{target}':\n")
+                    print(f"{'Pokemon':<25} | {'Checks Beaten':<13} | {'Avg Score':<10} | {'Usage %':<10}")
+                    print("-" * 68)
+                    for item in results[:50]:
+                        print(f"{item['name']:<25} | {item['checks_beaten']:<13} | {item['avg_score']:<10} | {item['usage_percent']:<10}")
+                else:
+                    print(f"\nNo checks found for '{target}'.")
+                return
                 
-            results = find_pokemon_countered_by(target, STATS_FILE)
+            results = find_pokemon_countered_by(target, STATS_FILE, graph=graph, **thresholds)
             
             if results:
                 print(f"\n'{target}' is a counter for the following {len(results)} Pokemon:\n")
@@ -199,6 +382,93 @@ def main():
                     print(f"{item['name']:<25} | {item['rank']:<5} | {item['score']:<10} | {item['count']:<10}")
             else:
                 print(f"\n'{target}' is not a counter for any Pokemon in this dataset.")
+    elif args.command == "team":
+        STATS_FILE = find_stats_file(args.format)
+        if not STATS_FILE:
+            sys.exit(1)
+            
+        report = analyze_team(args.pokemon, STATS_FILE, args.min_usage / 100, args.min_score, args.max_stddev)
+        if not report:
+            sys.exit(1)
+            
+        print(f"\nTeam: {', '.join(report['team'])}")
+        print(f"Usage-weighted threat coverage: {report['coverage_percent']}%")
+        
+        print(f"\n--- Unchecked Threats (top {args.top}) ---")
+        print(f"{'Pokemon':<25} | {'Usage %':<10}")
+        print("-" * 38)
+        for threat in report["threats"][:args.top]:
+            print(f"{threat['name']:<25} | {threat['usage_percent']:<10}")
+            
+        print("\n--- Suggested Changes ---")
+        if not report["suggestions"]:
+            print("No single change improves coverage.")
+        for suggestion in report["suggestions"]:
+            change = f"Replace {suggestion['replace']} with" if suggestion["replace"] else "Add"
+            print(f"{change} {suggestion['with']}: {suggestion['coverage_percent']}% coverage (+{suggestion['gain_percent']}%)")
+    elif args.command == "suggest":
+        STATS_FILE = find_stats_file(args.format)
+        if not STATS_FILE:
+            sys.exit(1)
+        
+        result = suggest_teammates(args.pokemon, STATS_FILE, args.top)
+        if not result:
+            sys.exit(1)
+        team, suggestions = result
+        
+        print(f"\nSuggested teammates for: {', '.join(team) or '(empty team)'}\n")
+        print(f"{'Rank':<5} | {'Pokemon':<25} | {'Score':<10} | {'Paired With':<11} | {'Usage %':<10}")
+        print("-" * 73)
+        for i, item in enumerate(suggestions):
+            print(f"{i+1:<5} | {item['name']:<25} | {item['score']:<10} | {item['paired_with']:<11} | {item['usage_percent']:<10}")
+    elif args.command == "similar":
+        source = sqlite_source.open_format(args.format)
+        if source is None:
+            sys.exit(1)
+        
+        index = source.resolve(args.pokemon)
+        if index is None:
+            print(f"Pokemon '{args.pokemon}' not found in data.")
+            sys.exit(1)
+        
+        if args.across_formats:
+            results = source.similar_across_formats(index, args.top)
+        else:
+            results = source.similar(index, args.top)
+        
+        print(f"\nPokemon used most like '{source.names[index]}':\n")
+        print(f"{'Rank':<5} | {'Format':<25} | {'Pokemon':<25} | {'Similarity':<10}")
+        print("-" * 74)
+        for i, item in enumerate(results):
+            print(f"{i+1:<5} | {item['format']:<25} | {item['name']:<25} | {item['score']:<10}")
+    elif args.command == "diff":
+        against_date = args.against_date or args.date
+        if not args.against and not args.against_date:
+            # Otherwise the file would be compared with itself; default to month over month
+            date = args.date or process_data.get_latest_date()
+            against_date = date and process_data.get_previous_date(date)
+            if not against_date:
+                print("No earlier month to compare against; pass --against or --against-date.", file=sys.stderr)
+                sys.exit(1)
+        report = diff_stats(args.format, args.against or args.format, args.date, against_date, args.pokemon, args.top)
+        if not report:
+            sys.exit(1)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_diff(report)
+    elif args.command == "batch":
+        source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+        out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        try:
+            batch.run_batch(source, out, "data", args.workers)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if out is not sys.stdout:
+                out.close()
+    elif args.command == "serve":
+        server.serve("data", args.host, args.port, args.socket, args.cache_mb, args.preload)
     else:
         parser.print_help()
 
@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import process_data
+
+META_FILES = ["pokedex.json", "moves.json", "items.json", "abilities.json"]
+
+# Each section of collect_pokemon_stats, so a query only pays for what it asks for
+SECTIONS = {
+    "base_stats": lambda ctx, name: process_data.extract_base_stats(name, ctx["pokedex"], ctx["pokedex_lookup"]),
+    "types": lambda ctx, name: process_data.extract_types(name, ctx["pokedex"], ctx["pokedex_lookup"]),
+    "possible_abilities": lambda ctx, name: process_data.extract_possible_abilities(name, ctx["pokedex"], ctx["pokedex_lookup"]),
+    "moves": lambda ctx, name: process_data.extract_moves(ctx["usage_data"], name, ctx["moves"], ctx["usage_lookup"]),
+    "teammates": lambda ctx, name: process_data.extract_teammates(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "items": lambda ctx, name: process_data.extract_items(ctx["usage_data"], name, ctx["items"], ctx["usage_lookup"]),
+    "abilities": lambda ctx, name: process_data.extract_abilities(ctx["usage_data"], name, ctx["abilities"], ctx["usage_lookup"]),
+    "natures": lambda ctx, name: process_data.extract_natures(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "spreads": lambda ctx, name: process_data.extract_spreads(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "evs": lambda ctx, name: process_data.extract_evs(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "tera_types": lambda ctx, name: process_data.extract_tera_types(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "counters": lambda ctx, name: process_data.extract_checks_and_counters(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "dominates": lambda ctx, name: process_data.extract_dominates(ctx["usage_data"], name, ctx["usage_lookup"]),
+}
+
+_meta = None
+
+def load_meta(meta_dir):
+    # Loaded once per worker process and reused for every group it runs
+    global _meta
+    if _meta is None or _meta[0] != meta_dir:
+        pokedex, moves, items, abilities = (process_data.load_data(os.path.join(meta_dir, name)) for name in META_FILES)
+        _meta = (meta_dir, {
+            "pokedex": pokedex,
+            "moves": moves,
+            "items": items,
+            "abilities": abilities,
+            "pokedex_lookup": process_data.create_lookup_map(pokedex.keys()),
+        })
+    return _meta[1]
+
+def read_queries(lines):
+    for n, line in enumerate(lines):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            query = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"id": n, "error": f"Invalid JSON: {e}"}
+            continue
+        if not isinstance(query, dict):
+            yield {"id": n, "error": "Query must be a JSON object"}
+            continue
+        query.setdefault("id", n)
+        query.setdefault("format", "gen9ou")
+        error = query_error(query)
+        if error:
+            yield {"id": query["id"], "format": query["format"], "error": error}
+            continue
+        yield query
+
+def query_error(query):
+    for key in ["format", "pokemon", "date"]:
+        if query.get(key) is not None and not isinstance(query[key], str):
+            return f"'{key}' must be a string"
+    sections = query.get("sections")
+    if sections is not None and not isinstance(sections, str) and not (
+        isinstance(sections, list) and all(isinstance(section, str) for section in sections)
+    ):
+        return "'sections' must be a string or a list of strings"
+    return None
+
+def group_errors(queries, error):
+    return [json.dumps({"id": q["id"], "format": q["format"], "error": error}, separators=(",", ":")) for q in queries]
+
+def resolve_stats_file(data_dir, format_id, date, dates):
+    if not date:
+        date = dates.setdefault(None, process_data.get_latest_date(data_dir))
+    if not date:
+        return None, "No date folder found in data directory."
+
+    key = (date, format_id)
+    if key not in dates:
+        dates[key] = process_data.get_best_stats_file(os.path.join(data_dir, date), format_id)
+    filename = dates[key]
+    if not filename:
+        return None, f"No stats file found for format '{format_id}' in {date}."
+    return os.path.join(data_dir, date, "data", filename), None
+
+def group_queries(queries, data_dir):
+    groups = {}
+    errors = []
+    dates = {}
+    for query in queries:
+        if "error" in query:
+            errors.append(query)
+            continue
+        path, error = resolve_stats_file(data_dir, query["format"], query.get("date"), dates)
+        if error:
+            errors.append({"id": query["id"], "format": query["format"], "error": error})
+            continue
+        groups.setdefault(path, []).append(query)
+    return groups, errors
+
+def answer(ctx, query):
+    sections = query.get("sections") or list(SECTIONS)
+    if isinstance(sections, str):
+        sections = [sections]
+    unknown = [section for section in sections if section not in SECTIONS and section != "usage"]
+    if unknown:
+        return {"id": query["id"], "format": query["format"], "error": f"Unknown sections: {', '.join(unknown)}"}
+
+    pokemon_name = query.get("pokemon") or process_data.get_top_pokemon(ctx["usage_data"])
+    usage = process_data.extract_usage_stats(ctx["usage_data"], pokemon_name, ctx["usage_lookup"]) if pokemon_name else None
+    if not usage:
+        return {"id": query["id"], "format": query["format"], "pokemon": pokemon_name, "error": f"Pokemon '{pokemon_name}' not found."}
+
+    real_name = usage["name"]
+    result = {"name": real_name, "usage": usage}
+    for section in sections:
+        if section != "usage":
+            result[section] = SECTIONS[section](ctx, real_name)
+    return {"id": query["id"], "format": query["format"], "pokemon": real_name, "stats": result}
+
+def run_group(stats_file, queries, meta_dir):
+    start = time.perf_counter()
+    content = process_data.load_stats(stats_file)
+    if not content:
+        return group_errors(queries, f"Failed to load stats file: {stats_file}"), 0
+
+    usage_data = content.get("data", content)
+    ctx = dict(load_meta(meta_dir))
+    ctx["usage_data"] = usage_data
+    ctx["usage_lookup"] = process_data.create_lookup_map(usage_data.keys())
+
+    lines = []
+    for query in queries:
+        # One bad query must not cost the rest of the group their results
+        try:
+            result = answer(ctx, query)
+        except Exception as e:
+            result = {"id": query["id"], "format": query["format"], "error": f"{e.__class__.__name__}: {e}"}
+        result["file"] = os.path.basename(stats_file)
+        lines.append(json.dumps(result, separators=(",", ":")))
+    return lines, time.perf_counter() - start
+
+def run_batch(lines, out, data_dir="data", workers=None):
+    start = time.perf_counter()
+    meta_dir = os.path.join(data_dir, "meta")
+    groups, errors = group_queries(read_queries(lines), data_dir)
+
+    for error in errors:
+        out.write(json.dumps(error, separators=(",", ":")) + "\n")
+
+    total = sum(len(queries) for queries in groups.values()) + len(errors)
+    workers = workers or min(len(groups), os.cpu_count() or 1)
+    print(f"Running {total} queries against {len(groups)} stats files with {max(workers, 1)} workers...", file=sys.stderr)
+
+    def emit(stats_file, result):
+        group_lines, seconds = result
+        # Each group is written as soon as it finishes so downstream tools can start early
+        for line in group_lines:
+            out.write(line + "\n")
+        out.flush()
+        print(f"  {os.path.basename(stats_file)}: {len(group_lines)} queries in {seconds:.2f}s", file=sys.stderr)
+
+    if workers <= 1:
+        for stats_file, queries in groups.items():
+            emit(stats_file, run_group(stats_file, queries, meta_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_group, stats_file, queries, meta_dir): stats_file for stats_file, queries in groups.items()}
+            for future in as_completed(futures):
+                stats_file = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = group_errors(groups[stats_file], f"Worker failed: {e.__class__.__name__}: {e}"), 0
+                emit(stats_file, result)
+
+    print(f"Done in {time.perf_counter() - start:.2f}s", file=sys.stderr)
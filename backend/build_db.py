@@ -1,17 +1,25 @@
 import sqlite3
 import json
 import os
-import glob
-import re
-from process_data import collect_pokemon_stats, create_lookup_map
+import sys
+import argparse
+from process_data import get_generation, get_latest_date, slugify
+import records
+import similarity
+import metrics
+import static_site
+import payload
 
 # Configuration
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PUBLIC_DIR = os.path.join(BASE_DIR, 'frontend', 'public')
 DB_DIR = os.path.join(PUBLIC_DIR, 'dbs')
 INDEX_DB_PATH = os.path.join(PUBLIC_DIR, 'db.png')
-DATA_DIR = os.path.join(BASE_DIR, 'data', '2025-10', 'data')
-META_DIR = os.path.join(BASE_DIR, 'data', 'meta')
+STATIC_DIR = os.path.join(PUBLIC_DIR, 'static')
+DATA_ROOT = os.path.join(BASE_DIR, 'data')
+META_DIR = os.path.join(DATA_ROOT, 'meta')
+PROFILE_TOP_MOVES = 4
+PROFILE_TOP_ITEMS = 3
 
 def init_index_db(conn):
     cursor = conn.cursor()
@@ -43,8 +51,42 @@ def init_index_db(conn):
     )
     ''')
     
-    # Create index for faster lookups
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_rankings_format_rating ON rankings(format_id, rating)')
+    # Covering indexes: the leaderboard (ordered by rank) and slug lookups are
+    # answered from contiguous index pages without touching the table
+    cursor.execute('DROP INDEX IF EXISTS idx_rankings_format_rating')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_rankings_leaderboard ON rankings(format_id, rating, rank, pokemon_name, usage_percent, slug)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_rankings_slug ON rankings(format_id, slug, rating, pokemon_name)')
+
+    # Every format/rating a Pokemon appears in, keyed by slug so "where is it
+    # used" is one index range. Each format's rows are replaced whenever that
+    # format is reloaded, so partial rebuilds leave the other formats' rows as is.
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS pokemon_profiles (
+        slug TEXT NOT NULL,
+        format_id TEXT NOT NULL,
+        rating INTEGER NOT NULL,
+        pokemon_name TEXT NOT NULL,
+        usage_percent REAL NOT NULL,
+        rank INTEGER NOT NULL,
+        top_moves TEXT NOT NULL,
+        top_items TEXT NOT NULL,
+        PRIMARY KEY(slug, format_id, rating)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_profiles_format ON pokemon_profiles(format_id)')
+
+    # Cross-format nearest neighbours (built from each format's top rating)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS similar_pokemon (
+        format_id TEXT NOT NULL,
+        pokemon_name TEXT NOT NULL,
+        rank INTEGER NOT NULL,
+        neighbor_format_id TEXT NOT NULL,
+        neighbor_name TEXT NOT NULL,
+        score REAL NOT NULL,
+        PRIMARY KEY(format_id, pokemon_name, rank)
+    )
+    ''')
 
     # Meta Tables
     cursor.execute('''
@@ -101,6 +143,18 @@ def init_format_db(conn):
         UNIQUE(pokemon_name, rating)
     )
     ''')
+
+    # Nearest neighbours by moveset/item/ability/tera/spread vectors
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS similar_pokemon (
+        pokemon_name TEXT NOT NULL,
+        rating INTEGER NOT NULL,
+        rank INTEGER NOT NULL,
+        neighbor TEXT NOT NULL,
+        score REAL NOT NULL,
+        PRIMARY KEY(pokemon_name, rating, rank)
+    )
+    ''')
     conn.commit()
 
 def load_json(path):
@@ -172,87 +226,122 @@ def populate_meta(conn):
     conn.commit()
     return pokedex, moves, items, abilities
 
-def get_generation(format_name):
-    match = re.match(r'gen(\d+)', format_name)
-    if match:
-        return int(match.group(1))
-    return 0
+def profile_entries(entries, limit):
+    # [[name, usage_percent], ...] of the most used moves/items, already sorted by usage
+    return json.dumps([[entry['name'], entry['usage_percent']] for entry in entries[:limit]], separators=(',', ':'))
 
-def process_formats(index_conn, pokedex, moves, items, abilities):
+def existing_records(date_dir):
+    directory = records.records_dir(date_dir)
+    if not os.path.isdir(directory):
+        return {}
+    return {
+        filename[:-len(records.RECORDS_SUFFIX)]: os.path.join(directory, filename)
+        for filename in sorted(os.listdir(directory)) if filename.endswith(records.RECORDS_SUFFIX)
+    }
+
+def similarity_pool_entries(format_id, records_path):
+    # Top-rating vectors of a format that is not being reloaded, so the
+    # cross-format neighbours still cover every format on partial rebuilds
+    header = records.read_header(records_path)
+    if not header:
+        return None, []
+    top_rating = max(header.get("ratings") or [0])
+    entries = [
+        (format_id, record['pokemon_name'], similarity.feature_vector(record['data']))
+        for record in records.iter_records(records_path)
+        if record['rating'] == top_rating and record['usage_percent'] >= similarity.CROSS_FORMAT_MIN_USAGE
+    ]
+    return header.get("generation", get_generation(format_id)), entries
+
+def write_similar_pokemon(format_cursor, vectors_by_rating):
+    format_cursor.execute('DELETE FROM similar_pokemon')
+    for rating, (names, vectors) in vectors_by_rating.items():
+        format_cursor.executemany('''
+        INSERT INTO similar_pokemon (pokemon_name, rating, rank, neighbor, score)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (
+            (names[row], rating, rank, names[neighbor], score)
+            for row, neighbor, score, rank in similarity.nearest_neighbors(vectors)
+        ))
+
+def write_cross_format_similar(index_conn, pool):
+    print("Computing cross-format similar Pokemon...")
+    index_cursor = index_conn.cursor()
+    index_cursor.execute('DELETE FROM similar_pokemon')
+    # Vocabularies only line up within a generation
+    for generation, entries in pool.items():
+        formats = [format_id for format_id, _, _ in entries]
+        names = [name for _, name, _ in entries]
+        index_cursor.executemany('''
+        INSERT INTO similar_pokemon (format_id, pokemon_name, rank, neighbor_format_id, neighbor_name, score)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', (
+            (formats[row], names[row], rank, formats[neighbor], names[neighbor], score)
+            for row, neighbor, score, rank in similarity.nearest_neighbors([vector for _, _, vector in entries], groups=formats)
+        ))
+    index_conn.commit()
+
+def process_formats(index_conn, pokedex, moves, items, abilities, date_dir, tracker, formats=None, payload_version=payload.VERSION):
+    # formats limits the reload to those formats; everything else in the index DB is kept
     print("Processing data files...")
     index_cursor = index_conn.cursor()
     
-    # Group files by format
-    files = glob.glob(os.path.join(DATA_DIR, '*.json'))
-    format_files = {}
-    
-    for file_path in files:
-        filename = os.path.basename(file_path)
-        # Filename format: format-rating.json (e.g., gen9ou-1825.json)
-        # Some might be just format.json if rating is 0 and implied? No, usually format-0.json
-        
-        parts = os.path.splitext(filename)[0].rsplit('-', 1)
-        if len(parts) != 2:
-            continue
-            
-        format_id = parts[0]
-        rating = int(parts[1])
-        
-        if format_id not in format_files:
-            format_files[format_id] = []
-        format_files[format_id].append((rating, file_path))
+    # Per-Pokemon stats are computed once per month into the records stage
+    # (shared with integration.py), so this only has to load them into SQLite
+    with tracker.stage("records", month=os.path.basename(date_dir)):
+        record_paths = records.build_month_records(date_dir, (pokedex, moves, items, abilities), META_DIR, formats=formats)
+    similarity_pool = {}
+    failed = []
 
-    # Create lookup maps for fuzzy matching optimization
-    print("Creating lookup maps...")
-    lookup_maps = {
-        'moves': create_lookup_map(moves.keys()),
-        'items': create_lookup_map(items.keys()),
-        'abilities': create_lookup_map(abilities.keys()),
-        'pokedex': create_lookup_map(pokedex.keys())
-    }
+    if formats:
+        missing = sorted(set(formats) - set(record_paths))
+        if missing:
+            print(f"No stats found for: {', '.join(missing)}")
+            failed.extend(missing)
+        # The other formats' records as last built (not rebuilt here, even if stale)
+        with tracker.stage("similar_pool") as stage:
+            for format_id, records_path in existing_records(date_dir).items():
+                if format_id not in record_paths:
+                    generation, entries = similarity_pool_entries(format_id, records_path)
+                    similarity_pool.setdefault(generation, []).extend(entries)
+                    stage.add(rows=len(entries), bytes_read=os.path.getsize(records_path))
 
-    for format_id, file_list in format_files.items():
+    for format_id, records_path in record_paths.items():
         print(f"Processing format: {format_id}")
+        header = records.read_header(records_path)
+        if not header:
+            print(f"Error reading records for {format_id}")
+            failed.append(format_id)
+            continue
         
-        # Create/Connect to format DB
-        format_db_path = os.path.join(DB_DIR, f"{format_id}.png")
-        format_conn = sqlite3.connect(format_db_path)
-        init_format_db(format_conn)
-        format_cursor = format_conn.cursor()
+        with tracker.stage("format", format=format_id) as stage:
+            # Create/Connect to format DB
+            format_db_path = os.path.join(DB_DIR, f"{format_id}.png")
+            format_conn = sqlite3.connect(format_db_path)
+            init_format_db(format_conn)
+            format_cursor = format_conn.cursor()
         
-        total_battles_max = 0
-        generation = get_generation(format_id)
+            generation = header.get("generation", get_generation(format_id))
+            top_rating = max(header.get("ratings") or [0])
+            vectors_by_rating = {}
         
-        try:
-            for rating, file_path in file_list:
-                print(f"  Processing rating {rating}...")
-                content = load_json(file_path)
-                if not content:
-                    continue
+            try:
+                # Replace the format's rows outright so Pokemon that dropped out don't linger
+                index_cursor.execute('DELETE FROM rankings WHERE format_id = ?', (format_id,))
+                index_cursor.execute('DELETE FROM pokemon_profiles WHERE format_id = ?', (format_id,))
+                format_cursor.execute('DELETE FROM pokemon_details')
+                for record in records.iter_records(records_path):
+                    pokemon_name = record['pokemon_name']
+                    rating = record['rating']
                 
-                if 'info' in content and 'data' in content:
-                    info = content['info']
-                    usage_data = content['data']
-                    battles = info.get('number of battles', 0)
-                    if rating == 0: # Use battles from baseline for total
-                        total_battles_max = max(total_battles_max, battles)
-                else:
-                    usage_data = content
+                    vector = similarity.feature_vector(record['data'])
+                    names, vectors = vectors_by_rating.setdefault(rating, ([], []))
+                    names.append(pokemon_name)
+                    vectors.append(vector)
+                    if rating == top_rating and record['usage_percent'] >= similarity.CROSS_FORMAT_MIN_USAGE:
+                        similarity_pool.setdefault(generation, []).append((format_id, pokemon_name, vector))
+                    slug = slugify(pokemon_name)
                 
-                # Create usage lookup for this file
-                usage_lookup = create_lookup_map(usage_data.keys())
-
-                # Process Pokemon
-                for pokemon_name in usage_data.keys():
-                    stats = collect_pokemon_stats(pokemon_name, usage_data, pokedex, moves, items, abilities, lookup_maps['pokedex'], usage_lookup)
-                    
-                    if not stats:
-                        continue
-                    
-                    slug = pokemon_name.lower().replace(' ', '-').replace('.', '').replace("'", "")
-                    usage_percent = stats['usage']['usage_percent']
-                    rank = stats['usage']['rank']
-                    
                     # Insert into Format DB (Details)
                     format_cursor.execute('''
                     INSERT OR REPLACE INTO pokemon_details (pokemon_name, rating, data)
@@ -260,9 +349,9 @@ def process_formats(index_conn, pokedex, moves, items, abilities):
                     ''', (
                         pokemon_name,
                         rating,
-                        json.dumps(stats)
+                        payload.encode_details(record['data'], payload_version)
                     ))
-                    
+                
                     # Insert into Index DB (Rankings)
                     index_cursor.execute('''
                     INSERT OR REPLACE INTO rankings (format_id, pokemon_name, slug, rating, usage_percent, rank)
@@ -272,42 +361,110 @@ def process_formats(index_conn, pokedex, moves, items, abilities):
                         pokemon_name,
                         slug,
                         rating,
-                        usage_percent,
-                        rank
+                        record['usage_percent'],
+                        record['rank']
+                    ))
+
+                    # Insert into Index DB (Cross-format profile)
+                    index_cursor.execute('''
+                    INSERT OR REPLACE INTO pokemon_profiles (slug, format_id, rating, pokemon_name, usage_percent, rank, top_moves, top_items)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        slug,
+                        format_id,
+                        rating,
+                        pokemon_name,
+                        record['usage_percent'],
+                        record['rank'],
+                        profile_entries(record['data'].get('moves', []), PROFILE_TOP_MOVES),
+                        profile_entries(record['data'].get('items', []), PROFILE_TOP_ITEMS)
                     ))
             
-            format_conn.commit()
-            index_conn.commit() # Commit rankings for this rating
+                write_similar_pokemon(format_cursor, vectors_by_rating)
+                format_conn.commit()
+                # Replaced rows leave free pages behind (e.g. after a payload
+                # version change); the file is downloaded, so keep it tight
+                format_conn.execute('VACUUM')
+                stage.add(rows=sum(len(names) for names, _ in vectors_by_rating.values()), bytes_read=os.path.getsize(records_path))
+                index_conn.commit() # Commit rankings for this format
             
-            # Update Index DB Format Info
-            index_cursor.execute('''
-            INSERT OR REPLACE INTO formats (id, name, generation, total_battles)
-            VALUES (?, ?, ?, ?)
-            ''', (format_id, format_id, generation, total_battles_max))
-            index_conn.commit()
+                # Update Index DB Format Info
+                index_cursor.execute('''
+                INSERT OR REPLACE INTO formats (id, name, generation, total_battles)
+                VALUES (?, ?, ?, ?)
+                ''', (format_id, format_id, generation, header.get('total_battles', 0)))
+                index_conn.commit()
             
-        except Exception as e:
-            print(f"Error processing format {format_id}: {e}")
-            format_conn.rollback()
-        finally:
-            format_conn.close()
-
-def main():
-    print(f"Building databases in {PUBLIC_DIR}")
+            except Exception as e:
+                print(f"Error processing format {format_id}: {e}")
+                format_conn.rollback()
+                index_conn.rollback() # Keep the format's previous rankings and profiles
+                failed.append(format_id)
+            finally:
+                format_conn.close()
+                stage.add(bytes_written=os.path.getsize(format_db_path))
     
+    with tracker.stage("similar_cross_format") as stage:
+        write_cross_format_similar(index_conn, similarity_pool)
+        stage.add(rows=sum(len(entries) for entries in similarity_pool.values()))
+    return failed
+
+def build_sqlite(date_dir, tracker, formats=None, payload_version=payload.VERSION):
     # Ensure directories exist
     os.makedirs(DB_DIR, exist_ok=True)
     
     # Connect to Index DB
     index_conn = sqlite3.connect(INDEX_DB_PATH)
-    
     try:
         init_index_db(index_conn)
-        pokedex, moves, items, abilities = populate_meta(index_conn)
-        process_formats(index_conn, pokedex, moves, items, abilities)
-        print("Database build complete!")
+        with tracker.stage("populate_meta"):
+            pokedex, moves, items, abilities = populate_meta(index_conn)
+        failed = process_formats(index_conn, pokedex, moves, items, abilities, date_dir, tracker, formats, payload_version)
+        # Rebuilds replace rows in place; VACUUM rewrites the file so each
+        # table and index is stored in key order again
+        with tracker.stage("vacuum"):
+            index_conn.execute('VACUUM')
+        return failed
     finally:
         index_conn.close()
 
+def build_static(date_dir, tracker, workers=None):
+    meta = records.load_meta(META_DIR)
+    with tracker.stage("records", month=os.path.basename(date_dir)):
+        record_paths = records.build_month_records(date_dir, meta, META_DIR)
+    return static_site.build_static(record_paths, STATIC_DIR, tracker, workers)
+
+def main(date=None, tracker=None, metrics_out=None, target="sqlite", workers=None, formats=None, payload_version=payload.VERSION):
+    tracker = tracker or metrics.Metrics("build_db")
+    date = date or get_latest_date(DATA_ROOT)
+    if not date:
+        print(f"No date folder found in {DATA_ROOT}.")
+        return False
+    print(f"Building {target} output in {PUBLIC_DIR} from {date}")
+    date_dir = os.path.join(DATA_ROOT, date)
+    
+    try:
+        with tracker.stage("build_db", month=date, target=target):
+            if target == "static":
+                failed = build_static(date_dir, tracker, workers)
+            else:
+                failed = build_sqlite(date_dir, tracker, formats, payload_version)
+        if failed:
+            print(f"Database build finished with errors in: {', '.join(failed)}")
+            return False
+        print("Database build complete!")
+        return True
+    finally:
+        tracker.write_report(metrics_out)
+
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Build the SQLite databases served by the frontend")
+    parser.add_argument("date", nargs="?", help="Month to build (YYYY-MM, default: latest)")
+    parser.add_argument("--target", choices=["sqlite", "static"], default="sqlite", help="sqlite: db.png + dbs/*.png; static: pre-compressed JSON per Pokemon in static/")
+    parser.add_argument("--workers", type=int, help="Processes used for the static export (default: one per CPU)")
+    parser.add_argument("--formats", nargs="+", metavar="FORMAT", help="Only reload these formats into the sqlite target, keeping the rest of db.png")
+    parser.add_argument("--payload-version", type=int, choices=payload.VERSIONS, default=payload.VERSION, help=f"pokemon_details.data encoding: 1 = JSON, 2 = packed columns (default: {payload.VERSION})")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    tracker = metrics.Metrics("build_db", profile=args.profile, trace_memory=args.trace_memory)
+    sys.exit(0 if main(args.date, tracker, args.metrics_out, args.target, args.workers, args.formats, args.payload_version) else 1)
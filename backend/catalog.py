@@ -0,0 +1,249 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+import threading
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_ROOT = os.path.join(BASE_DIR, "data")
+# Kept in a subdirectory so rewriting it doesn't touch the mtime of data/ itself
+CATALOG_FILE = os.path.join(".cache", "catalog.json")
+CATALOG_VERSION = 1
+
+MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}$")
+# The chaos header sits at the very start of the file, before the usage data
+BATTLES_PATTERN = re.compile(rb'"number of battles"\s*:\s*(\d+)')
+HEADER_BYTES = 4096
+HASH_CHUNK = 1024 * 1024
+
+# Index of data/: month -> format -> rating -> stats file (size, battles, hash).
+# It is persisted next to the data and only the parts whose directory mtime
+# changed are rescanned. A new or renamed-over file shows up as a directory
+# change; a file edited in place doesn't, so single-file lookups (best_file,
+# file_hash) re-stat their entry before trusting it.
+
+def parse_filename(filename):
+    # "gen9nationaldex-ag-1825.json" -> ("gen9nationaldex-ag", 1825); unrated files keep rating None
+    name = filename[:-len(".json")]
+    format_id, sep, rating = name.rpartition("-")
+    if sep and rating.isdigit():
+        return format_id, int(rating)
+    return name, None
+
+def dir_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def read_battles(path):
+    try:
+        with open(path, "rb") as f:
+            head = f.read(HEADER_BYTES)
+    except OSError:
+        return None
+    match = BATTLES_PATTERN.search(head)
+    return int(match.group(1)) if match else None
+
+def make_entry(path, filename, st):
+    format_id, rating = parse_filename(filename)
+    return {
+        "format": format_id,
+        "rating": rating,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "battles": read_battles(path),
+        "hash": None,
+    }
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class Catalog:
+    def __init__(self, data_root):
+        self.data_root = os.path.abspath(data_root)
+        self.cache_path = os.path.join(self.data_root, CATALOG_FILE)
+        self.lock = threading.RLock()
+        self.state = self.load()
+        self.index = {}
+        self.dirty = False
+
+    def load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            state = {}
+        if state.get("version") != CATALOG_VERSION:
+            state = {"version": CATALOG_VERSION, "root": None, "month_names": [], "months": {}}
+        return state
+
+    def save(self):
+        if not self.dirty:
+            return
+        # Per-process temp name so parallel builds never write the same file
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, separators=(",", ":"))
+            os.replace(tmp_path, self.cache_path)
+            self.dirty = False
+        except OSError:
+            # A read-only data directory still gets the in-memory index
+            pass
+
+    def months(self):
+        sig = dir_mtime(self.data_root)
+        with self.lock:
+            if sig != self.state["root"]:
+                names = []
+                if sig is not None:
+                    names = sorted(
+                        name for name in os.listdir(self.data_root)
+                        if MONTH_PATTERN.match(name) and os.path.isdir(os.path.join(self.data_root, name))
+                    )
+                self.state["root"] = sig
+                self.state["month_names"] = names
+                for month in list(self.state["months"]):
+                    if month not in names:
+                        del self.state["months"][month]
+                        self.index.pop(month, None)
+                self.dirty = True
+                self.save()
+            return list(self.state["month_names"])
+
+    def latest_month(self):
+        months = self.months()
+        return months[-1] if months else None
+
+    def formats(self, month):
+        # {format_id: [entry, ...]} with entries sorted unrated first, then by rating
+        if not MONTH_PATTERN.match(month):
+            return {}
+        data_dir = os.path.join(self.data_root, month, "data")
+        sig = dir_mtime(data_dir)
+        with self.lock:
+            cached = self.state["months"].get(month)
+            if cached is None or cached["mtime"] != sig:
+                cached = self.scan(data_dir, sig, cached["files"] if cached else {})
+                self.state["months"][month] = cached
+                self.index.pop(month, None)
+                self.dirty = True
+                self.save()
+
+            if month not in self.index:
+                formats = {}
+                for filename, entry in cached["files"].items():
+                    formats.setdefault(entry["format"], []).append(dict(entry, filename=filename, path=os.path.join(data_dir, filename)))
+                for entries in formats.values():
+                    entries.sort(key=lambda entry: (entry["rating"] is not None, entry["rating"] or 0))
+                self.index[month] = formats
+            return self.index[month]
+
+    def scan(self, data_dir, sig, previous):
+        files = {}
+        if sig is not None:
+            for filename in os.listdir(data_dir):
+                if not filename.endswith(".json"):
+                    continue
+                path = os.path.join(data_dir, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entry = previous.get(filename)
+                # Unchanged files keep their battle count and hash
+                if not entry or entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+                    entry = make_entry(path, filename, st)
+                files[filename] = entry
+        return {"mtime": sig, "files": files}
+
+    def check_entry(self, month, filename):
+        # One stat to catch an in-place edit; the entry is rebuilt with a new
+        # battle count and its hash dropped
+        with self.lock:
+            files = self.state["months"][month]["files"]
+            entry = files.get(filename)
+            if entry is None:
+                return None
+            path = os.path.join(self.data_root, month, "data", filename)
+            try:
+                st = os.stat(path)
+            except OSError:
+                return entry
+            if entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+                entry = files[filename] = make_entry(path, filename, st)
+                self.index.pop(month, None)
+                self.dirty = True
+                self.save()
+            return entry
+
+    def ratings(self, month, format_id):
+        return self.formats(month).get(format_id, [])
+
+    def best_file(self, month, format_id):
+        # "gen9ou" picks the highest rating, "gen9ou-1500" that exact rating
+        formats = self.formats(month)
+        entries = formats.get(format_id)
+        match = entries[-1] if entries else None
+        base, sep, rating = format_id.rpartition("-")
+        if match is None and sep and rating.isdigit():
+            match = next((entry for entry in formats.get(base, []) if entry["rating"] == int(rating)), None)
+        if match is None:
+            return None
+        return dict(self.check_entry(month, match["filename"]), filename=match["filename"], path=match["path"])
+
+    def file_hash(self, month, filename):
+        # Hashing reads the whole file, so it only happens on request and is kept
+        # until the file changes
+        self.formats(month)
+        with self.lock:
+            entry = self.check_entry(month, filename)
+            if entry is None:
+                return None
+            if entry["hash"] is None:
+                entry["hash"] = hash_file(os.path.join(self.data_root, month, "data", filename))
+                self.index.pop(month, None)
+                self.dirty = True
+                self.save()
+            return entry["hash"]
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+def get_catalog(data_root=DATA_ROOT):
+    key = os.path.abspath(data_root)
+    with _catalogs_lock:
+        if key not in _catalogs:
+            _catalogs[key] = Catalog(key)
+        return _catalogs[key]
+
+def main():
+    parser = argparse.ArgumentParser(description="List the months, formats and ratings found in data/")
+    parser.add_argument("date", nargs="?", help="Month to list (YYYY-MM, default: latest)")
+    parser.add_argument("--data-dir", default=DATA_ROOT, help="Data directory (default: data/)")
+    parser.add_argument("--hash", action="store_true", help="Compute content hashes (reads every file)")
+    args = parser.parse_args()
+
+    catalog = get_catalog(args.data_dir)
+    month = args.date or catalog.latest_month()
+    if not month:
+        print("No date folder found in data directory.")
+        sys.exit(1)
+
+    print(f"Months: {', '.join(catalog.months())}")
+    print(f"\n{month}:")
+    for format_id, entries in sorted(catalog.formats(month).items()):
+        for entry in entries:
+            digest = catalog.file_hash(month, entry["filename"])[:12] if args.hash else ""
+            print(f"  {format_id:<30} {str(entry['rating']):>5} {entry['size'] / 1024 ** 2:>9.2f} MB {entry['battles'] or 0:>10} battles {digest}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import sys
+import bisect
+from array import array
+from collections.abc import Mapping
+
+# Chaos sections holding {key: weight}, and the CompactPokemon slot for each
+WEIGHT_SECTIONS = {
+    "Abilities": "abilities",
+    "Items": "items",
+    "Moves": "moves",
+    "Spreads": "spreads",
+    "Teammates": "teammates",
+    "Tera Types": "tera_types",
+    "Happiness": "happiness",
+}
+# {key: [count, score, stddev]}
+COUNTER_SECTION = "Checks and Counters"
+FIELDS = dict(WEIGHT_SECTIONS, **{
+    "Raw count": "raw_count",
+    "usage": "usage",
+    "Viability Ceiling": "viability",
+    COUNTER_SECTION: "counters",
+})
+
+# A parsed chaos file is mostly small dicts of floats: ~100 bytes per number once
+# it is Python objects. Here each section's keys are interned ids and its numbers
+# sit in array columns shared by the whole format, and each Pokemon is a __slots__
+# record of views into them. Records and sections are read-only Mappings, so the
+# process_data.extract_* functions, MatchupGraph and TeammateMatrix take them as-is.
+
+class StringTable:
+    # Share one table between formats to store every name once (not thread-safe)
+    __slots__ = ("ids", "strings")
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, string):
+        index = self.ids.get(string)
+        if index is None:
+            index = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return index
+
+    def __len__(self):
+        return len(self.strings)
+
+    def nbytes(self):
+        return sum(sys.getsizeof(string) for string in self.strings) + sys.getsizeof(self.ids) + sys.getsizeof(self.strings)
+
+class Columns:
+    # Sections packed end to end. ids/values keep each section in chaos order (so
+    # sorts that tie come out the same as on the dicts); sorted_ids/order hold
+    # each section's ids sorted and their positions, for binary-search lookups.
+    __slots__ = ("strings", "width", "ids", "values", "sorted_ids", "order")
+
+    def __init__(self, strings, width=1, ids=None, values=None, sorted_ids=None, order=None):
+        # Any uint32/float64 sequences work for reading, e.g. memoryviews of a snapshot
+        self.strings = strings
+        self.width = width
+        self.ids = array("I") if ids is None else ids
+        self.values = array("d") if values is None else values
+        self.sorted_ids = array("I") if sorted_ids is None else sorted_ids
+        self.order = array("I") if order is None else order
+
+    def add(self, section):
+        start = len(self.ids)
+        for key, value in section.items():
+            self.ids.append(self.strings.intern(key))
+            if self.width == 1:
+                self.values.append(value)
+            else:
+                self.values.extend(value)
+        end = len(self.ids)
+        order = sorted(range(start, end), key=self.ids.__getitem__)
+        self.order.extend(order)
+        self.sorted_ids.extend(self.ids[position] for position in order)
+        return start, end
+
+    def find(self, key, start, end):
+        string_id = self.strings.ids.get(key)
+        if string_id is None:
+            return -1
+        i = bisect.bisect_left(self.sorted_ids, string_id, start, end)
+        if i < end and self.sorted_ids[i] == string_id:
+            return self.order[i]
+        return -1
+
+    def value(self, position):
+        if self.width == 1:
+            return self.values[position]
+        return tuple(self.values[position * self.width:(position + 1) * self.width])
+
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in (self.ids, self.values, self.sorted_ids, self.order))
+
+class Section(Mapping):
+    # Counter sections return (count, score, stddev) tuples instead of lists
+    __slots__ = ("columns", "start", "end")
+
+    def __init__(self, columns, start, end):
+        self.columns = columns
+        self.start = start
+        self.end = end
+
+    def __getitem__(self, key):
+        position = self.columns.find(key, self.start, self.end)
+        if position < 0:
+            raise KeyError(key)
+        return self.columns.value(position)
+
+    def __contains__(self, key):
+        return self.columns.find(key, self.start, self.end) >= 0
+
+    def get(self, key, default=None):
+        position = self.columns.find(key, self.start, self.end)
+        return self.columns.value(position) if position >= 0 else default
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return self.end - self.start
+
+    def keys(self):
+        strings = self.columns.strings.strings
+        return [strings[i] for i in self.columns.ids[self.start:self.end]]
+
+    def values(self):
+        columns = self.columns
+        if columns.width == 1:
+            return columns.values[self.start:self.end]
+        return [columns.value(position) for position in range(self.start, self.end)]
+
+    def items(self):
+        return list(zip(self.keys(), self.values()))
+
+    def __repr__(self):
+        return f"Section({dict(self.items())!r})"
+
+class CompactPokemon(Mapping):
+    # Keys not known to FIELDS are kept as-is in extra
+    __slots__ = tuple(FIELDS.values()) + ("extra",)
+
+    def __init__(self):
+        for field in self.__slots__:
+            setattr(self, field, None)
+
+    def __getitem__(self, key):
+        field = FIELDS.get(key)
+        value = getattr(self, field) if field else (self.extra or {}).get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        field = FIELDS.get(key)
+        value = getattr(self, field) if field else (self.extra or {}).get(key)
+        return default if value is None else value
+
+    def __iter__(self):
+        for key, field in FIELDS.items():
+            if getattr(self, field) is not None:
+                yield key
+        yield from self.extra or ()
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"CompactPokemon({dict(self.items())!r})"
+
+class CompactUsage(dict):
+    # {name: CompactPokemon} plus the columns behind them
+    def __init__(self, strings=None):
+        super().__init__()
+        self.strings = strings if strings is not None else StringTable()
+        self.weights = Columns(self.strings)
+        self.counters = Columns(self.strings, width=3)
+
+    def add(self, name, data):
+        pokemon = CompactPokemon()
+        extra = {}
+        for key, value in data.items():
+            if key in WEIGHT_SECTIONS:
+                setattr(pokemon, WEIGHT_SECTIONS[key], Section(self.weights, *self.weights.add(value)))
+            elif key == COUNTER_SECTION:
+                pokemon.counters = Section(self.counters, *self.counters.add(value))
+            elif key == "Viability Ceiling":
+                pokemon.viability = tuple(value)
+            elif key in FIELDS:
+                setattr(pokemon, FIELDS[key], value)
+            else:
+                extra[key] = value
+        pokemon.extra = extra or None
+        self[self.strings.strings[self.strings.intern(name)]] = pokemon
+        return pokemon
+
+    def nbytes(self):
+        # Estimate, not counting a StringTable shared with other formats
+        records = len(self) * (sys.getsizeof(CompactPokemon()) + 10 * sys.getsizeof(Section(None, 0, 0)))
+        return sys.getsizeof(self) + records + self.weights.nbytes() + self.counters.nbytes()
+
+def compact_usage(usage_data, strings=None):
+    # usage_data is the chaos "data" block; pass a StringTable to share names across formats
+    compact = CompactUsage(strings)
+    for name, data in usage_data.items():
+        compact.add(name, data)
+    return compact
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from . import process_data
+from . import synthetic
+
+def pytest_addoption(parser):
+    # Size of the synthetic dataset used by test_benchmarks.py
+    group = parser.getgroup("synthetic data")
+    group.addoption("--run-benchmarks", action="store_true", help="Run the timing benchmarks too (run_benchmarks.py passes this)")
+    group.addoption("--bench-pokemon", type=int, default=400, help="Pokemon per synthetic stats file")
+    group.addoption("--bench-spreads", type=int, default=40, help="Spreads per Pokemon")
+    group.addoption("--bench-teammates", type=int, default=60, help="Teammates per Pokemon")
+    group.addoption("--bench-counters", type=int, default=30, help="Checks and counters per Pokemon")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark_suite: timing benchmark, deselected unless --run-benchmarks is given")
+
+def pytest_collection_modifyitems(config, items):
+    # Plain `pytest` stays a quick correctness run
+    if config.getoption("--run-benchmarks"):
+        return
+    benchmarks = [item for item in items if item.get_closest_marker("benchmark_suite")]
+    if benchmarks:
+        config.hook.pytest_deselected(items=benchmarks)
+        items[:] = [item for item in items if not item.get_closest_marker("benchmark_suite")]
+
+@pytest.fixture
+def synthetic_month(tmp_path):
+    # A small two-format month of synthetic chaos files plus metadata
+    root = str(tmp_path / "data")
+    synthetic.write_dataset(root, formats=["gen9ou", "gen9uu"], ratings=[0, 1500], pokemon=30, spreads=5, teammates=5, counters=5)
+    return {
+        "root": root,
+        "meta_dir": os.path.join(root, "meta"),
+        "month_dir": os.path.join(root, synthetic.DEFAULT_MONTH),
+    }
+
+@pytest.fixture
+def synthetic_stats():
+    # Factory for one in-memory chaos file plus the metadata collect_pokemon_stats needs
+    def make(pokemon=40):
+        names = synthetic.pokemon_names(pokemon)
+        content = synthetic.generate_chaos(names, spreads=20, teammates=20, counters=15)
+        usage_data = content["data"]
+        pokedex, moves, items, abilities = synthetic.generate_meta(names)
+        pokedex_lookup = process_data.create_lookup_map(pokedex.keys())
+        usage_lookup = process_data.create_lookup_map(usage_data.keys())
+
+        def collect(name, data=usage_data):
+            # data may be any view of usage_data (compact, snapshot); the lookups stay the same
+            return process_data.collect_pokemon_stats(name, data, pokedex, moves, items, abilities, pokedex_lookup, usage_lookup)
+
+        return {
+            "names": names,
+            "content": content,
+            "usage_data": usage_data,
+            "display_names": {table: {key: value["name"] for key, value in meta.items()} for table, meta in [("moves", moves), ("items", items), ("abilities", abilities)]},
+            "collect": collect,
+        }
+    return make
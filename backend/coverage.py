@@ -0,0 +1,102 @@
+import numpy as np
+from . import matchups
+
+MAX_TEAM_SIZE = 6
+DEFAULT_MIN_USAGE = 0.01
+
+def check_bitsets(graph, min_score=matchups.DEFAULT_MIN_SCORE, max_stddev=matchups.DEFAULT_MAX_STDDEV):
+    # Row m has bit o set when m checks opponent o (m is in o's Checks and Counters)
+    n = len(graph)
+    mask, _ = graph.edge_mask(min_score, max_stddev)
+    opponents = graph.row_of[mask]
+    bitsets = np.zeros((n, (n + 7) // 8), dtype=np.uint8)
+    # Set the bits straight into the packed rows (packbits order: MSB first)
+    np.bitwise_or.at(bitsets, (graph.indices[mask], opponents >> 3), (0x80 >> (opponents & 7)).astype(np.uint8))
+    return bitsets
+
+def threat_bitset(graph, min_usage=DEFAULT_MIN_USAGE):
+    return np.packbits(graph.usage >= min_usage)
+
+def union(bitsets, members):
+    if not len(members):
+        return np.zeros(bitsets.shape[1], dtype=np.uint8)
+    return np.bitwise_or.reduce(bitsets[list(members)], axis=0)
+
+def members_of(bits, n):
+    return np.nonzero(np.unpackbits(bits, count=n))[0]
+
+# BYTE_BITS[b] is the 8 bits of byte value b, MSB first like packbits
+BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.float64)
+
+def byte_weights(weights):
+    # table[j, b]: total weight of the opponents in byte j whose bits are set in b
+    padded = np.zeros(-(-len(weights) // 8) * 8)
+    padded[:len(weights)] = weights
+    return padded.reshape(-1, 8) @ BYTE_BITS.T
+
+def weighted_counts(bitsets, target, table):
+    # Usage-weighted popcount of (row & target) for every row, one byte column at a time
+    masked = bitsets & target
+    counts = np.zeros(len(bitsets))
+    for j in range(masked.shape[1]):
+        counts += table[j, masked[:, j]]
+    return counts
+
+def weighted_count(bits, table):
+    return float(table[np.arange(len(bits)), bits].sum())
+
+def analyze_team(graph, team, bitsets=None, min_usage=DEFAULT_MIN_USAGE,
+                 min_score=matchups.DEFAULT_MIN_SCORE, max_stddev=matchups.DEFAULT_MAX_STDDEV):
+    if bitsets is None:
+        bitsets = check_bitsets(graph, min_score, max_stddev)
+
+    n = len(graph)
+    weights = graph.usage
+    table = byte_weights(weights)
+    threats = threat_bitset(graph, min_usage)
+    total_weight = weighted_count(threats, table) or 1.0
+
+    covered = union(bitsets, team)
+    uncovered = threats & ~covered
+    uncovered_ids = members_of(uncovered, n)
+    uncovered_ids = uncovered_ids[np.argsort(-weights[uncovered_ids], kind="stable")]
+    covered_weight = total_weight - float(weights[uncovered_ids].sum())
+
+    candidates = np.ones(n, dtype=bool)
+    candidates[list(team)] = False
+
+    # One slot per team member to replace, plus an open slot if the team isn't full
+    slots = [(i, [m for m in team if m != i]) for i in team]
+    if len(team) < MAX_TEAM_SIZE:
+        slots.append((None, list(team)))
+
+    suggestions = []
+    for replaced, others in slots:
+        base = union(bitsets, others)
+        base_weight = weighted_count(threats & base, table)
+        gains = weighted_counts(bitsets, threats & ~base, table)
+        gains[~candidates] = -1
+        best = int(np.argmax(gains))
+        if gains[best] <= 0:
+            continue
+        new_weight = base_weight + float(gains[best])
+        if replaced is not None and new_weight <= covered_weight:
+            continue
+        suggestions.append({
+            "replace": graph.names[replaced] if replaced is not None else None,
+            "with": graph.names[best],
+            "coverage_percent": round(new_weight / total_weight * 100, 3),
+            "gain_percent": round((new_weight - covered_weight) / total_weight * 100, 3),
+        })
+
+    suggestions.sort(key=lambda x: x["gain_percent"], reverse=True)
+
+    return {
+        "team": [graph.names[i] for i in team],
+        "coverage_percent": round(covered_weight / total_weight * 100, 3),
+        "threats": [{
+            "name": graph.names[i],
+            "usage_percent": round(float(weights[i]) * 100, 3),
+        } for i in uncovered_ids],
+        "suggestions": suggestions,
+    }
@@ -0,0 +1,178 @@
+import numpy as np
+from . import process_data
+
+SECTIONS = {
+    # section: (chaos key, how extract_* normalises the counts)
+    "moves": ("Moves", "weight"),
+    "items": ("Items", "sum"),
+    "teammates": ("Teammates", "teammates"),
+}
+DEFAULT_TOP = 10
+
+def section_weight(pokemon_data, values, norm):
+    # Same denominators as extract_moves / extract_items / extract_teammates
+    if norm == "sum":
+        return max(sum(values.values()), 1)
+    total_weight = process_data.get_total_weight(pokemon_data)
+    if norm == "teammates":
+        total_weight = max(total_weight, sum(values.values()) / 6)
+    return total_weight
+
+def usage_ranks(usage_data, ids, n):
+    # Rank as extract_usage_stats reports it: 1-based, by usage, ties in file order
+    names = list(usage_data.keys())
+    usage = np.array([usage_data[name].get("usage", 0) for name in names], dtype=np.float64)
+    order = np.argsort(-usage, kind="stable")
+    ranks = np.full(n, -1, dtype=np.int64)
+    ranks[np.array([ids[names[k]] for k in order], dtype=np.int64)] = np.arange(1, len(names) + 1)
+    return ranks
+
+def section_entries(usage_data, ids, vocab, chaos_key, norm):
+    rows, keys, shares = [], [], []
+    for name, pokemon_data in usage_data.items():
+        values = pokemon_data.get(chaos_key, {})
+        if not values:
+            continue
+        weight = section_weight(pokemon_data, values, norm)
+        row = ids[name]
+        for key, count in values.items():
+            rows.append(row)
+            keys.append(vocab.setdefault(key, len(vocab)))
+            shares.append(count / weight * 100)
+    return np.array(rows, dtype=np.int64), np.array(keys, dtype=np.int64), np.array(shares, dtype=np.float64)
+
+def row_ranks(rows, shares):
+    # 1-based position of each entry inside its Pokemon's list, by share (descending)
+    if not len(rows):
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((-shares, rows))
+    sorted_rows = rows[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_rows)) + 1]
+    run_start = np.repeat(starts, np.diff(np.r_[starts, len(sorted_rows)]))
+    ranks = np.empty(len(rows), dtype=np.int64)
+    ranks[order] = np.arange(len(rows)) - run_start + 1
+    return ranks
+
+def top_indices(values, top, mask=None):
+    candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(values))
+    if len(candidates) > top:
+        candidates = candidates[np.argpartition(-values[candidates], top - 1)[:top]]
+    return candidates[np.argsort(-values[candidates], kind="stable")]
+
+class UsageDiff:
+    # Two usage files aligned on one shared Pokemon id space; every section is
+    # held as (pokemon, key) entries keyed by pokemon * n_keys + key.
+
+    def __init__(self, old_data, new_data, display_names=None):
+        names = list(dict.fromkeys(list(old_data.keys()) + list(new_data.keys())))
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.display_names = display_names or {}
+        n = len(names)
+
+        self.old_usage = np.zeros(n)
+        self.new_usage = np.zeros(n)
+        self.old_present = np.zeros(n, dtype=bool)
+        self.new_present = np.zeros(n, dtype=bool)
+        for data, usage, present in ((old_data, self.old_usage, self.old_present), (new_data, self.new_usage, self.new_present)):
+            rows = np.array([self.ids[name] for name in data], dtype=np.int64)
+            usage[rows] = [pokemon_data.get("usage", 0) * 100 for pokemon_data in data.values()]
+            present[rows] = True
+        self.old_rank = usage_ranks(old_data, self.ids, n)
+        self.new_rank = usage_ranks(new_data, self.ids, n)
+
+        self.sections = {}
+        for section, (chaos_key, norm) in SECTIONS.items():
+            vocab = {}
+            old_rows, old_keys, old_shares = section_entries(old_data, self.ids, vocab, chaos_key, norm)
+            new_rows, new_keys, new_shares = section_entries(new_data, self.ids, vocab, chaos_key, norm)
+            width = max(len(vocab), 1)
+
+            old_lin = old_rows * width + old_keys
+            new_lin = new_rows * width + new_keys
+            lin = np.union1d(old_lin, new_lin)
+            old_pos = np.searchsorted(lin, old_lin)
+            new_pos = np.searchsorted(lin, new_lin)
+
+            old = np.zeros(len(lin))
+            new = np.zeros(len(lin))
+            old_ranks = np.zeros(len(lin), dtype=np.int64)
+            new_ranks = np.zeros(len(lin), dtype=np.int64)
+            old[old_pos] = old_shares
+            new[new_pos] = new_shares
+            old_ranks[old_pos] = row_ranks(old_rows, old_shares)
+            new_ranks[new_pos] = row_ranks(new_rows, new_shares)
+
+            self.sections[section] = {
+                "keys": list(vocab),
+                "rows": lin // width,
+                "key_ids": lin % width,
+                "old": old,
+                "new": new,
+                "old_rank": old_ranks,
+                "new_rank": new_ranks,
+            }
+
+    def usage_entry(self, i):
+        return {
+            "name": self.names[i],
+            "old_usage": round(float(self.old_usage[i]), 3),
+            "new_usage": round(float(self.new_usage[i]), 3),
+            "delta": round(float(self.new_usage[i] - self.old_usage[i]), 3),
+            "old_rank": int(self.old_rank[i]),
+            "new_rank": int(self.new_rank[i]),
+            "rank_shift": int(self.old_rank[i] - self.new_rank[i]) if self.old_present[i] and self.new_present[i] else None,
+        }
+
+    def usage_report(self, top=DEFAULT_TOP):
+        both = self.old_present & self.new_present
+        delta = self.new_usage - self.old_usage
+        return {
+            "risers": [self.usage_entry(i) for i in top_indices(delta, top, both & (delta > 0))],
+            "fallers": [self.usage_entry(i) for i in top_indices(-delta, top, both & (delta < 0))],
+            "entered": [self.usage_entry(i) for i in top_indices(self.new_usage, top, self.new_present & ~self.old_present)],
+            "left": [self.usage_entry(i) for i in top_indices(self.old_usage, top, self.old_present & ~self.new_present)],
+        }
+
+    def section_report(self, section, top=DEFAULT_TOP, pokemon=None):
+        data = self.sections[section]
+        rows = data["rows"]
+        # Shares only mean something for Pokemon present in both files
+        mask = self.old_present[rows] & self.new_present[rows]
+        if pokemon is not None:
+            mask &= rows == pokemon
+        delta = data["new"] - data["old"]
+
+        def entry(k):
+            key = data["keys"][data["key_ids"][k]]
+            return {
+                "pokemon": self.names[rows[k]],
+                "name": self.display_names.get(section, {}).get(key, key),
+                "old_percent": round(float(data["old"][k]), 3),
+                "new_percent": round(float(data["new"][k]), 3),
+                "delta": round(float(delta[k]), 3),
+                "old_rank": int(data["old_rank"][k]),
+                "new_rank": int(data["new_rank"][k]),
+            }
+
+        return {
+            "gains": [entry(k) for k in top_indices(delta, top, mask & (delta > 0))],
+            "losses": [entry(k) for k in top_indices(-delta, top, mask & (delta < 0))],
+        }
+
+    def report(self, top=DEFAULT_TOP, pokemon=None):
+        result = {}
+        if pokemon is None:
+            result["usage"] = self.usage_report(top)
+        else:
+            result["pokemon"] = self.usage_entry(pokemon)
+        for section in SECTIONS:
+            result[section] = self.section_report(section, top, pokemon)
+        return result
+
+def display_names(meta):
+    # meta: {"moves": moves.json, "items": items.json}; ids map to readable names
+    return {
+        section: {key: value.get("name", key) for key, value in (data or {}).items()}
+        for section, data in meta.items()
+    }
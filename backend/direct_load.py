@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import itertools
+
+import psycopg
+from psycopg import sql
+from psycopg.types.json import Jsonb
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend import uploader
+
+# Bulk-load path for full monthly loads: every table is COPY'd into a temp
+# staging table (temp tables are never WAL-logged) and merged into the real
+# table with a single INSERT ... ON CONFLICT, all inside one transaction.
+
+def adapt_value(value):
+    # Dicts go to jsonb columns; lists (e.g. pokedex.types) map to Postgres arrays
+    if isinstance(value, dict):
+        return Jsonb(value)
+    return value
+
+def stage_records(cur, table, staging, records, hashed):
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return None, 0
+
+    columns = list(first.keys())
+    if hashed and "content_hash" not in columns:
+        columns.append("content_hash")
+
+    cur.execute(sql.SQL("CREATE TEMP TABLE {} ON COMMIT DROP AS SELECT {} FROM {} WITH NO DATA").format(
+        sql.Identifier(staging),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+        sql.Identifier(table),
+    ))
+
+    staged = 0
+    copy_sql = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(staging), sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+    with cur.copy(copy_sql) as copy:
+        for record in itertools.chain([first], records):
+            if hashed:
+                record["content_hash"] = uploader.content_hash(record)
+            copy.write_row([adapt_value(record.get(column)) for column in columns])
+            staged += 1
+
+    return columns, staged
+
+def count_existing(cur, table, staging, key_columns):
+    cur.execute(sql.SQL("SELECT count(*) FROM {staging} s JOIN {table} t USING ({keys})").format(
+        table=sql.Identifier(table),
+        staging=sql.Identifier(staging),
+        keys=sql.SQL(", ").join(map(sql.Identifier, key_columns)),
+    ))
+    return cur.fetchone()[0]
+
+def merge_staging(cur, table, staging, columns, key_columns, hashed, staged):
+    # xmax can't be returned from a partitioned table, so inserts are counted up front
+    inserted = staged - count_existing(cur, table, staging, key_columns)
+
+    update_columns = [column for column in columns if column not in key_columns]
+    query = sql.SQL(
+        "INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} "
+        "ON CONFLICT ({keys}) DO UPDATE SET {updates}"
+    ).format(
+        table=sql.Identifier(table),
+        staging=sql.Identifier(staging),
+        columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+        keys=sql.SQL(", ").join(map(sql.Identifier, key_columns)),
+        updates=sql.SQL(", ").join(
+            sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(column)) for column in update_columns
+        ),
+    )
+    if hashed:
+        # Rows whose hash is unchanged are skipped entirely: no new tuple, no WAL
+        query += sql.SQL(" WHERE {table}.content_hash IS DISTINCT FROM EXCLUDED.content_hash").format(
+            table=sql.Identifier(table)
+        )
+
+    cur.execute(query)
+    return inserted, cur.rowcount - inserted
+
+def prune_missing(cur, table, staging, key_columns):
+    cur.execute(sql.SQL("DELETE FROM {table} t WHERE NOT EXISTS (SELECT 1 FROM {staging} s WHERE {match})").format(
+        table=sql.Identifier(table),
+        staging=sql.Identifier(staging),
+        match=sql.SQL(" AND ").join(
+            sql.SQL("s.{0} = t.{0}").format(sql.Identifier(column)) for column in key_columns
+        ),
+    ))
+    return cur.rowcount
+
+def load_tables(conninfo, tables, prune=False):
+    # tables: list of dicts with table, records, key (columns), hashed and
+    # optional prepare queries, ordered so referenced tables come first
+    results = []
+    start = time.perf_counter()
+
+    with psycopg.connect(conninfo) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL synchronous_commit = off")
+
+            for spec in tables:
+                table = spec["table"]
+                staging = f"{table}_staging"
+                table_start = time.perf_counter()
+
+                for query, params in spec.get("prepare", []):
+                    cur.execute(query, params)
+
+                columns, staged = stage_records(cur, table, staging, spec["records"], spec.get("hashed", True))
+                result = {"table": table, "staged": staged, "inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+                if columns:
+                    result["inserted"], result["updated"] = merge_staging(cur, table, staging, columns, spec["key"], spec.get("hashed", True), staged)
+                    result["unchanged"] = staged - result["inserted"] - result["updated"]
+                result["seconds"] = time.perf_counter() - table_start
+                result["staging"] = staging if columns else None
+                results.append(result)
+                print(f"  {table}: {staged} staged, {result['inserted']} inserted, {result['updated']} updated, {result['unchanged']} unchanged ({result['seconds']:.2f}s)")
+
+            if prune:
+                # Children first so foreign keys never block a delete
+                for spec, result in reversed(list(zip(tables, results))):
+                    if result["staging"]:
+                        result["deleted"] = prune_missing(cur, spec["table"], result["staging"], spec["key"])
+                        if result["deleted"]:
+                            print(f"  {spec['table']}: {result['deleted']} deleted")
+
+        # Leaving the connection block commits the whole load as one transaction
+    seconds = time.perf_counter() - start
+    staged = sum(result["staged"] for result in results)
+    print(f"Direct load committed: {staged} rows staged in {seconds:.2f}s ({staged / max(seconds, 1e-9):.0f} rows/s)")
+    return results
@@ -15,12 +15,33 @@ def fix_js_to_json(js_content):
     
     return content
 
+def fetch_text(url):
+    response = requests.get(url)
+    # An error page must never replace good metadata
+    response.raise_for_status()
+    return response.text
+
+def save_meta(path, content, check_json=True):
+    # Rejects anything that doesn't parse, and leaves an unchanged file alone so
+    # the mtimes the pipeline keys later stages on stay put
+    if check_json:
+        json.loads(content)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                print(f"{os.path.basename(path)} is unchanged")
+                return
+    except OSError:
+        pass
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
 def extract_battle_icon_indexes_from_url(url, output_path):
     print(f"Downloading form data from {url}...")
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        content = response.text
+        content = fetch_text(url)
         
         start = content.find('{')
         end = content.rfind('}')
@@ -34,73 +55,81 @@ def extract_battle_icon_indexes_from_url(url, output_path):
             except json.JSONDecodeError:
                 final_content = re.sub(r',(\s*[\}\]])', r'\1', raw_obj)
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(final_content)
+            # Best effort like before: the trailing-comma fix may still not be strict JSON
+            save_meta(output_path, final_content, check_json=False)
             print(f"Saved to {output_path}")
+            return True
         else:
             print("Could not find JSON object in response.")
             
     except Exception as e:
         print(f"Failed to extract icons index: {e}")
+    return False
 
 def download_meta():
     os.makedirs(META_DIR, exist_ok=True)
+    ok = True
     
     print("Getting item data.")
     url = 'https://play.pokemonshowdown.com/data/items.js'
     try:
-        itemJS = requests.get(url).text
+        itemJS = fetch_text(url)
         start_idx = itemJS.find('{')
-        if start_idx != -1:
-            itemRaw = itemJS[start_idx:]
-            if itemRaw.strip().endswith(';'):
-                itemRaw = itemRaw.strip()[:-1]
-            
-            itemRaw = fix_js_to_json(itemRaw)
-            
-            with open(os.path.join(META_DIR, 'items.json'), 'w', encoding="utf-8") as file:
-                file.write(itemRaw)
+        if start_idx == -1:
+            raise ValueError("no object literal in response")
+        itemRaw = itemJS[start_idx:]
+        if itemRaw.strip().endswith(';'):
+            itemRaw = itemRaw.strip()[:-1]
+        
+        itemRaw = fix_js_to_json(itemRaw)
+        
+        save_meta(os.path.join(META_DIR, 'items.json'), itemRaw)
     except Exception as e:
         print(f"Error downloading items: {e}")
+        ok = False
 
     print("Getting ability data.")
     url = 'https://play.pokemonshowdown.com/data/abilities.js'
     try:
-        abilitiesJS = requests.get(url).text
+        abilitiesJS = fetch_text(url)
         start_idx = abilitiesJS.find('{')
-        if start_idx != -1:
-            abilitiesRaw = abilitiesJS[start_idx:]
-            if abilitiesRaw.strip().endswith(';'):
-                abilitiesRaw = abilitiesRaw.strip()[:-1]
-            
-            abilitiesRaw = fix_js_to_json(abilitiesRaw)
-            
-            with open(os.path.join(META_DIR, 'abilities.json'), 'w', encoding="utf-8") as file:
-                file.write(abilitiesRaw)
+        if start_idx == -1:
+            raise ValueError("no object literal in response")
+        abilitiesRaw = abilitiesJS[start_idx:]
+        if abilitiesRaw.strip().endswith(';'):
+            abilitiesRaw = abilitiesRaw.strip()[:-1]
+        
+        abilitiesRaw = fix_js_to_json(abilitiesRaw)
+        
+        save_meta(os.path.join(META_DIR, 'abilities.json'), abilitiesRaw)
     except Exception as e:
         print(f"Error downloading abilities: {e}")
+        ok = False
 
     print("Getting move data.")
     url = 'https://play.pokemonshowdown.com/data/moves.json'
     try:
-        movesRaw = requests.get(url).text
-        with open(os.path.join(META_DIR, 'moves.json'), 'w', encoding="utf-8") as file:
-            file.write(movesRaw)
+        movesRaw = fetch_text(url)
+        save_meta(os.path.join(META_DIR, 'moves.json'), movesRaw)
     except Exception as e:
         print(f"Error downloading moves: {e}")
+        ok = False
 
     print("Getting pokedex data.")
     url = 'https://play.pokemonshowdown.com/data/pokedex.json'
     try:
-        pokedexRaw = requests.get(url).text
-        with open(os.path.join(META_DIR, 'pokedex.json'), 'w', encoding="utf-8") as file:
-            file.write(pokedexRaw)
+        pokedexRaw = fetch_text(url)
+        save_meta(os.path.join(META_DIR, 'pokedex.json'), pokedexRaw)
     except Exception as e:
         print(f"Error downloading pokedex: {e}")
+        ok = False
 
     print("Getting form data.")
     url = 'https://raw.githubusercontent.com/smogon/sprites/master/ps-pokemon.sheet.mjs'
-    extract_battle_icon_indexes_from_url(url, os.path.join(META_DIR, 'forms_index.json'))
+    if not extract_battle_icon_indexes_from_url(url, os.path.join(META_DIR, 'forms_index.json')):
+        ok = False
+    
+    return ok
 
 if __name__ == "__main__":
     download_meta()
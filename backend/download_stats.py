@@ -5,6 +5,7 @@ import gzip
 import shutil
 from urllib.parse import urljoin
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 def get_prev_month(date_str):
     year, month = map(int, date_str.split('-'))
@@ -13,20 +14,43 @@ def get_prev_month(date_str):
     prev_month_date = dt - datetime.timedelta(days=1)
     return prev_month_date.strftime("%Y-%m")
 
-def download_all(date_str):
+def download_file(http, file_url, raw_path, filename):
+    if os.path.exists(raw_path):
+        print(f"Skipping {filename} (already exists)")
+        return True
+
+    print(f"Downloading {filename}...")
+    tmp_path = raw_path + ".part"
+    try:
+        with http.get(file_url, stream=True) as r:
+            r.raise_for_status()
+            with open(tmp_path, 'wb') as f:
+                for chunk in r.iter_content(chunk_size=8192):
+                    f.write(chunk)
+        # Only complete files get the real name, so an interrupted run retries them
+        os.replace(tmp_path, raw_path)
+        return True
+    except Exception as e:
+        print(f"Failed to download {filename}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+def download_all(date_str, session=None, workers=1):
     base_url = f"https://www.smogon.com/stats/{date_str}/chaos/"
     # Assuming 'data' is the root folder for all stats
     raw_dir = os.path.join("data", date_str, "raw")
+    http = session or requests
     
     os.makedirs(raw_dir, exist_ok=True)
 
     print(f"Fetching file list from {base_url}...")
     try:
-        response = requests.get(base_url)
+        response = http.get(base_url)
         response.raise_for_status()
     except requests.RequestException as e:
         print(f"Error fetching page: {e}")
-        return
+        return False
 
     soup = BeautifulSoup(response.text, 'html.parser')
     links = soup.find_all('a')
@@ -36,31 +60,40 @@ def download_all(date_str):
     
     print(f"Found {len(json_gz_links)} files to download for {date_str}.")
 
-    for filename in json_gz_links:
-        file_url = urljoin(base_url, filename)
-        raw_path = os.path.join(raw_dir, filename)
-
-        if os.path.exists(raw_path):
-            print(f"Skipping {filename} (already exists)")
-            continue
-
-        print(f"Downloading {filename}...")
-        try:
-            with requests.get(file_url, stream=True) as r:
-                r.raise_for_status()
-                with open(raw_path, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk)
-        except Exception as e:
-            print(f"Failed to download {filename}: {e}")
-
-def extract_all(date_str):
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        results = list(pool.map(
+            lambda filename: download_file(http, urljoin(base_url, filename), os.path.join(raw_dir, filename), filename),
+            json_gz_links
+        ))
+
+    return all(results)
+
+def extract_file(raw_path, json_path, filename, json_filename):
+    if os.path.exists(json_path):
+        print(f"Skipping extraction of {json_filename} (already exists)")
+        return True
+
+    print(f"Extracting {filename} to {json_filename}...")
+    tmp_path = json_path + ".tmp"
+    try:
+        with gzip.open(raw_path, 'rb') as f_in:
+            with open(tmp_path, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+        os.replace(tmp_path, json_path)
+        return True
+    except Exception as e:
+        print(f"Failed to extract {filename}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+def extract_all(date_str, workers=1):
     raw_dir = os.path.join("data", date_str, "raw")
     data_dir = os.path.join("data", date_str, "data")
     
     if not os.path.exists(raw_dir):
         print(f"Raw directory {raw_dir} does not exist. Nothing to extract.")
-        return
+        return False
 
     os.makedirs(data_dir, exist_ok=True)
     
@@ -68,23 +101,20 @@ def extract_all(date_str):
     files = [f for f in os.listdir(raw_dir) if f.endswith('.json.gz')]
     print(f"Found {len(files)} files to extract in {raw_dir}.")
 
-    for filename in files:
-        raw_path = os.path.join(raw_dir, filename)
-        # Remove .gz extension for the output filename
-        json_filename = filename[:-3] 
-        json_path = os.path.join(data_dir, json_filename)
-
-        if os.path.exists(json_path):
-            print(f"Skipping extraction of {json_filename} (already exists)")
-            continue
-
-        print(f"Extracting {filename} to {json_filename}...")
-        try:
-            with gzip.open(raw_path, 'rb') as f_in:
-                with open(json_path, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-        except Exception as e:
-            print(f"Failed to extract {filename}: {e}")
+    # Remove .gz extension for the output filename
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        results = list(pool.map(
+            lambda filename: extract_file(os.path.join(raw_dir, filename), os.path.join(data_dir, filename[:-3]), filename, filename[:-3]),
+            files
+        ))
+
+    return all(results)
+
+def delete_raw(date_str):
+    raw_dir = os.path.join("data", date_str, "raw")
+    if os.path.exists(raw_dir):
+        print(f"Deleting {raw_dir}...")
+        shutil.rmtree(raw_dir)
 
 def delete_all(date_str):
     data_dir = os.path.join("data", date_str, "data")
@@ -1,7 +1,6 @@
 import os
-import json
 import sys
-import time
+import argparse
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
@@ -11,18 +10,31 @@ load_dotenv()
 # Add parent directory to path to import process_data
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from backend import process_data
+from backend import uploader
+from backend import records
+from backend import direct_load
+from backend import metrics
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
 
 # Supabase setup
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
+# Postgres connection string used by --direct (Supabase: Settings > Database)
+SUPABASE_DB_URL = os.environ.get("SUPABASE_DB_URL")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("Error: SUPABASE_URL and SUPABASE_SERVICE_KEY environment variables must be set.")
-    sys.exit(1)
+# Entries at or above this usage percent are copied into the typed top_* columns
+HOT_MIN_USAGE = 5.0
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Key columns of pokemon_stats, ordered so deletes group by format and rating
+POKEMON_STATS_KEY = ["format_id", "rating", "pokemon_name"]
+
+def create_supabase_client() -> Client:
+    # SUPABASE_URL may also point at a local PostgREST-compatible stand-in
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("Error: SUPABASE_URL and SUPABASE_SERVICE_KEY environment variables must be set.")
+        sys.exit(1)
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
 
 def load_meta_data():
     meta_dir = os.path.join(DATA_DIR, "meta")
@@ -32,33 +44,6 @@ def load_meta_data():
     abilities = process_data.load_data(os.path.join(meta_dir, "abilities.json"))
     return pokedex, moves, items, abilities
 
-def get_formats(date_dir):
-    data_path = os.path.join(date_dir, "data")
-    files = os.listdir(data_path)
-    formats = {}
-    
-    for f in files:
-        if not f.endswith(".json"):
-            continue
-            
-        parts = f.rsplit("-", 1)
-        if len(parts) != 2:
-            continue
-            
-        fmt_name = parts[0]
-        rating_str = parts[1].replace(".json", "")
-        
-        try:
-            rating = int(rating_str)
-        except ValueError:
-            continue
-            
-        if fmt_name not in formats:
-            formats[fmt_name] = []
-        formats[fmt_name].append(rating)
-        
-    return formats
-
 def setup_database():
     print("Setting up database schema...")
     schema_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.sql")
@@ -90,28 +75,7 @@ def setup_database():
     print(sql)
     print("-" * 50)
 
-def main():
-    if len(sys.argv) > 1 and sys.argv[1] == "--setup":
-        setup_database()
-        return
-
-    print("Starting data upload to Supabase...")
-    
-    latest_date = process_data.get_latest_date(DATA_DIR)
-    if not latest_date:
-        print("No data found.")
-        return
-        
-    print(f"Using data from: {latest_date}")
-    date_dir = os.path.join(DATA_DIR, latest_date)
-    
-    pokedex, moves, items, abilities = load_meta_data()
-    
-    # Upload Metadata
-    print("Uploading metadata...")
-    
-    # Moves
-    moves_batch = []
+def build_move_records(moves):
     for move_id, move_data in moves.items():
         # Sanitize base_power
         bp = move_data.get("basePower", 0)
@@ -125,7 +89,7 @@ def main():
         elif not isinstance(acc, (int, float)):
             acc = None
             
-        moves_batch.append({
+        yield {
             "id": move_id,
             "name": move_data.get("name"),
             "type": move_data.get("type"),
@@ -133,134 +97,201 @@ def main():
             "base_power": int(bp),
             "accuracy": int(acc) if acc is not None else None,
             "description": move_data.get("desc")
-        })
-        if len(moves_batch) >= 100:
-            supabase.table("moves").upsert(moves_batch).execute()
-            moves_batch = []
-    if moves_batch:
-        supabase.table("moves").upsert(moves_batch).execute()
-        
-    # Items
-    items_batch = []
+        }
+
+def build_item_records(items):
     for item_id, item_data in items.items():
-        items_batch.append({
+        yield {
             "id": item_id,
             "name": item_data.get("name"),
             "description": item_data.get("desc"),
             "spritenum": item_data.get("spritenum")
-        })
-        if len(items_batch) >= 100:
-            supabase.table("items").upsert(items_batch).execute()
-            items_batch = []
-    if items_batch:
-        supabase.table("items").upsert(items_batch).execute()
-        
-    # Abilities
-    abilities_batch = []
+        }
+
+def build_ability_records(abilities):
     for ability_id, ability_data in abilities.items():
-        abilities_batch.append({
+        yield {
             "id": ability_id,
             "name": ability_data.get("name"),
             "description": ability_data.get("desc")
-        })
-        if len(abilities_batch) >= 100:
-            supabase.table("abilities").upsert(abilities_batch).execute()
-            abilities_batch = []
-    if abilities_batch:
-        supabase.table("abilities").upsert(abilities_batch).execute()
-        
-    # Pokedex
-    pokedex_batch = []
+        }
+
+def build_pokedex_records(pokedex):
     for mon_name, mon_data in pokedex.items():
-        pokedex_batch.append({
+        yield {
             "name": mon_name,
             "types": mon_data.get("types"),
             "base_stats": mon_data.get("baseStats"),
             "abilities": mon_data.get("abilities")
-        })
-        if len(pokedex_batch) >= 100:
-            supabase.table("pokedex").upsert(pokedex_batch).execute()
-            pokedex_batch = []
-    if pokedex_batch:
-        supabase.table("pokedex").upsert(pokedex_batch).execute()
-
-    formats_map = get_formats(date_dir)
+        }
+
+def build_format_row(fmt, header):
+    return {
+        "id": fmt,
+        "name": fmt, # You might want a prettier name map later
+        "generation": header.get("generation", 0),
+        "total_battles": header.get("total_battles", 0)
+    }
+
+def hot_ids(entries, key="id"):
+    return [entry[key] for entry in entries if entry["usage_percent"] >= HOT_MIN_USAGE]
+
+def build_pokemon_records(fmt, records_path):
+    print(f"Processing {fmt}...")
+    for record in records.iter_records(records_path):
+        mon_name = record["pokemon_name"]
+        safe_name = mon_name.lower().replace(" ", "-").replace(".", "").replace(":", "").replace("'", "")
+
+        yield {
+            "format_id": fmt,
+            "pokemon_name": mon_name,
+            "slug": safe_name,
+            "rating": record["rating"],
+            "usage_percent": record["usage_percent"],
+            "rank": record["rank"],
+            # Hot fields as typed columns so filters don't have to detoast data
+            "types": record["data"].get("types", []),
+            "top_moves": hot_ids(record["data"].get("moves", [])),
+            "top_items": hot_ids(record["data"].get("items", [])),
+            "top_abilities": hot_ids(record["data"].get("abilities", [])),
+            "top_tera_types": hot_ids(record["data"].get("tera_types", []), "tera_type"),
+            "data": record["data"]
+        }
+
+def upload_direct(conninfo, pokedex, moves, items, abilities, record_paths, prune=False, tracker=None):
+    print("Bulk loading through a direct Postgres connection...")
+    headers = {fmt: records.read_header(path) for fmt, path in record_paths.items()}
+    headers = {fmt: header for fmt, header in headers.items() if header}
+
+    def pokemon_rows():
+        for fmt in headers:
+            yield from build_pokemon_records(fmt, record_paths[fmt])
+
+    tracker = tracker or metrics.Metrics("upload_direct")
+    with tracker.stage("direct_load") as stage:
+        results = direct_load.load_tables(conninfo, [
+            {"table": "moves", "records": build_move_records(moves), "key": ["id"]},
+            {"table": "items", "records": build_item_records(items), "key": ["id"]},
+            {"table": "abilities", "records": build_ability_records(abilities), "key": ["id"]},
+            {"table": "pokedex", "records": build_pokedex_records(pokedex), "key": ["name"]},
+            {"table": "formats", "records": (build_format_row(fmt, header) for fmt, header in headers.items()), "key": ["id"], "hashed": False},
+            {"table": "pokemon_stats", "records": pokemon_rows(), "key": ["format_id", "pokemon_name", "rating"],
+             "prepare": [("SELECT ensure_pokemon_stats_partition(%s)", (fmt,)) for fmt in headers]},
+        ], prune=prune)
+        stage.add(rows=sum(result["staged"] for result in results),
+                  bytes_read=sum(os.path.getsize(record_paths[fmt]) for fmt in headers))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Upload processed stats to Supabase")
+    parser.add_argument("--setup", action="store_true", help="Print the SQL schema to run in Supabase")
+    parser.add_argument("--workers", type=int, default=uploader.DEFAULT_WORKERS, help="Upload requests kept in flight")
+    parser.add_argument("--max-batch-bytes", type=int, default=uploader.DEFAULT_MAX_BATCH_BYTES, help="Serialized size limit per upsert request")
+    parser.add_argument("--direct", nargs="?", const="", metavar="CONNINFO", help="Bulk load with COPY over a Postgres connection (default: $SUPABASE_DB_URL)")
+    parser.add_argument("--prune", action="store_true", help="Delete rows that no longer exist in the source data")
+    parser.add_argument("--force", action="store_true", help="Re-upload rows even when their content hash is unchanged")
+    parser.add_argument("--retries", type=int, default=uploader.DEFAULT_RETRIES, help="Retries per request on transient errors")
+    metrics.add_arguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.setup:
+        setup_database()
+        return
+
+    conninfo = None
+    if args.direct is not None:
+        conninfo = args.direct or SUPABASE_DB_URL
+        if not conninfo:
+            print("Error: --direct needs a connection string or the SUPABASE_DB_URL environment variable.")
+            sys.exit(1)
+        supabase = None
+    else:
+        supabase = create_supabase_client()
+
+    upload_options = {
+        "max_batch_bytes": args.max_batch_bytes,
+        "workers": args.workers,
+        "retries": args.retries,
+    }
+    sync_options = dict(upload_options, prune=args.prune, force=args.force)
+
+    tracker = metrics.Metrics("integration", profile=args.profile, trace_memory=args.trace_memory)
+    print("Starting data upload to Supabase...")
+    
+    latest_date = process_data.get_latest_date(DATA_DIR)
+    if not latest_date:
+        print("No data found.")
+        return
+        
+    print(f"Using data from: {latest_date}")
+    date_dir = os.path.join(DATA_DIR, latest_date)
     
-    # Clear existing data? Or maybe just upsert.
-    # For now, we'll assume upsert.
+    with tracker.stage("load_meta"):
+        pokedex, moves, items, abilities = load_meta_data()
     
-    for fmt, ratings in formats_map.items():
-        # Try to get total battles from the '0' rating file
-        total_battles = 0
-        if 0 in ratings:
-            base_file = os.path.join(date_dir, "data", f"{fmt}-0.json")
-            try:
-                # We use process_data.load_data which handles errors
-                base_data = process_data.load_data(base_file)
-                if base_data and "info" in base_data:
-                    total_battles = base_data["info"].get("number of battles", 0)
-            except Exception as e:
-                print(f"Error reading battle count for {fmt}: {e}")
-
-        # Insert format
-        print(f"Upserting format: {fmt} (Battles: {total_battles})")
-        supabase.table("formats").upsert({
-            "id": fmt,
-            "name": fmt, # You might want a prettier name map later
-            "generation": 9, # Defaulting to 9 for now, logic can be improved
-            "total_battles": total_battles
-        }).execute()
-
-        for rating in ratings:
-            filename = f"{fmt}-{rating}.json"
-            file_path = os.path.join(date_dir, "data", filename)
-            
-            print(f"Processing {fmt} (Rating: {rating})...")
-            
-            usage_data_full = process_data.load_data(file_path)
-            if not usage_data_full:
-                print(f"  Failed to load {filename}")
+    if conninfo:
+        with tracker.stage("records", month=latest_date):
+            record_paths = records.build_month_records(date_dir, (pokedex, moves, items, abilities), os.path.join(DATA_DIR, "meta"))
+        upload_direct(conninfo, pokedex, moves, items, abilities, record_paths, args.prune, tracker)
+        print("Data upload complete.")
+        tracker.write_report(args.metrics_out)
+        return
+
+    # Upload Metadata
+    print("Uploading metadata...")
+    with tracker.stage("upload_meta") as stage:
+        for table, table_records, key in [
+            ("moves", build_move_records(moves), ["id"]),
+            ("items", build_item_records(items), ["id"]),
+            ("abilities", build_ability_records(abilities), ["id"]),
+            ("pokedex", build_pokedex_records(pokedex), ["name"]),
+        ]:
+            stats = uploader.sync_records(supabase, table, table_records, key, **sync_options)
+            stage.add(rows=stats["rows"], bytes_written=stats["bytes"])
+
+    # Reuses the month's precomputed records (built here if build_db hasn't already)
+    with tracker.stage("records", month=latest_date):
+        record_paths = records.build_month_records(date_dir, (pokedex, moves, items, abilities), os.path.join(DATA_DIR, "meta"))
+    
+    totals = {"rows": 0, "bytes": 0, "seconds": 0, "inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+
+    if args.prune:
+        existing_formats = {key[0] for key in uploader.fetch_existing_hashes(supabase, "formats", ["id"], hash_column=None)}
+        for fmt in sorted(existing_formats - set(record_paths)):
+            print(f"Removing format no longer present: {fmt}")
+            existing = uploader.fetch_existing_hashes(supabase, "pokemon_stats", POKEMON_STATS_KEY, {"format_id": fmt})
+            totals["deleted"] += uploader.delete_keys(supabase, "pokemon_stats", POKEMON_STATS_KEY, list(existing), {"format_id": fmt})
+            uploader.delete_keys(supabase, "formats", ["id"], [(fmt,)])
+
+    for fmt, records_path in record_paths.items():
+        with tracker.stage("format", format=fmt) as stage:
+            header = records.read_header(records_path)
+            if not header:
+                print(f"  Failed to read records for {fmt}")
                 continue
-                
-            usage_data = usage_data_full.get("data", {})
-            sorted_mons = sorted(usage_data.keys(), key=lambda x: usage_data[x].get("usage", 0), reverse=True)
-            
-            batch_size = 50
-            batch = []
-            
-            for rank, mon_name in enumerate(sorted_mons, 1):
-                usage_val = usage_data[mon_name].get("usage", 0)
-                full_stats = process_data.collect_pokemon_stats(
-                    mon_name, usage_data, pokedex, moves, items, abilities
-                )
-                
-                if not full_stats:
-                    continue
-
-                safe_name = mon_name.lower().replace(" ", "-").replace(".", "").replace(":", "").replace("'", "")
-
-                # Prepare record
-                record = {
-                    "format_id": fmt,
-                    "pokemon_name": mon_name,
-                    "slug": safe_name,
-                    "rating": rating,
-                    "usage_percent": round(usage_val * 100, 3),
-                    "rank": rank,
-                    "data": full_stats
-                }
-                batch.append(record)
-                
-                if len(batch) >= batch_size:
-                    print(f"  Uploading batch of {len(batch)} pokemon...")
-                    supabase.table("pokemon_stats").upsert(batch, on_conflict="format_id,pokemon_name,rating").execute()
-                    batch = []
-                    
-            if batch:
-                print(f"  Uploading final batch of {len(batch)} pokemon...")
-                supabase.table("pokemon_stats").upsert(batch, on_conflict="format_id,pokemon_name,rating").execute()
-            
+            total_battles = header.get("total_battles", 0)
+
+            # Insert format
+            print(f"Upserting format: {fmt} (Battles: {total_battles})")
+            format_row = build_format_row(fmt, header)
+            uploader.call_with_retries(lambda: supabase.table("formats").upsert(format_row).execute(), args.retries, label=f"format {fmt}")
+
+            uploader.call_with_retries(lambda: supabase.rpc("ensure_pokemon_stats_partition", {"fmt": fmt}).execute(), args.retries, label=f"partition {fmt}")
+
+            # Rows are streamed from the records file while uploads are in flight.
+            # Existing hashes are fetched once per format and unchanged rows are skipped.
+            rows = build_pokemon_records(fmt, records_path)
+            stats = uploader.sync_records(supabase, "pokemon_stats", rows, POKEMON_STATS_KEY, {"format_id": fmt}, **sync_options)
+            for key in totals:
+                totals[key] += stats[key]
+            stage.add(rows=stats["rows"], bytes_read=os.path.getsize(records_path), bytes_written=stats["bytes"])
+
+    seconds = max(totals["seconds"], 1e-9)
+    print(f"Pokemon rows: {totals['inserted']} inserted, {totals['updated']} updated, {totals['unchanged']} unchanged, {totals['deleted']} deleted")
+    print(f"Uploaded {totals['rows']} pokemon rows ({totals['bytes'] / (1024 * 1024):.2f} MB) in {totals['seconds']:.2f}s ({totals['rows'] / seconds:.0f} rows/s)")
     print("Data upload complete.")
+    tracker.write_report(args.metrics_out)
 
 if __name__ == "__main__":
     main()
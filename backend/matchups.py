@@ -0,0 +1,159 @@
+import numpy as np
+from . import process_data
+
+# Same cut-offs extract_checks_and_counters uses
+DEFAULT_MIN_SCORE = 0.5
+DEFAULT_MAX_STDDEV = 0.1
+
+class MatchupGraph:
+    # "Checks and Counters" of one stats file as CSR arrays: row i holds the
+    # Pokemon that check names[i], sorted by score (descending) so a score
+    # threshold is a binary search on the row instead of a rebuild.
+
+    def __init__(self, usage_data):
+        names = list(usage_data.keys())
+        index = {name: i for i, name in enumerate(names)}
+        for data in usage_data.values():
+            for counter in data.get("Checks and Counters", {}):
+                if counter not in index:
+                    index[counter] = len(names)
+                    names.append(counter)
+
+        self.names = names
+        self.index = index
+        self.lookup = process_data.create_lookup_map(usage_data.keys())
+        self.usage = np.array([usage_data[name].get("usage", 0) if name in usage_data else 0 for name in names], dtype=np.float64)
+
+        n = len(names)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        cols, counts, scores, stddevs = [], [], [], []
+        for i, name in enumerate(names):
+            counters = usage_data[name].get("Checks and Counters", {}) if name in usage_data else {}
+            indptr[i + 1] = indptr[i] + len(counters)
+            for counter, stats in counters.items():
+                cols.append(index[counter])
+                counts.append(stats[0])
+                scores.append(stats[1])
+                stddevs.append(stats[2])
+
+        indices = np.array(cols, dtype=np.int32)
+        counts = np.array(counts, dtype=np.float64)
+        scores = np.array(scores, dtype=np.float64)
+        stddevs = np.array(stddevs, dtype=np.float64)
+
+        # Sort each row by score, descending; stable so ties keep file order
+        row_of = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+        order = np.lexsort((np.arange(len(scores)), -scores, row_of))
+        self.indptr = indptr
+        self.row_of = row_of
+        self.indices = indices[order]
+        self.counts = counts[order]
+        self.scores = scores[order]
+        self.stddevs = stddevs[order]
+
+        # Transpose (edge ids grouped by the checking Pokemon) for reverse lookups
+        by_col = np.lexsort((self.row_of, self.indices))
+        self.t_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=n), out=self.t_indptr[1:])
+        self.t_edges = by_col
+
+        self._masks = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def top_pokemon(self):
+        return self.names[int(np.argmax(self.usage))] if len(self.names) else None
+
+    def resolve(self, pokemon_name):
+        matched = process_data.fuzzy_match(pokemon_name, self.lookup.values(), self.lookup)
+        return self.index[matched] if matched else None
+
+    def edge_mask(self, min_score=DEFAULT_MIN_SCORE, max_stddev=DEFAULT_MAX_STDDEV):
+        key = (min_score, max_stddev)
+        if key not in self._masks:
+            if len(self._masks) >= 8:
+                self._masks.pop(next(iter(self._masks)))
+            mask = (self.scores > min_score) & (self.stddevs < max_stddev)
+            # Exclusive prefix sum of the mask, used to rank an edge within its row
+            prefix = np.zeros(len(mask) + 1, dtype=np.int64)
+            np.cumsum(mask, out=prefix[1:])
+            self._masks[key] = (mask, prefix)
+        return self._masks[key]
+
+    def row_edges(self, i, min_score=DEFAULT_MIN_SCORE, max_stddev=DEFAULT_MAX_STDDEV):
+        start, end = self.indptr[i], self.indptr[i + 1]
+        # Scores are descending, so everything above min_score is a prefix of the row
+        cut = start + np.searchsorted(-self.scores[start:end], -min_score, side="left")
+        edges = np.arange(start, cut)
+        return edges[self.stddevs[start:cut] < max_stddev]
+
+    def edge_entry(self, edge, name_index):
+        return {
+            "name": self.names[name_index],
+            "score": round(float(self.scores[edge]) * 100, 3),
+            "count": float(self.counts[edge]),
+            "usage_percent": round(float(self.usage[name_index]) * 100, 3),
+        }
+
+    def counters(self, i, min_score=DEFAULT_MIN_SCORE, max_stddev=DEFAULT_MAX_STDDEV):
+        return [self.edge_entry(e, self.indices[e]) for e in self.row_edges(i, min_score, max_stddev)]
+
+    def countered_by(self, i, min_score=DEFAULT_MIN_SCORE, max_stddev=DEFAULT_MAX_STDDEV):
+        mask, prefix = self.edge_mask(min_score, max_stddev)
+        edges = self.t_edges[self.t_indptr[i]:self.t_indptr[i + 1]]
+        edges = edges[mask[edges]]
+        rows = self.row_of[edges]
+        ranks = prefix[edges + 1] - prefix[self.indptr[rows]]
+
+        order = np.argsort(-self.scores[edges], kind="stable")
+        result = []
+        for k in order:
+            entry = self.edge_entry(edges[k], rows[k])
+            entry["rank"] = int(ranks[k])
+            result.append(entry)
+        return result
+
+    def leaderboard(self, min_score=DEFAULT_MIN_SCORE, max_stddev=DEFAULT_MAX_STDDEV):
+        mask, _ = self.edge_mask(min_score, max_stddev)
+        n = len(self.names)
+        cols = self.indices[mask]
+        counts = np.bincount(cols, minlength=n)
+        totals = np.bincount(cols, weights=np.round(self.scores[mask] * 100, 3), minlength=n)
+
+        ids = np.nonzero(counts)[0]
+        avg = totals[ids] / counts[ids]
+        order = np.lexsort((ids, -avg, -counts[ids]))
+        return [{"index": int(ids[k]), "name": self.names[ids[k]], "count": int(counts[ids[k]]), "avg_score": float(avg[k])} for k in order]
+
+    def victims(self, i, min_score=DEFAULT_MIN_SCORE, max_stddev=DEFAULT_MAX_STDDEV):
+        mask, _ = self.edge_mask(min_score, max_stddev)
+        edges = self.t_edges[self.t_indptr[i]:self.t_indptr[i + 1]]
+        return [self.names[r] for r in self.row_of[edges[mask[edges]]]]
+
+    def two_hop(self, i, min_score=DEFAULT_MIN_SCORE, max_stddev=DEFAULT_MAX_STDDEV):
+        # Checks of my checks: who beats the Pokemon that beat names[i]
+        first = self.indices[self.row_edges(i, min_score, max_stddev)]
+        if not len(first):
+            return []
+
+        mask, _ = self.edge_mask(min_score, max_stddev)
+        starts, ends = self.indptr[first], self.indptr[first + 1]
+        edges = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+        edges = edges[mask[edges]]
+        cols = self.indices[edges]
+
+        n = len(self.names)
+        counts = np.bincount(cols, minlength=n)
+        totals = np.bincount(cols, weights=self.scores[edges], minlength=n)
+        counts[i] = 0
+
+        ids = np.nonzero(counts)[0]
+        avg = totals[ids] / counts[ids]
+        order = np.lexsort((-avg, -counts[ids]))
+        return [{
+            "name": self.names[ids[k]],
+            "checks_beaten": int(counts[ids[k]]),
+            "avg_score": round(float(avg[k]) * 100, 3),
+            "usage_percent": round(float(self.usage[ids[k]]) * 100, 3),
+        } for k in order]
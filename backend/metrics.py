@@ -0,0 +1,214 @@
+import os
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import datetime
+import tracemalloc
+import contextlib
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT_DIR = os.path.join(BASE_DIR, "data", "metrics")
+PROFILE_TOP = 25
+MEMORY_TOP = 10
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes everywhere else
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class StageMetrics:
+    def __init__(self, name, tags):
+        self.name = name
+        self.tags = tags
+        self.rows = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+        self.traced_peak = None
+        self.hotspots = None
+        # ru_maxrss is a process-lifetime peak: record it on both sides of the
+        # stage so the report can show how much this stage raised it
+        self.peak_rss = None
+        self.peak_rss_growth = None
+
+    def add(self, rows=0, bytes_read=0, bytes_written=0):
+        self.rows += rows
+        self.bytes_read += bytes_read
+        self.bytes_written += bytes_written
+
+    def to_dict(self):
+        seconds = max(self.seconds, 1e-9)
+        result = {
+            "name": self.name,
+            "seconds": round(self.seconds, 4),
+            "rows": self.rows,
+            "rows_per_second": round(self.rows / seconds, 1),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "process_peak_rss_bytes": self.peak_rss,
+            "peak_rss_growth_bytes": self.peak_rss_growth,
+        }
+        if self.tags:
+            result["tags"] = self.tags
+        if self.traced_peak is not None:
+            result["traced_peak_bytes"] = self.traced_peak
+        if self.hotspots:
+            result["hotspots"] = self.hotspots
+        return result
+
+class Metrics:
+    # Collects per-stage timings/throughput for one run and writes them as a
+    # JSON report. Stages nest; profiling only wraps the outermost matching one
+    # because cProfile can't be enabled twice.
+
+    def __init__(self, run, profile=None, trace_memory=False):
+        self.run = run
+        self.started_at = datetime.datetime.now()
+        self.start = time.perf_counter()
+        # profile: None (off), empty list (every top-level stage) or stage names
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.stages = []
+        self._stack = []
+        self._profiling = False
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def should_profile(self, name):
+        if self.profile is None or self._profiling:
+            return False
+        if not self.profile:
+            return not self._stack
+        return name in self.profile
+
+    @contextlib.contextmanager
+    def stage(self, name, **tags):
+        stage = StageMetrics(name, tags)
+        profiler = None
+        if self.should_profile(name):
+            profiler = cProfile.Profile()
+            self._profiling = True
+        if self.trace_memory:
+            # Resetting the peak would lose the parent's peak so far, so bank it first
+            if self._stack:
+                parent = self._stack[-1]
+                parent.traced_peak = max(parent.traced_peak or 0, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+        self._stack.append(stage)
+        rss_before = peak_rss_bytes()
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield stage
+        finally:
+            if profiler:
+                profiler.disable()
+                self._profiling = False
+                stage.hotspots = self.hotspots(profiler, name)
+            stage.seconds = time.perf_counter() - start
+            stage.peak_rss = peak_rss_bytes()
+            if rss_before is not None:
+                stage.peak_rss_growth = stage.peak_rss - rss_before
+            self._stack.pop()
+            if self.trace_memory:
+                stage.traced_peak = max(stage.traced_peak or 0, tracemalloc.get_traced_memory()[1])
+                # A nested stage reset the peak, so hand it up to the parent
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent.traced_peak = max(parent.traced_peak or 0, stage.traced_peak)
+            self.stages.append(stage)
+
+    def hotspots(self, profiler, name):
+        out = io.StringIO()
+        stats = pstats.Stats(profiler, stream=out).sort_stats("cumulative")
+        stats.print_stats(PROFILE_TOP)
+        print(f"\n--- Profile: {name} (top {PROFILE_TOP} by cumulative time) ---")
+        print(out.getvalue())
+
+        rows = []
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({
+                "function": f"{os.path.basename(filename)}:{line}({function})",
+                "calls": calls,
+                "tottime": round(tottime, 4),
+                "cumtime": round(cumtime, 4),
+            })
+        rows.sort(key=lambda row: row["cumtime"], reverse=True)
+        return rows[:PROFILE_TOP]
+
+    def report(self):
+        seconds = time.perf_counter() - self.start
+        report = {
+            "run": self.run,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "seconds": round(seconds, 4),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "python": sys.version.split()[0],
+            "stages": [stage.to_dict() for stage in self.stages],
+            "totals": {},
+        }
+
+        for stage in self.stages:
+            totals = report["totals"].setdefault(stage.name, {"count": 0, "seconds": 0.0, "rows": 0, "bytes_read": 0, "bytes_written": 0})
+            totals["count"] += 1
+            totals["seconds"] = round(totals["seconds"] + stage.seconds, 4)
+            totals["rows"] += stage.rows
+            totals["bytes_read"] += stage.bytes_read
+            totals["bytes_written"] += stage.bytes_written
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            report["top_allocations"] = [{
+                "location": str(stat.traceback),
+                "bytes": stat.size,
+                "count": stat.count,
+            } for stat in snapshot.statistics("lineno")[:MEMORY_TOP]]
+        return report
+
+    def write_report(self, path=None):
+        report = self.report()
+        if path is None:
+            os.makedirs(REPORT_DIR, exist_ok=True)
+            path = os.path.join(REPORT_DIR, f"{self.run}-{self.started_at.strftime('%Y%m%d-%H%M%S')}.json")
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        self.print_summary(report)
+        print(f"Metrics report written to {path}")
+        return path
+
+    def print_summary(self, report):
+        print(f"\n=== {self.run} metrics ({report['seconds']:.2f}s) ===")
+        print(f"{'Stage':<20} | {'Count':>5} | {'Time':>9} | {'Rows/s':>10} | {'Read MB':>8} | {'Written MB':>10}")
+        print("-" * 78)
+        for name, totals in report["totals"].items():
+            rate = totals["rows"] / max(totals["seconds"], 1e-9)
+            print(f"{name:<20} | {totals['count']:>5} | {totals['seconds']:>8.2f}s | {rate:>10.0f} | "
+                  f"{totals['bytes_read'] / 1024 ** 2:>8.2f} | {totals['bytes_written'] / 1024 ** 2:>10.2f}")
+
+        # Slowest individual formats make regressions easy to spot
+        formats = sorted((s for s in report["stages"] if s.get("tags", {}).get("format")), key=lambda s: s["seconds"], reverse=True)
+        if formats:
+            print("Slowest formats: " + ", ".join(f"{s['tags']['format']} ({s['seconds']:.2f}s)" for s in formats[:5]))
+        if report["peak_rss_bytes"]:
+            print(f"Peak RSS: {report['peak_rss_bytes'] / 1024 ** 2:.1f} MB")
+
+def add_arguments(parser):
+    parser.add_argument("--profile", nargs="*", metavar="STAGE", help="Run stages under cProfile and print hotspots (default: every top-level stage)")
+    parser.add_argument("--trace-memory", action="store_true", help="Track Python allocations with tracemalloc (slower)")
+    parser.add_argument("--metrics-out", metavar="PATH", help=f"Where to write the JSON metrics report (default: {os.path.relpath(REPORT_DIR, BASE_DIR)}/<run>-<time>.json)")
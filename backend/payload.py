@@ -0,0 +1,204 @@
+import json
+import struct
+
+# pokemon_details.data encodings:
+#   v1  the collect_pokemon_stats dict as JSON text
+#   v2  a packed blob: magic, version, a string table, then every section as
+#       parallel columns (string ids, basis-point percentages as varints)
+# Moves, items and abilities are stored by their id in the index DB meta tables
+# and get their display names back from there when decoded. The string table is
+# per row, so a row decodes on its own without fetching a format-wide dictionary.
+# Mirrored by frontend/src/utils/payload.ts.
+
+MAGIC = b"UMP"
+VERSION = 2
+VERSIONS = [1, 2]
+# Percentages keep two decimals; v1 kept three
+BP_SCALE = 100
+
+STR = "s"   # varint index into the string table
+BP = "p"    # varint basis points: one byte below 1.28%, two up to 163.83%
+F32 = "f"   # float32
+
+# (section, row fields, meta table that fills in "name"), in collect_pokemon_stats order.
+# evs is {category: rows}; each category is written as its name then its rows.
+LIST_SECTIONS = [
+    ("moves", (("id", STR), ("usage_percent", BP)), "moves"),
+    ("teammates", (("name", STR), ("usage_percent", BP)), None),
+    ("items", (("id", STR), ("usage_percent", BP)), "items"),
+    ("abilities", (("id", STR), ("usage_percent", BP)), "abilities"),
+    ("natures", (("name", STR), ("usage_percent", BP)), None),
+    ("spreads", (("spread", STR), ("usage_percent", BP)), None),
+    ("evs", (("ev_string", STR), ("usage_percent", BP)), None),
+    ("tera_types", (("tera_type", STR), ("usage_percent", BP)), None),
+    ("counters", (("name", STR), ("score", BP), ("count", F32), ("usage_percent", BP)), None),
+    ("dominates", (("name", STR), ("score", BP), ("count", F32), ("usage_percent", BP)), None),
+]
+
+class Writer:
+    def __init__(self):
+        self.strings = {}
+        self.body = bytearray()
+
+    def varint(self, value):
+        while value >= 0x80:
+            self.body.append(value & 0x7F | 0x80)
+            value >>= 7
+        self.body.append(value)
+
+    def signed(self, value):
+        # zigzag, so -1 (unranked) stays one byte
+        self.varint(value * 2 if value >= 0 else -value * 2 - 1)
+
+    def string(self, value):
+        self.varint(self.strings.setdefault(value, len(self.strings)))
+
+    def bp(self, value):
+        self.varint(max(round(value * BP_SCALE), 0))
+
+    def strings_list(self, values):
+        self.varint(len(values))
+        for value in values:
+            self.string(value)
+
+    def rows(self, rows, fields):
+        # Column by column: all ids, then all percentages, ...
+        self.varint(len(rows))
+        for key, kind in fields:
+            for row in rows:
+                value = row[key]
+                if kind == STR:
+                    self.string(value)
+                elif kind == BP:
+                    self.bp(value)
+                else:
+                    self.body += struct.pack("<f", value)
+
+    def finish(self):
+        head = Writer()
+        head.body += MAGIC
+        head.body.append(VERSION)
+        head.varint(len(self.strings))
+        for string in self.strings:
+            encoded = string.encode("utf-8")
+            head.varint(len(encoded))
+            head.body += encoded
+        return bytes(head.body + self.body)
+
+class Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.pos = 0
+        self.strings = []
+
+    def varint(self):
+        value = shift = 0
+        while True:
+            byte = self.data[self.pos]
+            self.pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def signed(self):
+        value = self.varint()
+        return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+    def string(self):
+        return self.strings[self.varint()]
+
+    def bp(self):
+        return self.varint() / BP_SCALE
+
+    def string_table(self):
+        for _ in range(self.varint()):
+            length = self.varint()
+            self.strings.append(bytes(self.data[self.pos:self.pos + length]).decode("utf-8"))
+            self.pos += length
+
+    def strings_list(self):
+        return [self.string() for _ in range(self.varint())]
+
+    def rows(self, fields):
+        count = self.varint()
+        rows = [{} for _ in range(count)]
+        for key, kind in fields:
+            for row in rows:
+                if kind == STR:
+                    row[key] = self.string()
+                elif kind == BP:
+                    row[key] = self.bp()
+                else:
+                    # float32 keeps ~7 digits; drop the noise past them
+                    row[key] = round(struct.unpack_from("<f", self.data, self.pos)[0], 3)
+                    self.pos += 4
+        return rows
+
+def encode_v2(stats):
+    writer = Writer()
+    writer.string(stats["name"])
+    writer.signed(stats["usage"]["rank"])
+    writer.bp(stats["usage"]["usage_percent"])
+    writer.varint(len(stats["base_stats"]))
+    for value in stats["base_stats"]:
+        writer.signed(value)
+    writer.strings_list(stats["types"])
+    writer.strings_list(stats["possible_abilities"])
+    for section, fields, _ in LIST_SECTIONS:
+        if section == "evs":
+            writer.varint(len(stats["evs"]))
+            for category, rows in stats["evs"].items():
+                writer.string(category)
+                writer.rows(rows, fields)
+        else:
+            writer.rows(stats[section], fields)
+    return writer.finish()
+
+def decode_v2(data, names=None):
+    reader = Reader(data)
+    reader.pos = len(MAGIC) + 1
+    reader.string_table()
+
+    name = reader.string()
+    rank = reader.signed()
+    stats = {
+        "name": name,
+        "usage": {"name": name, "rank": rank, "usage_percent": reader.bp()},
+        "base_stats": [reader.signed() for _ in range(reader.varint())],
+        "types": reader.strings_list(),
+        "possible_abilities": reader.strings_list(),
+    }
+    names = names or {}
+    for section, fields, meta_table in LIST_SECTIONS:
+        if section == "evs":
+            stats["evs"] = {reader.string(): reader.rows(fields) for _ in range(reader.varint())}
+            continue
+        rows = reader.rows(fields)
+        if meta_table:
+            table = names.get(meta_table, {})
+            rows = [{"name": table.get(row["id"], row["id"]), "id": row["id"], "usage_percent": row["usage_percent"]} for row in rows]
+        stats[section] = rows
+    return stats
+
+def encode_details(stats, version=VERSION):
+    if version == 1:
+        return json.dumps(stats)
+    return encode_v2(stats)
+
+def decode_details(data, names=None):
+    # names: {"moves": {id: name}, "items": ..., "abilities": ...}, see load_names
+    if isinstance(data, str):
+        return json.loads(data)
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError("not a pokemon_details payload")
+    if data[len(MAGIC)] != VERSION:
+        raise ValueError(f"unsupported payload version {data[len(MAGIC)]}")
+    return decode_v2(data, names)
+
+def load_names(index_conn):
+    # Display names from the index DB meta tables, for decode_details
+    return {
+        table: dict(index_conn.execute(f"SELECT id, name FROM {table}").fetchall())
+        for table in ["moves", "items", "abilities"]
+    }
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Minimal stage graph: stages run as soon as their dependencies finish, and a
+# stage is skipped when its inputs and outputs match the last successful run.
+
+class StageFailed(Exception):
+    pass
+
+class Stage:
+    def __init__(self, name, run, deps=(), inputs=None, outputs=None, max_age=None):
+        # inputs/outputs are callables returning file or directory paths, so
+        # they are evaluated when the stage is about to run, not at build time
+        self.name = name
+        self.run = run
+        self.deps = list(deps)
+        self.inputs = inputs or (lambda: [])
+        self.outputs = outputs or (lambda: [])
+        self.max_age = max_age
+
+def path_signature(paths):
+    signature = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for filename in sorted(files):
+                    if filename.startswith(".") or filename.endswith((".tmp", ".part")):
+                        continue
+                    file_path = os.path.join(root, filename)
+                    st = os.stat(file_path)
+                    signature[file_path] = [st.st_size, st.st_mtime_ns]
+        elif os.path.exists(path):
+            st = os.stat(path)
+            signature[path] = [st.st_size, st.st_mtime_ns]
+        else:
+            signature[path] = None
+    return signature
+
+def load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def save_state(path, state):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+class Pipeline:
+    def __init__(self, stages, state_path, force=False, workers=4):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.state = load_state(state_path)
+        self.force = force
+        self.workers = workers
+        self.results = {}
+        self.lock = threading.Lock()
+
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    def is_cached(self, stage, inputs):
+        previous = self.state.get(stage.name)
+        if self.force or not previous:
+            return False
+        outputs = path_signature(stage.outputs())
+        if not outputs or any(signature is None for signature in outputs.values()):
+            return False
+        if stage.max_age is not None and time.time() - previous.get("finished_at", 0) > stage.max_age:
+            return False
+        return previous.get("inputs") == inputs and previous.get("outputs") == outputs
+
+    def run_stage(self, stage):
+        start = time.perf_counter()
+        inputs = path_signature(stage.inputs())
+        if self.is_cached(stage, inputs):
+            print(f"\n--- {stage.name}: up to date, skipping ---")
+            return {"status": "skipped", "seconds": time.perf_counter() - start}
+
+        print(f"\n--- {stage.name} ---")
+        try:
+            if stage.run() is False:
+                raise StageFailed(f"{stage.name} reported a failure")
+        except Exception as e:
+            if not isinstance(e, StageFailed):
+                traceback.print_exc()
+            return {"status": "failed", "seconds": time.perf_counter() - start, "error": str(e)}
+
+        outputs = path_signature(stage.outputs())
+        with self.lock:
+            self.state[stage.name] = {
+                "inputs": inputs,
+                "outputs": outputs,
+                "finished_at": time.time(),
+            }
+        return {"status": "ran", "seconds": time.perf_counter() - start}
+
+    def run(self):
+        start = time.perf_counter()
+        pending = dict(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    dep_results = [self.results.get(dep) for dep in stage.deps]
+                    if any(result and result["status"] in ("failed", "blocked") for result in dep_results):
+                        self.results[name] = {"status": "blocked", "seconds": 0.0}
+                        del pending[name]
+                    elif all(dep_results):
+                        running[pool.submit(self.run_stage, stage)] = name
+                        del pending[name]
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    self.results[name] = future.result()
+                    # Persist after every stage so an interrupted run keeps its progress
+                    with self.lock:
+                        save_state(self.state_path, self.state)
+
+        # Whatever is left waits on itself through a dependency cycle
+        for name in pending:
+            self.results[name] = {"status": "blocked", "seconds": 0.0, "error": "dependency cycle, never scheduled"}
+
+        self.print_summary(time.perf_counter() - start)
+        return all(result["status"] in ("ran", "skipped") for result in self.results.values())
+
+    def print_summary(self, seconds):
+        print("\n=== Stage Summary ===")
+        print(f"{'Stage':<20} | {'Status':<8} | {'Time':>9}")
+        print("-" * 43)
+        for name in self.stages:
+            result = self.results.get(name, {"status": "blocked", "seconds": 0.0})
+            print(f"{name:<20} | {result['status']:<8} | {result['seconds']:>8.2f}s")
+            if result.get("error"):
+                print(f"  {result['error']}")
+        print(f"{'total (wall)':<20} | {'':<8} | {seconds:>8.2f}s")
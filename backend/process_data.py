@@ -3,6 +3,13 @@ import math
 import difflib
 import os
 import re
+import sys
+
+# Add parent directory to path so this works both as a script import and as part of the package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend import catalog
+from backend import compact
+from backend import snapshot
 
 def load_data(file_path):
     try:
@@ -13,6 +20,20 @@ def load_data(file_path):
     except json.JSONDecodeError:
         return {}
 
+def load_stats(file_path, compacted=False):
+    # A chaos file as {"info", "data"}. An up-to-date snapshot (snapshot.py) is
+    # mapped instead of parsing the JSON; otherwise the parsed data can be compacted.
+    content = snapshot.open_for(file_path)
+    if content:
+        return content
+    content = load_data(file_path)
+    if content and compacted:
+        usage_data = content.pop("data", None)
+        if usage_data is None:
+            usage_data, content = content, {}
+        content["data"] = compact.compact_usage(usage_data)
+    return content
+
 def create_lookup_map(options):
     return {option.lower(): option for option in options}
 
@@ -431,53 +452,28 @@ def collect_pokemon_stats(pokemon_name, usage_data, pokedex, moves, items, abili
         "dominates": extract_dominates(usage_data, real_name, usage_lookup)
     }
 
+def get_generation(format_name):
+    match = re.match(r'gen(\d+)', format_name)
+    if match:
+        return int(match.group(1))
+    return 0
+
+def slugify(pokemon_name):
+    # URL slug shared by the SQLite rankings and the static export
+    return pokemon_name.lower().replace(' ', '-').replace('.', '').replace("'", "")
+
 def get_latest_date(data_dir="data"):
-    if not os.path.exists(data_dir):
-        return None
-        
-    subdirs = [d for d in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, d))]
-    
-    date_pattern = re.compile(r"^\d{4}-\d{2}$")
-    date_dirs = [d for d in subdirs if date_pattern.match(d)]
-    
-    if not date_dirs:
-        return None
-        
-    date_dirs.sort(reverse=True)
-    return date_dirs[0]
+    return catalog.get_catalog(data_dir).latest_month()
+
+def get_previous_date(date, data_dir="data"):
+    # The month folder before `date`, which need not be the calendar month before it
+    earlier = [month for month in catalog.get_catalog(data_dir).months() if month < date]
+    return earlier[-1] if earlier else None
 
 def get_best_stats_file(date_dir, format_prefix):
-    data_path = os.path.join(date_dir, "data")
-    if not os.path.exists(data_path):
-        return None
-        
-    if "-" in format_prefix:
-         if os.path.exists(os.path.join(data_path, f"{format_prefix}.json")):
-             return f"{format_prefix}.json"
-    
-    files = [f for f in os.listdir(data_path) if f.startswith(format_prefix + "-") and f.endswith(".json")]
-    
-    if not files:
-        if os.path.exists(os.path.join(data_path, f"{format_prefix}.json")):
-            return f"{format_prefix}.json"
-        return None
-        
-    best_file = None
-    max_rating = -1
-    
-    for f in files:
-        try:
-            name = os.path.splitext(f)[0]
-            parts = name.split("-")
-            rating = int(parts[-1])
-            
-            if rating > max_rating:
-                max_rating = rating
-                best_file = f
-        except ValueError:
-            continue
-            
-    return best_file if best_file else files[0]
+    date_dir = os.path.abspath(date_dir)
+    entry = catalog.get_catalog(os.path.dirname(date_dir)).best_file(os.path.basename(date_dir), format_prefix)
+    return entry["filename"] if entry else None
 
 def extract_possible_abilities(pokemon_name, pokedex_data, pokedex_lookup=None):
     if not pokedex_data:
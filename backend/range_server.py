@@ -0,0 +1,303 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import apsw
+except ImportError:
+    apsw = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PUBLIC_DIR = os.path.join(BASE_DIR, "frontend", "public")
+DEFAULT_PORT = 8000
+# Matches requestChunkSize in frontend/src/db.ts
+DEFAULT_CHUNK = 4096
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+VFS_NAME = "pagecount"
+
+# Dev tool for measuring what the frontend's sql.js-httpvfs reads cost:
+#   serve    serves frontend/public with HTTP Range support and logs every range
+#   profile  replays the frontend's queries through a page-counting SQLite VFS
+
+class RangeLog:
+    def __init__(self, path=None):
+        self.path = path
+        self.totals = {}
+        self.lock = threading.Lock()
+
+    def record(self, entry):
+        with self.lock:
+            totals = self.totals.setdefault(entry["path"], {"requests": 0, "bytes": 0})
+            totals["requests"] += 1
+            totals["bytes"] += entry["bytes"]
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+
+    def print_summary(self):
+        print(f"\n{'Path':<40} | {'Requests':>8} | {'KB':>10}")
+        print("-" * 64)
+        for path, totals in sorted(self.totals.items(), key=lambda item: -item[1]["bytes"]):
+            print(f"{path:<40} | {totals['requests']:>8} | {totals['bytes'] / 1024:>10.1f}")
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    range_log = None
+    range_length = None
+    range_label = None
+
+    def end_headers(self):
+        self.send_header("Accept-Ranges", "bytes")
+        # The frontend must see every range request, not a browser cache hit
+        self.send_header("Cache-Control", "no-store")
+        super().end_headers()
+
+    def send_head(self):
+        self.range_length = None
+        self.range_label = None
+        header = self.headers.get("Range")
+        path = self.translate_path(self.path)
+        if not header or not os.path.isfile(path):
+            return super().send_head()
+
+        size = os.path.getsize(path)
+        match = RANGE_PATTERN.match(header.strip())
+        if not match or not (match.group(1) or match.group(2)):
+            self.send_error(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            return None
+        if match.group(1):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+        else:
+            # "bytes=-N" is the last N bytes
+            start = max(size - int(match.group(2)), 0)
+            end = size - 1
+        if start > end or start >= size:
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+
+        f = open(path, "rb")
+        f.seek(start)
+        # Set before send_response, which logs the request
+        self.range_length = end - start + 1
+        self.range_label = f"{start}-{end}"
+        self.send_response(HTTPStatus.PARTIAL_CONTENT)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Last-Modified", self.date_time_string(int(os.path.getmtime(path))))
+        self.end_headers()
+        return f
+
+    def copyfile(self, source, outputfile):
+        if self.range_length is None:
+            return super().copyfile(source, outputfile)
+        remaining = self.range_length
+        while remaining > 0:
+            chunk = source.read(min(64 * 1024, remaining))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            remaining -= len(chunk)
+
+    def log_request(self, code="-", size="-"):
+        path = self.path.split("?", 1)[0]
+        status = int(code) if isinstance(code, int) else code
+        label, sent = self.range_label, self.range_length or 0
+        if label is None and self.command == "GET" and status == 200:
+            target = self.translate_path(self.path)
+            label, sent = "full", os.path.getsize(target) if os.path.isfile(target) else 0
+        print(f"{self.command} {path} {status} {label or '-'} ({sent} B)")
+        self.range_log.record({"time": round(time.time(), 3), "method": self.command, "path": path, "status": status, "range": label, "bytes": sent})
+
+def serve(root, host, port, log_path=None):
+    range_log = RangeLog(log_path)
+    handler = partial(type("Handler", (RangeRequestHandler,), {"range_log": range_log}), directory=root)
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving {root} on http://{host}:{port}/ with range logging (Ctrl+C for a summary)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        range_log.print_summary()
+
+class PageCounter:
+    # Models sql.js-httpvfs: the file is fetched in chunk_size blocks and a
+    # block is only requested once per connection. One SQLite read that needs
+    # several uncached consecutive blocks becomes a single range request.
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.reset()
+
+    def reset(self):
+        self.cached = set()
+        self.reads = 0
+        self.requests = 0
+        self.chunks = 0
+
+    def snapshot(self):
+        return {"reads": self.reads, "requests": self.requests, "chunks": self.chunks, "bytes": self.chunks * self.chunk_size}
+
+    def record(self, offset, amount):
+        self.reads += 1
+        first = offset // self.chunk_size
+        last = (offset + amount - 1) // self.chunk_size
+        in_run = False
+        for chunk in range(first, last + 1):
+            if chunk in self.cached:
+                in_run = False
+                continue
+            self.cached.add(chunk)
+            self.chunks += 1
+            if not in_run:
+                self.requests += 1
+                in_run = True
+
+if apsw is not None:
+    class CountingVFS(apsw.VFS):
+        def __init__(self, counter):
+            self.counter = counter
+            super().__init__(VFS_NAME, base="")
+
+        def xOpen(self, name, flags):
+            return CountingFile(name, flags, self.counter)
+
+    class CountingFile(apsw.VFSFile):
+        def __init__(self, name, flags, counter):
+            self.counter = counter
+            # Only the database file itself is fetched over HTTP
+            self.main_db = bool(flags[0] & apsw.SQLITE_OPEN_MAIN_DB)
+            super().__init__("", name, flags)
+
+        def xRead(self, amount, offset):
+            if self.main_db:
+                self.counter.record(offset, amount)
+            return super().xRead(amount, offset)
+
+def index_queries(index_path, format_id=None):
+    # Parameters are picked from the DB itself: the most played format (unless
+    # given), its top rating and its most used Pokemon
+    conn = apsw.Connection(index_path, flags=apsw.SQLITE_OPEN_READONLY)
+    try:
+        format_id = format_id or conn.execute("SELECT id FROM formats ORDER BY total_battles DESC LIMIT 1").fetchone()[0]
+        rating = conn.execute("SELECT MAX(rating) FROM rankings WHERE format_id = ?", (format_id,)).fetchone()[0]
+        name, slug = conn.execute("SELECT pokemon_name, slug FROM rankings WHERE format_id = ? AND rating = ? ORDER BY rank LIMIT 1", (format_id, rating)).fetchone()
+    finally:
+        conn.close()
+
+    # Mirrors frontend/src/utils/api.ts
+    return format_id, rating, name, [
+        ("formats", "SELECT id, name, total_battles FROM formats ORDER BY total_battles DESC", ()),
+        ("ratings", "SELECT DISTINCT rating FROM rankings WHERE format_id = ? ORDER BY rating ASC", (format_id,)),
+        ("leaderboard", "SELECT pokemon_name, usage_percent, rank, slug FROM rankings WHERE format_id = ? AND rating = ? ORDER BY rank ASC", (format_id, rating)),
+        ("slug_lookup", "SELECT pokemon_name FROM rankings WHERE format_id = ? AND slug = ? AND rating = ?", (format_id, slug, rating)),
+        ("moves", "SELECT * FROM moves", ()),
+        ("items", "SELECT * FROM items", ()),
+        ("abilities", "SELECT * FROM abilities", ()),
+        ("pokedex", "SELECT * FROM pokedex", ()),
+    ]
+
+def format_queries(name, rating):
+    return [
+        ("pokemon_details", "SELECT * FROM pokemon_details WHERE pokemon_name = ? AND rating = ?", (name, rating)),
+        ("similar_pokemon", "SELECT neighbor, score FROM similar_pokemon WHERE pokemon_name = ? AND rating = ? ORDER BY rank LIMIT 20", (name, rating)),
+    ]
+
+def profile_query(path, counter, label, sql, params):
+    # A fresh connection per query is a cold page cache, like a first page view.
+    # Opening and parsing the schema is reported separately as "open".
+    counter.reset()
+    conn = apsw.Connection(path, flags=apsw.SQLITE_OPEN_READONLY, vfs=VFS_NAME)
+    try:
+        conn.execute("SELECT count(*) FROM sqlite_master").fetchall()
+        opened = counter.snapshot()
+        result = {"db": os.path.basename(path), "query": label, "open": opened}
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        except apsw.Error as e:
+            result["error"] = str(e)
+            return result
+        after = counter.snapshot()
+        result.update({key: after[key] - opened[key] for key in after})
+        result["rows"] = len(rows)
+        return result
+    finally:
+        conn.close()
+
+def profile(public_dir, chunk_size, format_id=None, extra=()):
+    if apsw is None:
+        print("Profiling needs apsw for the counting VFS (pip install apsw).")
+        return None
+    counter = PageCounter(chunk_size)
+    vfs = CountingVFS(counter)
+
+    index_path = os.path.join(public_dir, "db.png")
+    format_id, rating, name, queries = index_queries(index_path, format_id)
+    format_path = os.path.join(public_dir, "dbs", f"{format_id}.png")
+
+    results = [profile_query(index_path, counter, label, sql, params) for label, sql, params in queries]
+    if os.path.exists(format_path):
+        results += [profile_query(format_path, counter, label, sql, params) for label, sql, params in format_queries(name, rating)]
+    for db, sql in extra:
+        path = index_path if db == "index" else format_path
+        results.append(profile_query(path, counter, "custom", sql, ()))
+
+    vfs.unregister()
+    return {"format": format_id, "rating": rating, "pokemon": name, "chunk_size": chunk_size, "queries": results}
+
+def print_profile(report):
+    print(f"Queries for {report['format']} at {report['rating']} ({report['pokemon']}), {report['chunk_size']} B chunks")
+    print(f"{'DB':<22} | {'Query':<22} | {'Rows':>6} | {'Open req':>8} | {'Requests':>8} | {'Chunks':>6} | {'KB':>8}")
+    print("-" * 96)
+    for result in report["queries"]:
+        if "error" in result:
+            print(f"{result['db']:<22} | {result['query']:<22} | error: {result['error']}")
+            continue
+        print(f"{result['db']:<22} | {result['query']:<22} | {result['rows']:>6} | {result['open']['requests']:>8} | "
+              f"{result['requests']:>8} | {result['chunks']:>6} | {result['bytes'] / 1024:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the HTTP range requests the frontend's SQLite queries cost")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Serve frontend/public with Range support, logging every range")
+    serve_parser.add_argument("--root", default=PUBLIC_DIR, help="Directory to serve (default: frontend/public)")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--log", help="Append every request as a JSON line to this file")
+
+    profile_parser = subparsers.add_parser("profile", help="Replay representative queries through a page-counting VFS")
+    profile_parser.add_argument("--root", default=PUBLIC_DIR, help="Directory holding db.png and dbs/ (default: frontend/public)")
+    profile_parser.add_argument("--format", help="Format DB to profile (default: most played)")
+    profile_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK, help=f"Bytes per range request (default: {DEFAULT_CHUNK})")
+    profile_parser.add_argument("--sql", nargs=2, action="append", default=[], metavar=("DB", "SQL"), help="Extra query to profile; DB is 'index' or 'format'")
+    profile_parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.root, args.host, args.port, args.log)
+        return True
+
+    report = profile(args.root, args.chunk_size, args.format, args.sql)
+    if report is None:
+        return False
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_profile(report)
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
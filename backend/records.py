@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import gzip
+import time
+import shutil
+import argparse
+
+# Add parent directory to path so this works both from build_db (script) and integration (package)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend import process_data
+from backend import catalog
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_ROOT = os.path.join(BASE_DIR, "data")
+META_DIR = os.path.join(DATA_ROOT, "meta")
+META_FILES = ["pokedex.json", "moves.json", "items.json", "abilities.json"]
+
+RECORDS_VERSION = 1
+RECORDS_SUFFIX = ".ndjson.gz"
+
+# One gzipped NDJSON stream per format: a header line, then one line per
+# (rating, pokemon) with the fully collected stats, in rating then rank order.
+
+def records_dir(date_dir):
+    return os.path.join(date_dir, "records")
+
+def records_path(date_dir, format_id):
+    return os.path.join(records_dir(date_dir), f"{format_id}{RECORDS_SUFFIX}")
+
+def has_records(date_dir):
+    directory = records_dir(date_dir)
+    return os.path.isdir(directory) and any(name.endswith(RECORDS_SUFFIX) for name in os.listdir(directory))
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+def group_format_files(data_dir):
+    # data_dir is <root>/<month>/data; only rated files take part in records
+    month_dir = os.path.dirname(os.path.abspath(data_dir))
+    formats = catalog.get_catalog(os.path.dirname(month_dir)).formats(os.path.basename(month_dir))
+    format_files = {}
+    for format_id, entries in formats.items():
+        rated = [(entry["rating"], entry["path"]) for entry in entries if entry["rating"] is not None]
+        if rated:
+            format_files[format_id] = rated
+    return format_files
+
+def load_meta(meta_dir=META_DIR):
+    return tuple(process_data.load_data(os.path.join(meta_dir, name)) for name in META_FILES)
+
+def source_signatures(file_list, meta_dir):
+    sources = {os.path.basename(path): file_signature(path) for _, path in file_list}
+    meta = {name: file_signature(os.path.join(meta_dir, name)) for name in META_FILES}
+    return sources, meta
+
+def read_header(path):
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.loads(f.readline())
+    except (OSError, EOFError, json.JSONDecodeError):
+        return None
+
+def is_fresh(path, file_list, meta_dir):
+    header = read_header(path)
+    if not header or header.get("version") != RECORDS_VERSION:
+        return False
+    sources, meta = source_signatures(file_list, meta_dir)
+    return header.get("sources") == sources and header.get("meta") == meta
+
+def build_format_records(date_dir, format_id, file_list, meta, meta_dir=META_DIR, lookup_maps=None):
+    pokedex, moves, items, abilities = meta
+    if lookup_maps is None:
+        lookup_maps = {"pokedex": process_data.create_lookup_map(pokedex.keys())}
+
+    sources, meta_sigs = source_signatures(file_list, meta_dir)
+    header = {
+        "version": RECORDS_VERSION,
+        "format_id": format_id,
+        "generation": process_data.get_generation(format_id),
+        "total_battles": 0,
+        "ratings": [],
+        "sources": sources,
+        "meta": meta_sigs,
+    }
+
+    path = records_path(date_dir, format_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    body_path = path + ".body.tmp"
+    tmp_path = path + ".tmp"
+
+    # Rows are streamed into their own gzip member; the header (which needs the
+    # battle count) is written as a leading member once every rating is done.
+    with gzip.open(body_path, "wt", encoding="utf-8", compresslevel=6) as body:
+        for rating, file_path in file_list:
+            print(f"  Processing rating {rating}...")
+            content = process_data.load_stats(file_path)
+            if not content:
+                print(f"  Failed to load {os.path.basename(file_path)}")
+                continue
+
+            if "info" in content and "data" in content:
+                usage_data = content["data"]
+                if rating == 0: # Use battles from baseline for total
+                    header["total_battles"] = max(header["total_battles"], content["info"].get("number of battles", 0))
+            else:
+                usage_data = content
+
+            usage_lookup = process_data.create_lookup_map(usage_data.keys())
+            rows = []
+            for pokemon_name in usage_data.keys():
+                stats = process_data.collect_pokemon_stats(pokemon_name, usage_data, pokedex, moves, items, abilities, lookup_maps["pokedex"], usage_lookup)
+                if not stats:
+                    continue
+                rows.append({
+                    "rating": rating,
+                    "pokemon_name": pokemon_name,
+                    "usage_percent": stats["usage"]["usage_percent"],
+                    "rank": stats["usage"]["rank"],
+                    "data": stats,
+                })
+
+            rows.sort(key=lambda row: row["rank"])
+            for row in rows:
+                body.write(json.dumps(row, separators=(",", ":")))
+                body.write("\n")
+            header["ratings"].append(rating)
+
+    with open(tmp_path, "wb") as out:
+        out.write(gzip.compress((json.dumps(header, separators=(",", ":")) + "\n").encode("utf-8")))
+        with open(body_path, "rb") as body:
+            shutil.copyfileobj(body, out)
+    os.remove(body_path)
+    os.replace(tmp_path, path)
+    return path
+
+def build_month_records(date_dir, meta=None, meta_dir=META_DIR, force=False, formats=None):
+    format_files = group_format_files(os.path.join(date_dir, "data"))
+    if formats:
+        format_files = {fmt: files for fmt, files in format_files.items() if fmt in formats}
+
+    paths = {}
+    stale = []
+    for format_id, file_list in sorted(format_files.items()):
+        path = records_path(date_dir, format_id)
+        paths[format_id] = path
+        if force or not is_fresh(path, file_list, meta_dir):
+            stale.append(format_id)
+
+    # Records whose raw stats were cleaned up (e.g. by a backfill) are still valid
+    if os.path.isdir(records_dir(date_dir)):
+        for filename in sorted(os.listdir(records_dir(date_dir))):
+            format_id = filename[:-len(RECORDS_SUFFIX)]
+            if filename.endswith(RECORDS_SUFFIX) and format_id not in paths and (not formats or format_id in formats):
+                paths[format_id] = os.path.join(records_dir(date_dir), filename)
+
+    print(f"Records for {os.path.basename(date_dir)}: {len(paths) - len(stale)} up to date, {len(stale)} to build")
+    if not stale:
+        return paths
+
+    if meta is None:
+        meta = load_meta(meta_dir)
+    lookup_maps = {"pokedex": process_data.create_lookup_map(meta[0].keys())}
+
+    for format_id in stale:
+        print(f"Building records for format: {format_id}")
+        start = time.perf_counter()
+        build_format_records(date_dir, format_id, format_files[format_id], meta, meta_dir, lookup_maps)
+        print(f"  Done in {time.perf_counter() - start:.2f}s")
+
+    return paths
+
+def iter_records(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        f.readline()  # header
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute per-Pokemon records once per month")
+    parser.add_argument("date", nargs="?", help="Month to process (YYYY-MM, default: latest)")
+    parser.add_argument("--format", action="append", dest="formats", help="Only build these formats")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the records are up to date")
+    args = parser.parse_args()
+
+    date = args.date or process_data.get_latest_date(DATA_ROOT)
+    if not date:
+        print("No date folder found in data directory.")
+        sys.exit(1)
+
+    build_month_records(os.path.join(DATA_ROOT, date), force=args.force, formats=args.formats)
+
+if __name__ == "__main__":
+    main()
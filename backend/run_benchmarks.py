@@ -0,0 +1,63 @@
+import os
+import sys
+import glob
+import argparse
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_benchmarks.py")
+STORAGE_DIR = os.path.join(BASE_DIR, "data", "benchmarks")
+DEFAULT_BASELINE = "baseline"
+DEFAULT_THRESHOLD = 15.0
+
+# pytest-benchmark saves runs as <storage>/<machine>/<NNNN>_<name>.json; timings
+# only compare meaningfully on the same machine, so baselines are looked up there first.
+
+def find_baseline(name):
+    runs = sorted(glob.glob(os.path.join(STORAGE_DIR, "*", f"*_{name}.json")), key=os.path.getmtime)
+    if not runs:
+        return None
+    # "0003_baseline.json" -> "0003", which --benchmark-compare accepts
+    return os.path.basename(runs[-1]).split("_", 1)[0]
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite against synthetic data and compare with a saved baseline")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="NAME", help=f"Save this run as a baseline (default name: {DEFAULT_BASELINE})")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help=f"Baseline to compare against (default: {DEFAULT_BASELINE})")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help=f"Fail when a benchmark's mean is this many percent slower than the baseline (default: {DEFAULT_THRESHOLD:g})")
+    parser.add_argument("-k", dest="keyword", help="Only run benchmarks matching this pytest expression")
+    parser.add_argument("--pokemon", type=int, help="Pokemon per synthetic stats file")
+    parser.add_argument("--spreads", type=int, help="Spreads per Pokemon")
+    parser.add_argument("--teammates", type=int, help="Teammates per Pokemon")
+    parser.add_argument("--counters", type=int, help="Checks and counters per Pokemon")
+    args = parser.parse_args()
+
+    pytest_args = [
+        SUITE, "-q", "-p", "no:cacheprovider", "--run-benchmarks",
+        f"--rootdir={BASE_DIR}",
+        f"--benchmark-storage=file://{STORAGE_DIR}",
+        "--benchmark-sort=name",
+        "--benchmark-columns=min,mean,stddev,rounds",
+    ]
+    if args.keyword:
+        pytest_args += ["-k", args.keyword]
+    for option in ["pokemon", "spreads", "teammates", "counters"]:
+        if getattr(args, option) is not None:
+            pytest_args.append(f"--bench-{option}={getattr(args, option)}")
+
+    if args.save_baseline:
+        print(f"Saving run as baseline '{args.save_baseline}' in {STORAGE_DIR}")
+        pytest_args.append(f"--benchmark-save={args.save_baseline}")
+    else:
+        baseline = find_baseline(args.baseline)
+        if baseline:
+            print(f"Comparing against baseline '{args.baseline}' (run {baseline}), failing above +{args.threshold:g}% mean")
+            pytest_args += [f"--benchmark-compare={baseline}", f"--benchmark-compare-fail=mean:{args.threshold:g}%"]
+        else:
+            print(f"No baseline '{args.baseline}' found in {STORAGE_DIR}; run with --save-baseline first. Timing only.")
+
+    return pytest.main(pytest_args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+import os
+import json
+import time
+import threading
+import socketserver
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from . import process_data
+from . import matchups
+from . import coverage
+from . import catalog
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_MB = 2048
+# Compacted stats plus the matchup graph and cached bitsets, relative to the
+# file size (plain parsed dicts needed about twice this)
+MEMORY_FACTOR = 3
+META_FILES = ["pokedex.json", "moves.json", "items.json", "abilities.json"]
+
+class FormatEntry:
+    def __init__(self, path, signature, usage_data):
+        self.path = path
+        self.signature = signature
+        self.usage_data = usage_data
+        self.usage_lookup = process_data.create_lookup_map(usage_data.keys())
+        self.graph = matchups.MatchupGraph(usage_data)
+        self.cost = signature[0] * MEMORY_FACTOR
+        self.loaded_at = time.time()
+        self.hits = 0
+        self._bitsets = {}
+        self._lock = threading.Lock()
+
+    def bitsets(self, min_score, max_stddev):
+        key = (min_score, max_stddev)
+        with self._lock:
+            if key not in self._bitsets:
+                if len(self._bitsets) >= 4:
+                    self._bitsets.pop(next(iter(self._bitsets)))
+                self._bitsets[key] = coverage.check_bitsets(self.graph, min_score, max_stddev)
+            return self._bitsets[key]
+
+def file_signature(path):
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns)
+
+class FormatCache:
+    # LRU of loaded stats files, bounded by an estimate of their in-memory size.
+    # Entries are revalidated against the file's size/mtime on every lookup.
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.loading = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def total_bytes(self):
+        return sum(entry.cost for entry in self.entries.values())
+
+    def get(self, path):
+        signature = file_signature(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and entry.signature == signature:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                entry.hits += 1
+                return entry
+            # One loader per file; concurrent requests for it wait on the same lock
+            path_lock = self.loading.setdefault(path, threading.Lock())
+
+        with path_lock:
+            with self.lock:
+                entry = self.entries.get(path)
+                if entry and entry.signature == signature:
+                    self.entries.move_to_end(path)
+                    self.hits += 1
+                    entry.hits += 1
+                    return entry
+                self.misses += 1
+
+            print(f"Loading stats from {path}...")
+            start = time.perf_counter()
+            content = process_data.load_stats(path, compacted=True)
+            if not content:
+                return None
+            entry = FormatEntry(path, signature, content["data"])
+            print(f"  Loaded {len(entry.graph)} Pokemon in {time.perf_counter() - start:.2f}s")
+
+            with self.lock:
+                self.entries[path] = entry
+                self.entries.move_to_end(path)
+                self.evict()
+            return entry
+
+    def evict(self):
+        # Always keep the newest entry, even if it alone is over budget
+        while len(self.entries) > 1 and self.total_bytes() > self.max_bytes:
+            path, _ = self.entries.popitem(last=False)
+            self.loading.pop(path, None)
+            self.evictions += 1
+            print(f"  Evicted {path}")
+
+    def info(self):
+        with self.lock:
+            return {
+                "entries": [{
+                    "path": entry.path,
+                    "pokemon": len(entry.graph),
+                    "estimated_mb": round(entry.cost / (1024 * 1024), 1),
+                    "hits": entry.hits,
+                    "loaded_at": entry.loaded_at,
+                } for entry in self.entries.values()],
+                "estimated_mb": round(self.total_bytes() / (1024 * 1024), 1),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+class MetaCache:
+    def __init__(self, meta_dir):
+        self.meta_dir = meta_dir
+        self.signature = None
+        self.meta = None
+        self.pokedex_lookup = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        paths = [os.path.join(self.meta_dir, name) for name in META_FILES]
+        signature = tuple(file_signature(path) if os.path.exists(path) else None for path in paths)
+        with self.lock:
+            if signature != self.signature:
+                print("Loading metadata...")
+                self.meta = tuple(process_data.load_data(path) for path in paths)
+                self.pokedex_lookup = process_data.create_lookup_map((self.meta[0] or {}).keys())
+                self.signature = signature
+            return self.meta, self.pokedex_lookup
+
+class StatsResolver:
+    # Maps (format, date) to a stats file through the shared data catalog, which
+    # only rescans when the data directory or a month's data directory changes.
+
+    def __init__(self, data_dir):
+        self.catalog = catalog.get_catalog(data_dir)
+
+    def resolve(self, format_id, date=None):
+        date = date or self.catalog.latest_month()
+        if not date:
+            return None, None
+        entry = self.catalog.best_file(date, format_id)
+        return date, entry["path"] if entry else None
+
+class QueryError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class AnalysisService:
+    def __init__(self, data_dir="data", cache_mb=DEFAULT_CACHE_MB):
+        self.data_dir = data_dir
+        self.formats = FormatCache(int(cache_mb * 1024 * 1024))
+        self.meta = MetaCache(os.path.join(data_dir, "meta"))
+        self.resolver = StatsResolver(data_dir)
+
+    def load(self, params):
+        format_id = params.get("format", "gen9ou")
+        date, path = self.resolver.resolve(format_id, params.get("date"))
+        if not date:
+            raise QueryError(404, "No date folder found in data directory.")
+        if not path:
+            raise QueryError(404, f"No stats file found for format '{format_id}' in {date}.")
+        entry = self.formats.get(path)
+        if not entry:
+            raise QueryError(500, f"Failed to load stats file: {path}")
+        return entry, {"format": format_id, "date": date, "file": os.path.basename(path)}
+
+    def resolve(self, entry, name):
+        index = entry.graph.resolve(name)
+        if index is None:
+            raise QueryError(404, f"Pokemon '{name}' not found in data.")
+        return index
+
+    def thresholds(self, params):
+        try:
+            return {
+                "min_score": float(params.get("min_score", matchups.DEFAULT_MIN_SCORE)),
+                "max_stddev": float(params.get("max_stddev", matchups.DEFAULT_MAX_STDDEV)),
+            }
+        except ValueError:
+            raise QueryError(400, "min_score and max_stddev must be numbers")
+
+    def int_param(self, params, name, default):
+        try:
+            return int(params.get(name, default))
+        except ValueError:
+            raise QueryError(400, f"{name} must be an integer")
+
+    def stats(self, params):
+        entry, source = self.load(params)
+        pokemon_name = params.get("pokemon") or process_data.get_top_pokemon(entry.usage_data)
+        (pokedex, moves, items, abilities), pokedex_lookup = self.meta.get()
+        stats = process_data.collect_pokemon_stats(pokemon_name, entry.usage_data, pokedex, moves, items, abilities, pokedex_lookup, entry.usage_lookup)
+        if not stats:
+            raise QueryError(404, f"Pokemon '{pokemon_name}' not found.")
+        return {"source": source, "stats": stats}
+
+    def counters(self, params):
+        entry, source = self.load(params)
+        graph = entry.graph
+        thresholds = self.thresholds(params)
+        mode = params.get("mode", "search")
+
+        if mode == "chart":
+            top = self.int_param(params, "top", 50)
+            leaderboard = graph.leaderboard(**thresholds)[:top]
+            if params.get("victims"):
+                for row in leaderboard:
+                    row["victims"] = graph.victims(row["index"], **thresholds)
+            return {"source": source, "leaderboard": leaderboard}
+
+        target = self.resolve(entry, params.get("pokemon") or graph.top_pokemon())
+        if mode == "two-hop":
+            return {"source": source, "pokemon": graph.names[target], "two_hop": graph.two_hop(target, **thresholds)}
+        if mode == "checks":
+            return {"source": source, "pokemon": graph.names[target], "checks": graph.counters(target, **thresholds)}
+        if mode == "search":
+            results = [{
+                "name": row["name"],
+                "rank": row["rank"],
+                "score": row["score"],
+                "count": row["count"],
+            } for row in graph.countered_by(target, **thresholds)]
+            return {"source": source, "pokemon": graph.names[target], "counters_for": results}
+        raise QueryError(400, f"Unknown mode '{mode}'")
+
+    def team(self, params):
+        entry, source = self.load(params)
+        names = [name.strip() for name in params.get("pokemon", "").split(",") if name.strip()]
+        if not names:
+            raise QueryError(400, "pokemon is required (comma-separated team)")
+
+        team = []
+        for name in names:
+            member = self.resolve(entry, name)
+            if member not in team:
+                team.append(member)
+        if len(team) > coverage.MAX_TEAM_SIZE:
+            raise QueryError(400, f"A team has at most {coverage.MAX_TEAM_SIZE} Pokemon.")
+
+        thresholds = self.thresholds(params)
+        try:
+            min_usage = float(params.get("min_usage", coverage.DEFAULT_MIN_USAGE * 100)) / 100
+        except ValueError:
+            raise QueryError(400, "min_usage must be a number")
+
+        bitsets = entry.bitsets(thresholds["min_score"], thresholds["max_stddev"])
+        report = coverage.analyze_team(entry.graph, team, bitsets, min_usage, **thresholds)
+        report["source"] = source
+        return report
+
+    def health(self, params):
+        return {"status": "ok", "cache": self.formats.info()}
+
+    def routes(self):
+        return {
+            "/stats": self.stats,
+            "/counters": self.counters,
+            "/team": self.team,
+            "/health": self.health,
+        }
+
+def make_handler(service):
+    routes = service.routes()
+
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "UsageMonsAnalysis/1.0"
+
+        def address_string(self):
+            # Unix socket peers have no (host, port) address
+            if isinstance(self.client_address, tuple):
+                return self.client_address[0]
+            return "unix"
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            handler = routes.get(url.path.rstrip("/") or "/")
+            if not handler:
+                self.send_json(404, {"error": f"Unknown endpoint '{url.path}'", "endpoints": sorted(routes)})
+                return
+
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            start = time.perf_counter()
+            try:
+                payload = handler(params)
+                status = 200
+            except QueryError as e:
+                payload, status = {"error": e.message}, e.status
+            except Exception as e:
+                payload, status = {"error": f"{e.__class__.__name__}: {e}"}, 500
+            payload["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            self.send_json(status, payload)
+
+    return Handler
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def serve(data_dir="data", host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, cache_mb=DEFAULT_CACHE_MB, preload=None):
+    service = AnalysisService(data_dir, cache_mb)
+    for format_id in preload or []:
+        try:
+            service.load({"format": format_id})
+        except QueryError as e:
+            print(e.message)
+
+    handler = make_handler(service)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        httpd = ThreadingUnixHTTPServer(socket_path, handler)
+        print(f"Serving analysis API on unix socket {socket_path}")
+    else:
+        httpd = ThreadingHTTPServer((host, port), handler)
+        print(f"Serving analysis API on http://{host}:{port}")
+
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        httpd.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,125 @@
+import numpy as np
+
+DEFAULT_NEIGHBORS = 20
+# Only Pokemon at or above this usage (percent) take part in the cross-format table
+CROSS_FORMAT_MIN_USAGE = 1.0
+BLOCK_ROWS = 1024
+# Cap on the weight products expanded at once while scoring a block of rows
+BLOCK_PRODUCTS = 1 << 16
+STAT_NAMES = ["hp", "atk", "def", "spa", "spd", "spe"]
+
+def spread_feature(spread):
+    # "Jolly:4/252/0/0/0/252" -> "Jolly:atk/spe"; exact EV splits are too sparse to compare
+    nature, _, evs = spread.partition(":")
+    try:
+        values = [int(value) for value in evs.split("/")]
+    except ValueError:
+        return spread
+    invested = [STAT_NAMES[i] for i, value in enumerate(values[:6]) if value >= 100]
+    return f"{nature}:{'/'.join(invested) or 'none'}"
+
+def feature_vector(stats):
+    # One block per section, each L2-normalised so no section dominates, then the
+    # whole vector normalised so a dot product is a cosine similarity.
+    sections = {
+        "move": [(entry["id"], entry["usage_percent"]) for entry in stats.get("moves", [])],
+        "item": [(entry["id"], entry["usage_percent"]) for entry in stats.get("items", [])],
+        "ability": [(entry["id"], entry["usage_percent"]) for entry in stats.get("abilities", [])],
+        "tera": [(entry["tera_type"], entry["usage_percent"]) for entry in stats.get("tera_types", [])],
+        "spread": [(spread_feature(entry["spread"]), entry["usage_percent"]) for entry in stats.get("spreads", [])],
+    }
+
+    vector = {}
+    for section, weights in sections.items():
+        block = {}
+        for key, weight in weights:
+            if weight > 0:
+                feature = f"{section}:{key}"
+                block[feature] = block.get(feature, 0) + weight
+        norm = sum(weight * weight for weight in block.values()) ** 0.5
+        for feature, weight in block.items():
+            vector[feature] = weight / norm
+
+    norm = sum(weight * weight for weight in vector.values()) ** 0.5
+    return {feature: weight / norm for feature, weight in vector.items()} if norm else {}
+
+def build_csr(vectors):
+    # Rows as CSR (indptr, indices, data) over a vocabulary built on the fly
+    vocab = {}
+    indptr = np.zeros(len(vectors) + 1, dtype=np.int64)
+    indices, data = [], []
+    for i, vector in enumerate(vectors):
+        for feature, weight in vector.items():
+            indices.append(vocab.setdefault(feature, len(vocab)))
+            data.append(weight)
+        indptr[i + 1] = len(indices)
+    return (indptr, np.array(indices, dtype=np.int64), np.array(data, dtype=np.float64)), len(vocab)
+
+def transpose(indptr, indices, data, n_features):
+    # Postings: for each feature, the rows that have it and their weights
+    rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int64), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    t_indptr = np.zeros(n_features + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=n_features), out=t_indptr[1:])
+    return t_indptr, rows[order], data[order]
+
+def block_scores(csr, postings, start, end, n):
+    # Dot products of rows [start, end) with every row: each stored weight is
+    # multiplied into the posting list of its feature and summed per row pair
+    indptr, indices, data = csr
+    t_indptr, t_rows, t_data = postings
+    lo, hi = indptr[start], indptr[end]
+    features = indices[lo:hi]
+    lengths = t_indptr[features + 1] - t_indptr[features]
+    firsts = np.cumsum(lengths) - lengths
+    positions = np.repeat(t_indptr[features] - firsts, lengths) + np.arange(lengths.sum())
+    owners = np.repeat(np.repeat(np.arange(end - start, dtype=np.int64), np.diff(indptr[start:end + 1])), lengths)
+    values = np.repeat(data[lo:hi], lengths) * t_data[positions]
+    return np.bincount(owners * n + t_rows[positions], weights=values, minlength=(end - start) * n).reshape(end - start, n)
+
+def row_blocks(csr, postings, n):
+    # Up to BLOCK_ROWS rows at a time, fewer when their postings would expand
+    # to more than BLOCK_PRODUCTS products
+    indptr, indices, _ = csr
+    t_indptr = postings[0]
+    costs = np.bincount(
+        np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr)),
+        weights=t_indptr[indices + 1] - t_indptr[indices], minlength=n,
+    )
+    cumulative = np.concatenate([[0], np.cumsum(costs)])
+    start = 0
+    while start < n:
+        end = int(np.searchsorted(cumulative, cumulative[start] + BLOCK_PRODUCTS, side="right")) - 1
+        end = max(start + 1, min(end, start + BLOCK_ROWS, n))
+        yield start, end
+        start = end
+
+def nearest_neighbors(vectors, k=DEFAULT_NEIGHBORS, groups=None):
+    # Yields (row, neighbor, score, rank) for the top-k cosine neighbours of
+    # every row. Rows sharing a group are never each other's neighbours.
+    n = len(vectors)
+    if n < 2:
+        return
+    csr, n_features = build_csr(vectors)
+    postings = transpose(*csr, n_features)
+    k = min(k, n - 1)
+    groups = np.asarray(groups) if groups is not None else None
+
+    for start, end in row_blocks(csr, postings, n):
+        scores = block_scores(csr, postings, start, end, n)
+        scores[np.arange(end - start), np.arange(start, end)] = -np.inf
+        if groups is not None:
+            scores[groups[start:end, None] == groups[None, :]] = -np.inf
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        for r in range(end - start):
+            for rank in range(k):
+                score = float(top_scores[r, rank])
+                if score == -np.inf or score <= 0:
+                    break
+                yield start + r, int(top[r, rank]), round(score, 4), rank + 1
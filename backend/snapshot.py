@@ -0,0 +1,332 @@
+import os
+import sys
+import json
+import mmap
+import math
+import time
+import struct
+import argparse
+from array import array
+from collections.abc import Mapping
+
+# Add parent directory to path so this works both from build_db (script) and the package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend import compact
+from backend import catalog
+
+MAGIC = b"UMSNAP01"
+SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_SUFFIX = ".snap"
+ALIGN = 8
+# Section order of the per-Pokemon ranges array
+RANGE_SECTIONS = list(compact.WEIGHT_SECTIONS.values()) + ["counters"]
+
+# One file per chaos file, in data/<month>/snapshots/<name>.snap:
+#   MAGIC, uint64 header length, JSON header (info, source signature, array table)
+#   then 8-byte aligned arrays in the writer's byte order (header "byteorder"):
+#     string_offsets/string_blob  every key and name, sorted, so ids compare like strings
+#     names                       string id of each Pokemon, in chaos order
+#     ranges                      [start, end) of each Pokemon's sections in the columns, -1 if absent
+#     raw_count, usage, viability per Pokemon (-1 / NaN when absent)
+#     weight_* / counter_*        the compact.Columns arrays
+# Opening maps the file read-only and only reads the header; the OS pages in the
+# parts a query touches and shares them between processes through the page cache.
+
+def snapshot_path(stats_path):
+    # data/<month>/data/<name>.json -> data/<month>/snapshots/<name>.snap
+    month_dir = os.path.dirname(os.path.dirname(os.path.abspath(stats_path)))
+    name = os.path.splitext(os.path.basename(stats_path))[0]
+    return os.path.join(month_dir, SNAPSHOT_DIR, name + SNAPSHOT_SUFFIX)
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+def all_strings(usage_data):
+    strings = set(usage_data)
+    for data in usage_data.values():
+        for key in list(compact.WEIGHT_SECTIONS) + [compact.COUNTER_SECTION]:
+            strings.update(data.get(key) or ())
+    return sorted(strings)
+
+def write_snapshot(stats_path, out_path=None):
+    with open(stats_path, "r", encoding="utf-8") as f:
+        content = json.load(f)
+    usage_data = content.get("data", {})
+
+    # Interning in sorted order makes string ids sorted too (see StringBlob.get)
+    strings = compact.StringTable()
+    for string in all_strings(usage_data):
+        strings.intern(string)
+    usage = compact.compact_usage(usage_data, strings)
+
+    ranges = array("i")
+    raw_counts = array("q")
+    usage_values = array("d")
+    viability = array("q")
+    extra = {}
+    for name, pokemon in usage.items():
+        for field in RANGE_SECTIONS:
+            section = getattr(pokemon, field)
+            ranges.extend([section.start, section.end] if section is not None else [-1, -1])
+        raw_counts.append(pokemon.raw_count if pokemon.raw_count is not None else -1)
+        usage_values.append(pokemon.usage if pokemon.usage is not None else math.nan)
+        ceiling = list(pokemon.viability or ())[:4]
+        viability.extend(ceiling + [-1] * (4 - len(ceiling)))
+        if pokemon.extra:
+            extra[name] = pokemon.extra
+
+    encoded = [string.encode("utf-8") for string in strings.strings]
+    offsets = array("I", [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    arrays = {
+        "string_offsets": offsets,
+        "string_blob": array("B", b"".join(encoded)),
+        "names": array("I", [strings.ids[name] for name in usage]),
+        "ranges": ranges,
+        "raw_count": raw_counts,
+        "usage": usage_values,
+        "viability": viability,
+    }
+    for prefix, columns in [("weight", usage.weights), ("counter", usage.counters)]:
+        for name in ["ids", "values", "sorted_ids", "order"]:
+            arrays[f"{prefix}_{name}"] = getattr(columns, name)
+
+    header = {
+        "info": content.get("info", {}),
+        "source": file_signature(stats_path),
+        "byteorder": sys.byteorder,
+        "extra": extra,
+        "arrays": {},
+    }
+    # Offsets depend on the header's own length, so lay out until it is stable
+    header_size = 0
+    while True:
+        offset = align(len(MAGIC) + 8 + header_size)
+        for name, values in arrays.items():
+            header["arrays"][name] = [offset, values.typecode, len(values)]
+            offset = align(offset + values.itemsize * len(values))
+        encoded_header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        if len(encoded_header) <= header_size:
+            break
+        header_size = len(encoded_header) + 64
+
+    out_path = out_path or snapshot_path(stats_path)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", header_size))
+        f.write(encoded_header.ljust(header_size, b" "))
+        for name, values in arrays.items():
+            f.seek(header["arrays"][name][0])
+            values.tofile(f)
+        f.truncate(offset)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+def align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+class StringBlob:
+    # Stands in for compact.StringTable: .ids.get(string) and .strings[id].
+    # Strings are decoded on first use; ids are in sorted order, so lookups bisect
+    # once per string and are remembered after that.
+    __slots__ = ("offsets", "blob", "cache", "found")
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+        self.cache = {}
+        self.found = {}
+
+    @property
+    def ids(self):
+        return self
+
+    @property
+    def strings(self):
+        return self
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        string = self.cache.get(index)
+        if string is None:
+            string = self.cache[index] = str(self.blob[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+        return string
+
+    def get(self, string, default=None):
+        index = self.found.get(string, -1)
+        if index == -1:
+            index = self.found[string] = self.find(string)
+        return default if index is None else index
+
+    def find(self, string):
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self[mid] < string:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) and self[lo] == string else None
+
+class Snapshot(Mapping):
+    # {name: CompactPokemon} over the mapped arrays; records are built on first access
+    def __init__(self, path, mapped, header, arrays):
+        self.path = path
+        self.mapped = mapped
+        self.header = header
+        self.arrays = arrays
+        self.strings = StringBlob(arrays["string_offsets"], arrays["string_blob"])
+        self.weights = compact.Columns(self.strings, 1, *(arrays[f"weight_{name}"] for name in ["ids", "values", "sorted_ids", "order"]))
+        self.counters = compact.Columns(self.strings, 3, *(arrays[f"counter_{name}"] for name in ["ids", "values", "sorted_ids", "order"]))
+        self._names = None
+        self._index = None
+        self._records = {}
+
+    def keys(self):
+        if self._names is None:
+            self._names = [self.strings[i] for i in self.arrays["names"]]
+        return self._names
+
+    def index(self):
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.keys())}
+        return self._index
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.arrays["names"])
+
+    def __contains__(self, name):
+        return name in self.index()
+
+    def __getitem__(self, name):
+        pokemon = self._records.get(name)
+        if pokemon is None:
+            pokemon = self._records[name] = self.record(self.index()[name], name)
+        return pokemon
+
+    def get(self, name, default=None):
+        return self[name] if name in self.index() else default
+
+    def record(self, i, name):
+        arrays = self.arrays
+        pokemon = compact.CompactPokemon()
+        width = len(RANGE_SECTIONS) * 2
+        ranges = arrays["ranges"][i * width:(i + 1) * width]
+        for k, field in enumerate(RANGE_SECTIONS):
+            start, end = ranges[k * 2], ranges[k * 2 + 1]
+            if start >= 0:
+                setattr(pokemon, field, compact.Section(self.counters if field == "counters" else self.weights, start, end))
+        if arrays["raw_count"][i] >= 0:
+            pokemon.raw_count = arrays["raw_count"][i]
+        if not math.isnan(arrays["usage"][i]):
+            pokemon.usage = arrays["usage"][i]
+        viability = [value for value in arrays["viability"][i * 4:(i + 1) * 4] if value >= 0]
+        if viability:
+            pokemon.viability = tuple(viability)
+        pokemon.extra = self.header["extra"].get(name)
+        return pokemon
+
+    def close(self):
+        # Sections from this snapshot stop working once it is closed
+        self._records.clear()
+        for view in self.arrays.values():
+            view.release()
+        self.arrays.clear()
+        self.weights = self.counters = self.strings = None
+        self.mapped.close()
+
+def read_header(mapped):
+    if mapped[:len(MAGIC)] != MAGIC:
+        return None
+    (header_size,) = struct.unpack_from("<Q", mapped, len(MAGIC))
+    start = len(MAGIC) + 8
+    return json.loads(mapped[start:start + header_size].decode("utf-8"))
+
+def open_snapshot(path):
+    # {"info": ..., "data": Snapshot}, or None if the file is missing or unreadable
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        header = read_header(mapped)
+    except (ValueError, struct.error):
+        header = None
+    if not header or header.get("byteorder") != sys.byteorder:
+        mapped.close()
+        return None
+
+    view = memoryview(mapped)
+    arrays = {}
+    for name, (offset, typecode, count) in header["arrays"].items():
+        itemsize = array(typecode).itemsize
+        arrays[name] = view[offset:offset + itemsize * count].cast(typecode)
+    return {"info": header.get("info", {}), "data": Snapshot(path, mapped, header, arrays)}
+
+def is_fresh(path, stats_path):
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return False
+    try:
+        header = read_header(mapped)
+    except (ValueError, struct.error):
+        return False
+    finally:
+        mapped.close()
+    # A snapshot outlives its JSON (e.g. after a backfill cleanup)
+    return bool(header) and header.get("byteorder") == sys.byteorder and (
+        not os.path.exists(stats_path) or header.get("source") == file_signature(stats_path)
+    )
+
+def open_for(stats_path):
+    # The snapshot of a chaos file if it has an up-to-date one, else None
+    path = snapshot_path(stats_path)
+    if not os.path.exists(path) or not is_fresh(path, stats_path):
+        return None
+    return open_snapshot(path)
+
+def build_month_snapshots(data_root, month, force=False):
+    entries = [entry for format_entries in catalog.get_catalog(data_root).formats(month).values() for entry in format_entries]
+    written = 0
+    for entry in sorted(entries, key=lambda entry: entry["filename"]):
+        path = snapshot_path(entry["path"])
+        if not force and os.path.exists(path) and is_fresh(path, entry["path"]):
+            continue
+        start = time.perf_counter()
+        write_snapshot(entry["path"], path)
+        written += 1
+        print(f"  {entry['filename']}: {os.path.getsize(path) / 1024 ** 2:.1f} MB in {time.perf_counter() - start:.2f}s")
+    print(f"Snapshots for {month}: {written} written, {len(entries) - written} up to date")
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a month's chaos JSON into memory-mapped snapshots for fast reopening")
+    parser.add_argument("date", nargs="?", help="Month to convert (YYYY-MM, default: latest)")
+    parser.add_argument("--data-dir", default=catalog.DATA_ROOT, help="Data directory (default: data/)")
+    parser.add_argument("--force", action="store_true", help="Rewrite snapshots that are up to date")
+    args = parser.parse_args()
+
+    month = args.date or catalog.get_catalog(args.data_dir).latest_month()
+    if not month:
+        print(f"No date folder found in {args.data_dir}.")
+        sys.exit(1)
+    build_month_snapshots(args.data_dir, month, args.force)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import os
+import sqlite3
+from . import process_data
+from . import matchups
+from . import payload
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PUBLIC_DIR = os.path.join(BASE_DIR, "frontend", "public")
+
+# build_db stores counters/dominates already filtered at the default cut-offs,
+# so only stricter score thresholds can be answered from the databases.
+
+def connect_readonly(path):
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+def split_format(format_id):
+    # Accept "gen9ou" (best rating) or "gen9ou-1500" like get_best_stats_file does
+    parts = format_id.rsplit("-", 1)
+    if len(parts) == 2 and parts[1].isdigit():
+        return parts[0], int(parts[1])
+    return format_id, None
+
+THRESHOLDS_MESSAGE = (
+    f"The SQLite source only stores counters at --max-stddev {matchups.DEFAULT_MAX_STDDEV} "
+    f"and --min-score >= {matchups.DEFAULT_MIN_SCORE}; use --source json for other thresholds."
+)
+
+def supports_thresholds(min_score, max_stddev):
+    return min_score >= matchups.DEFAULT_MIN_SCORE and max_stddev == matchups.DEFAULT_MAX_STDDEV
+
+def check_thresholds(min_score, max_stddev):
+    # max_stddev is only accepted to match MatchupGraph; the stored counters were
+    # already filtered at the default, so anything else would be silently ignored
+    if not supports_thresholds(min_score, max_stddev):
+        raise ValueError(THRESHOLDS_MESSAGE)
+
+class SqliteFormat:
+    # Same query interface as MatchupGraph, backed by rankings (db.png) and the
+    # per-format pokemon_details table instead of the raw chaos JSON.
+
+    def __init__(self, index_conn, format_conn, format_id, rating):
+        self.format_id = format_id
+        self.rating = rating
+        self.index_conn = index_conn
+        self.format_conn = format_conn
+
+        rows = index_conn.execute(
+            "SELECT pokemon_name, usage_percent FROM rankings WHERE format_id = ? AND rating = ? ORDER BY rank",
+            (format_id, rating)
+        ).fetchall()
+        self.names = [name for name, _ in rows]
+        self.usage = [usage / 100 for _, usage in rows]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.lookup = process_data.create_lookup_map(self.names)
+        self._details = {}
+        self._meta_names = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def top_pokemon(self):
+        return self.names[0] if self.names else None
+
+    def resolve(self, pokemon_name):
+        matched = process_data.fuzzy_match(pokemon_name, self.lookup.values(), self.lookup)
+        return self.index[matched] if matched else None
+
+    def index_of(self, name):
+        # Counters can name Pokemon that have no rankings row of their own
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+            self.usage.append(0)
+        return self.index[name]
+
+    def meta_names(self):
+        # Move/item/ability names for v2 payloads, which only store ids
+        if self._meta_names is None:
+            self._meta_names = payload.load_names(self.index_conn)
+        return self._meta_names
+
+    def details(self, i):
+        name = self.names[i]
+        if name not in self._details:
+            row = self.format_conn.execute(
+                "SELECT data FROM pokemon_details WHERE pokemon_name = ? AND rating = ?",
+                (name, self.rating)
+            ).fetchone()
+            self._details[name] = payload.decode_details(row[0], self.meta_names()) if row else None
+        return self._details[name]
+
+    def load_all_details(self):
+        for name, data in self.format_conn.execute(
+            "SELECT pokemon_name, data FROM pokemon_details WHERE rating = ?", (self.rating,)
+        ):
+            self._details[name] = payload.decode_details(data, self.meta_names())
+
+    def stats(self, i):
+        return self.details(i)
+
+    def similar(self, i, top=20):
+        rows = self.format_conn.execute(
+            "SELECT neighbor, score FROM similar_pokemon WHERE pokemon_name = ? AND rating = ? ORDER BY rank LIMIT ?",
+            (self.names[i], self.rating, top)
+        ).fetchall()
+        return [{"format": self.format_id, "name": name, "score": score} for name, score in rows]
+
+    def similar_across_formats(self, i, top=20):
+        rows = self.index_conn.execute(
+            "SELECT neighbor_format_id, neighbor_name, score FROM similar_pokemon WHERE format_id = ? AND pokemon_name = ? ORDER BY rank LIMIT ?",
+            (self.format_id, self.names[i], top)
+        ).fetchall()
+        return [{"format": format_id, "name": name, "score": score} for format_id, name, score in rows]
+
+    def counters(self, i, min_score=matchups.DEFAULT_MIN_SCORE, max_stddev=matchups.DEFAULT_MAX_STDDEV):
+        check_thresholds(min_score, max_stddev)
+        details = self.details(i) or {}
+        return [entry for entry in details.get("counters", []) if entry["score"] > min_score * 100]
+
+    def countered_by(self, i, min_score=matchups.DEFAULT_MIN_SCORE, max_stddev=matchups.DEFAULT_MAX_STDDEV):
+        check_thresholds(min_score, max_stddev)
+        details = self.details(i) or {}
+        target = self.names[i]
+        result = []
+        for entry in details.get("dominates", []):
+            if entry["score"] <= min_score * 100:
+                continue
+            victim_counters = self.counters(self.index_of(entry["name"]), min_score, max_stddev)
+            rank = next((k + 1 for k, counter in enumerate(victim_counters) if counter["name"] == target), 0)
+            result.append(dict(entry, rank=rank))
+        return result
+
+    def leaderboard(self, min_score=matchups.DEFAULT_MIN_SCORE, max_stddev=matchups.DEFAULT_MAX_STDDEV):
+        check_thresholds(min_score, max_stddev)
+        self.load_all_details()
+        counts = {}
+        totals = {}
+        for i in range(len(self.names)):
+            for entry in self.counters(i, min_score, max_stddev):
+                c = self.index_of(entry["name"])
+                counts[c] = counts.get(c, 0) + 1
+                totals[c] = totals.get(c, 0) + entry["score"]
+
+        ids = sorted(counts, key=lambda c: (-counts[c], -totals[c] / counts[c], c))
+        return [{"index": c, "name": self.names[c], "count": counts[c], "avg_score": totals[c] / counts[c]} for c in ids]
+
+    def victims(self, i, min_score=matchups.DEFAULT_MIN_SCORE, max_stddev=matchups.DEFAULT_MAX_STDDEV):
+        check_thresholds(min_score, max_stddev)
+        target = self.names[i]
+        return [
+            self.names[v] for v in range(len(self.names))
+            if any(entry["name"] == target for entry in self.counters(v, min_score, max_stddev))
+        ]
+
+    def two_hop(self, i, min_score=matchups.DEFAULT_MIN_SCORE, max_stddev=matchups.DEFAULT_MAX_STDDEV):
+        check_thresholds(min_score, max_stddev)
+        counts = {}
+        totals = {}
+        usage = {}
+        for first in self.counters(i, min_score, max_stddev):
+            for entry in self.counters(self.index_of(first["name"]), min_score, max_stddev):
+                if entry["name"] == self.names[i]:
+                    continue
+                counts[entry["name"]] = counts.get(entry["name"], 0) + 1
+                totals[entry["name"]] = totals.get(entry["name"], 0) + entry["score"]
+                usage[entry["name"]] = entry["usage_percent"]
+
+        names = sorted(counts, key=lambda name: (-counts[name], -totals[name] / counts[name]))
+        return [{
+            "name": name,
+            "checks_beaten": counts[name],
+            "avg_score": round(totals[name] / counts[name], 3),
+            "usage_percent": usage[name],
+        } for name in names]
+
+def open_format(format_id, public_dir=PUBLIC_DIR):
+    index_path = os.path.join(public_dir, "db.png")
+    if not os.path.exists(index_path):
+        print(f"Index database {index_path} not found. Run build_db.py first.")
+        return None
+
+    format_id, rating = split_format(format_id)
+    format_path = os.path.join(public_dir, "dbs", f"{format_id}.png")
+    if not os.path.exists(format_path):
+        print(f"No database found for format '{format_id}' in {os.path.dirname(format_path)}.")
+        return None
+
+    index_conn = connect_readonly(index_path)
+    if rating is None:
+        rating = index_conn.execute("SELECT MAX(rating) FROM rankings WHERE format_id = ?", (format_id,)).fetchone()[0]
+    if rating is None:
+        print(f"No rankings found for format '{format_id}'.")
+        index_conn.close()
+        return None
+
+    print(f"Loading {format_id} (rating {rating}) from {format_path}...")
+    return SqliteFormat(index_conn, connect_readonly(format_path), format_id, rating)
@@ -0,0 +1,168 @@
+import os
+import json
+import gzip
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import records
+from process_data import slugify
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_VERSION = 1
+GZIP_LEVEL = 9
+# Quality 11 is ~3x slower than 10 for documents only ~3% smaller
+BROTLI_QUALITY = 10
+INDEX_FILE = "index.json"
+FORMATS_FILE = "formats.json"
+
+# Static alternative to the SQLite databases, for hosting without range
+# requests or wasm:
+#   formats.json                        every format with its ratings
+#   <format>/<rating>/index.json        rankings as [name, slug, usage_percent, types] rows
+#   <format>/<rating>/<slug>.json       one Pokemon's full stats
+# Every document also gets .gz and .br siblings for servers that serve
+# pre-compressed files (nginx gzip_static/brotli_static, most CDNs).
+
+def encode(document):
+    return json.dumps(document, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def compressed_variants(data):
+    # mtime=0 keeps the gzip bytes identical between builds of the same document
+    variants = {".gz": gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=BROTLI_QUALITY)
+    return variants
+
+def write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def write_document(path, document, written):
+    # Unchanged documents are left alone so their mtimes (and CDN caches) survive a rebuild
+    data = encode(document)
+    suffixes = [".gz", ".br"] if brotli is not None else [".gz"]
+    written.update([path] + [path + suffix for suffix in suffixes])
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data and all(os.path.exists(path + suffix) for suffix in suffixes):
+                return 0
+    except OSError:
+        pass
+
+    size = len(data)
+    for suffix, compressed in compressed_variants(data).items():
+        write_atomic(path + suffix, compressed)
+        size += len(compressed)
+    write_atomic(path, data)
+    return size
+
+def remove_stale(directory, written):
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            path = os.path.join(root, filename)
+            if path not in written:
+                os.remove(path)
+
+def export_format(format_id, records_path, out_dir):
+    header = records.read_header(records_path)
+    if not header:
+        return {"format": format_id, "error": "could not read records"}
+
+    format_dir = os.path.join(out_dir, format_id)
+    written = set()
+    rankings = {}
+    result = {"format": format_id, "documents": 0, "changed": 0, "bytes_written": 0, "bytes_read": os.path.getsize(records_path)}
+
+    for record in records.iter_records(records_path):
+        rating = record["rating"]
+        slug = slugify(record["pokemon_name"])
+        rating_dir = os.path.join(format_dir, str(rating))
+        if rating not in rankings:
+            os.makedirs(rating_dir, exist_ok=True)
+            rankings[rating] = []
+        rankings[rating].append((record["rank"], [record["pokemon_name"], slug, record["usage_percent"], record["data"].get("types", [])]))
+
+        document = dict(record["data"], format=format_id, rating=rating, rank=record["rank"])
+        size = write_document(os.path.join(rating_dir, f"{slug}.json"), document, written)
+        result["documents"] += 1
+        result["changed"] += 1 if size else 0
+        result["bytes_written"] += size
+
+    for rating, rows in rankings.items():
+        rows.sort(key=lambda row: row[0])
+        index = {
+            "version": STATIC_VERSION,
+            "format": format_id,
+            "rating": rating,
+            "total_battles": header.get("total_battles", 0),
+            "columns": ["name", "slug", "usage_percent", "types"],
+            "rows": [row for _, row in rows],
+        }
+        result["bytes_written"] += write_document(os.path.join(format_dir, str(rating), INDEX_FILE), index, written)
+
+    remove_stale(format_dir, written)
+    result["entry"] = {
+        "id": format_id,
+        "generation": header.get("generation"),
+        "total_battles": header.get("total_battles", 0),
+        "ratings": sorted(rankings),
+    }
+    return result
+
+def previous_entries(out_dir):
+    # formats.json entries from the last export, by format id
+    try:
+        with open(os.path.join(out_dir, FORMATS_FILE), "rb") as f:
+            document = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if document.get("version") != STATIC_VERSION:
+        return {}
+    return {entry["id"]: entry for entry in document.get("formats", [])}
+
+def build_static(record_paths, out_dir, tracker, workers=None):
+    # Returns the formats that failed, like build_db.process_formats
+    os.makedirs(out_dir, exist_ok=True)
+    if brotli is None:
+        print("brotli is not installed; writing .gz variants only (pip install brotli)")
+
+    failed = []
+    formats = []
+    previous = previous_entries(out_dir)
+    with tracker.stage("static") as stage:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(format_id, pool.submit(export_format, format_id, path, out_dir)) for format_id, path in sorted(record_paths.items())]
+            for format_id, future in futures:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"format": format_id, "error": str(e)}
+                if "error" in result:
+                    print(f"Error exporting format {format_id}: {result['error']}")
+                    failed.append(format_id)
+                    # Its previous documents are still on disk, so keep listing them
+                    if format_id in previous:
+                        formats.append(previous[format_id])
+                    continue
+                print(f"  {format_id}: {result['documents']} documents, {result['changed']} changed ({result['bytes_written'] / 1024 ** 2:.2f} MB written)")
+                formats.append(result["entry"])
+                stage.add(rows=result["documents"], bytes_read=result["bytes_read"], bytes_written=result["bytes_written"])
+
+        written = set()
+        stage.add(bytes_written=write_document(os.path.join(out_dir, FORMATS_FILE), {"version": STATIC_VERSION, "formats": formats}, written))
+
+    # Formats that disappeared from the data (only directories this export created)
+    for name in os.listdir(out_dir):
+        path = os.path.join(out_dir, name)
+        if os.path.isdir(path) and name not in record_paths and any(
+            os.path.exists(os.path.join(path, rating, INDEX_FILE)) for rating in os.listdir(path)
+        ):
+            print(f"Removing format no longer present: {name}")
+            shutil.rmtree(path)
+    return failed
@@ -0,0 +1,146 @@
+import os
+import json
+import random
+import argparse
+
+DEFAULT_MONTH = "2000-01"
+DEFAULT_FORMATS = ["gen9ou"]
+DEFAULT_RATINGS = [0, 1500, 1825]
+
+TYPES = ["Normal", "Fire", "Water", "Electric", "Grass", "Ice", "Fighting", "Poison", "Ground",
+         "Flying", "Psychic", "Bug", "Rock", "Ghost", "Dragon", "Dark", "Steel", "Fairy"]
+NATURES = ["Adamant", "Jolly", "Timid", "Modest", "Bold", "Impish", "Careful", "Calm", "Brave", "Quiet", "Relaxed", "Sassy"]
+STAT_NAMES = ["hp", "atk", "def", "spa", "spd", "spe"]
+EV_CHOICES = [0, 0, 0, 4, 8, 84, 124, 252, 252]
+REGIONAL_FORMS = ["Alola", "Galar", "Hisui", "Paldea"]
+
+# Chaos-shaped stats with the same layout and roughly the same skew as the real
+# Smogon files, so build and query timings can be measured without downloads.
+
+def pokemon_names(count):
+    # Every fourth Pokemon is a regional form; its pokedex id drops the hyphen
+    # like Showdown's does, which exercises the fuzzy-match fallback
+    return [f"Synthmon{i}-{REGIONAL_FORMS[i // 4 % len(REGIONAL_FORMS)]}" if i % 4 == 3 else f"Synthmon{i}" for i in range(count)]
+
+def to_id(name):
+    return "".join(c for c in name.lower() if c.isalnum())
+
+def generate_meta(names, move_count=400, item_count=150, ability_count=250, seed=0):
+    rng = random.Random(seed)
+    pokedex = {to_id(name): {
+        "name": name,
+        "types": rng.sample(TYPES, rng.choice([1, 2])),
+        "baseStats": {stat: rng.randint(30, 160) for stat in STAT_NAMES},
+        "abilities": {str(slot): f"Ability {rng.randrange(ability_count)}" for slot in range(rng.randint(1, 3))},
+    } for name in names}
+    moves = {f"move{i}": {
+        "name": f"Move {i}",
+        "type": rng.choice(TYPES),
+        "category": rng.choice(["Physical", "Special", "Status"]),
+        "basePower": rng.choice([0, 40, 60, 80, 90, 100, 120, 150]),
+        "accuracy": rng.choice([True, 100, 95, 90, 80]),
+        "shortDesc": f"Synthetic move {i}.",
+    } for i in range(move_count)}
+    items = {f"item{i}": {"name": f"Item {i}", "desc": f"Synthetic item {i}.", "spritenum": i} for i in range(item_count)}
+    abilities = {f"ability{i}": {"name": f"Ability {i}", "shortDesc": f"Synthetic ability {i}."} for i in range(ability_count)}
+    return pokedex, moves, items, abilities
+
+def random_spread(rng):
+    evs = [rng.choice(EV_CHOICES) for _ in STAT_NAMES]
+    return f"{rng.choice(NATURES)}:{'/'.join(map(str, evs))}"
+
+def weighted_sample(rng, population, weights, k):
+    # Without replacement, biased towards heavily used Pokemon like real teammate lists
+    chosen = {}
+    k = min(k, len(population))
+    while len(chosen) < k:
+        for pick in rng.choices(range(len(population)), weights=weights, k=k - len(chosen)):
+            chosen[pick] = True
+    return [population[i] for i in chosen]
+
+def generate_chaos(names, spreads=40, teammates=60, counters=30, moves_per=24, items_per=10,
+                   move_count=400, item_count=150, ability_count=250, battles=100000, seed=0):
+    rng = random.Random(seed)
+    # Usage follows a power law: a handful of Pokemon appear on most teams
+    weights = [1 / (rank + 1) ** 0.9 for rank in range(len(names))]
+    order = list(names)
+    rng.shuffle(order)
+    teams = battles * 2
+    data = {}
+
+    for rank, name in enumerate(order):
+        usage = min(weights[rank] * 0.6, 0.85)
+        raw = max(int(teams * usage), 1)
+        weight = raw * rng.uniform(0.8, 1.0)
+        others = [other for other in order if other != name]
+        other_weights = [weights[i] for i, other in enumerate(order) if other != name]
+
+        abilities = rng.sample(range(ability_count), min(rng.randint(1, 3), ability_count))
+        ability_split = sorted((rng.random() for _ in abilities), reverse=True)
+        total_split = sum(ability_split)
+
+        data[name] = {
+            "Raw count": raw,
+            "usage": usage,
+            "Viability Ceiling": [raw, rng.randint(60, 90), rng.randint(50, 85), rng.randint(40, 80)],
+            "Abilities": {f"ability{a}": weight * share / total_split for a, share in zip(abilities, ability_split)},
+            "Items": {f"item{i}": weight * rng.random() ** 3 for i in rng.sample(range(item_count), min(items_per, item_count))},
+            "Moves": {f"move{i}": weight * rng.random() for i in rng.sample(range(move_count), min(moves_per, move_count))},
+            "Spreads": {random_spread(rng): weight * rng.random() ** 4 for _ in range(spreads)},
+            "Happiness": {"255": weight},
+            "Teammates": {other: weight * rng.uniform(0.01, 0.6) for other in weighted_sample(rng, others, other_weights, teammates)},
+            "Tera Types": {t.lower(): weight * rng.random() ** 2 for t in rng.sample(TYPES, 5)},
+            "Checks and Counters": {
+                other: [rng.uniform(20, raw / 4 + 21), rng.uniform(0.3, 0.95), rng.uniform(0.0, 0.15)]
+                for other in weighted_sample(rng, others, other_weights, counters)
+            },
+        }
+
+    return {"info": {"metagame": "synthetic", "cutoff": 0, "cutoff deviation": 0, "team type": None, "number of battles": battles}, "data": data}
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def write_dataset(data_root, month=DEFAULT_MONTH, formats=DEFAULT_FORMATS, ratings=DEFAULT_RATINGS,
+                  pokemon=300, spreads=40, teammates=60, counters=30, seed=0):
+    # Writes data/meta/*.json and data/<month>/data/<format>-<rating>.json; returns the stats file paths
+    names = pokemon_names(pokemon)
+    meta_dir = os.path.join(data_root, "meta")
+    data_dir = os.path.join(data_root, month, "data")
+    os.makedirs(meta_dir, exist_ok=True)
+    os.makedirs(data_dir, exist_ok=True)
+
+    for filename, data in zip(["pokedex.json", "moves.json", "items.json", "abilities.json"], generate_meta(names, seed=seed)):
+        write_json(os.path.join(meta_dir, filename), data)
+
+    paths = []
+    for f, format_id in enumerate(formats):
+        for r, rating in enumerate(ratings):
+            path = os.path.join(data_dir, f"{format_id}-{rating}.json")
+            # Higher cut-offs see fewer battles, like the real files
+            chaos = generate_chaos(names, spreads, teammates, counters, battles=100000 // (r + 1), seed=seed * 1000 + f * 10 + r)
+            write_json(path, chaos)
+            paths.append(path)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic chaos stats and metadata for benchmarks")
+    parser.add_argument("output", help="Data directory to write into (meta/ and <month>/data/)")
+    parser.add_argument("--month", default=DEFAULT_MONTH, help=f"Month folder name (default: {DEFAULT_MONTH})")
+    parser.add_argument("--format", action="append", dest="formats", help="Format ids to generate (default: gen9ou)")
+    parser.add_argument("--ratings", type=int, nargs="+", default=DEFAULT_RATINGS, help="Rating cut-offs per format")
+    parser.add_argument("--pokemon", type=int, default=300, help="Pokemon per format")
+    parser.add_argument("--spreads", type=int, default=40, help="Spreads per Pokemon")
+    parser.add_argument("--teammates", type=int, default=60, help="Teammates per Pokemon")
+    parser.add_argument("--counters", type=int, default=30, help="Checks and counters per Pokemon")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = write_dataset(args.output, args.month, args.formats or DEFAULT_FORMATS, args.ratings,
+                          args.pokemon, args.spreads, args.teammates, args.counters, args.seed)
+    total = sum(os.path.getsize(path) for path in paths)
+    print(f"Wrote {len(paths)} stats files ({total / 1024 ** 2:.1f} MB) to {os.path.join(args.output, args.month, 'data')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import numpy as np
+from . import process_data
+
+DEFAULT_TOP = 10
+
+class TeammateMatrix:
+    # Every "Teammates" block of a stats file as one CSR matrix: row i holds
+    # P(teammate | names[i]), normalised the same way extract_teammates is.
+
+    def __init__(self, usage_data):
+        names = list(usage_data.keys())
+        index = {name: i for i, name in enumerate(names)}
+        for data in usage_data.values():
+            for teammate in data.get("Teammates", {}):
+                if teammate not in index:
+                    index[teammate] = len(names)
+                    names.append(teammate)
+
+        self.names = names
+        self.index = index
+        self.lookup = process_data.create_lookup_map(usage_data.keys())
+        self.usage = np.array([usage_data[name].get("usage", 0) if name in usage_data else 0 for name in names], dtype=np.float64)
+
+        n = len(names)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        cols, values = [], []
+        for i, name in enumerate(names):
+            pokemon_data = usage_data.get(name, {})
+            teammates = pokemon_data.get("Teammates", {})
+            total_weight = process_data.get_total_weight(pokemon_data)
+            if total_weight < sum(teammates.values()) / 6:
+                total_weight = sum(teammates.values()) / 6
+            indptr[i + 1] = indptr[i] + len(teammates)
+            for teammate, weight in teammates.items():
+                cols.append(index[teammate])
+                values.append(weight / total_weight)
+
+        self.indptr = indptr
+        self.indices = np.array(cols, dtype=np.int32)
+        self.values = np.array(values, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.names)
+
+    def resolve(self, pokemon_name):
+        matched = process_data.fuzzy_match(pokemon_name, self.lookup.values(), self.lookup)
+        return self.index[matched] if matched else None
+
+    def rows(self, members):
+        return np.concatenate([np.arange(self.indptr[m], self.indptr[m + 1]) for m in members])
+
+    def suggest(self, team, top=DEFAULT_TOP):
+        # Score of a candidate = mean over the team of P(candidate | member);
+        # a candidate missing from a member's list contributes 0 for that member.
+        n = len(self.names)
+        team = list(team)
+        if not team:
+            order = np.argsort(-self.usage, kind="stable")[:top]
+            return [{"name": self.names[c], "score": round(float(self.usage[c]) * 100, 3), "paired_with": 0,
+                     "usage_percent": round(float(self.usage[c]) * 100, 3)} for c in order]
+
+        edges = self.rows(team)
+        cols = self.indices[edges]
+        scores = np.bincount(cols, weights=self.values[edges], minlength=n) / len(team)
+        support = np.bincount(cols, minlength=n)
+        scores[team] = 0
+        support[team] = 0
+
+        candidates = np.flatnonzero(support)
+        if len(candidates) > top:
+            candidates = candidates[np.argpartition(-scores[candidates], top - 1)[:top]]
+        order = candidates[np.lexsort((-self.usage[candidates], -scores[candidates]))]
+        return [{
+            "name": self.names[c],
+            "score": round(float(scores[c]) * 100, 3),
+            "paired_with": int(support[c]),
+            "usage_percent": round(float(self.usage[c]) * 100, 3),
+        } for c in order]
@@ -0,0 +1,33 @@
+import sys
+import json
+
+import pytest
+
+from . import analysis
+from . import synthetic
+
+def run(argv, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["analysis.py"] + argv)
+    analysis.main()
+    return capsys.readouterr()
+
+@pytest.fixture
+def two_months(tmp_path, monkeypatch):
+    # analysis.py reads data/ relative to the working directory
+    for month, seed in (("2025-09", 1), ("2025-10", 2)):
+        synthetic.write_dataset(str(tmp_path / "data"), month=month, formats=["gen9ou"], ratings=[1500], pokemon=20, spreads=5, teammates=5, counters=5, seed=seed)
+    monkeypatch.chdir(tmp_path)
+
+def test_diff_defaults_to_the_previous_month(two_months, monkeypatch, capsys):
+    out = run(["diff", "--json"], monkeypatch, capsys)
+    report = json.loads(out.out)
+    assert "2025-09" in report["old"] and "2025-10" in report["new"]
+    assert "Loading stats from" in out.err
+
+def test_diff_needs_an_earlier_month(two_months, monkeypatch, capsys):
+    with pytest.raises(SystemExit):
+        run(["diff", "--date", "2025-09"], monkeypatch, capsys)
+
+def test_diff_with_an_explicit_month(two_months, monkeypatch, capsys):
+    out = run(["diff", "--against-date", "2025-09"], monkeypatch, capsys).out
+    assert out.startswith("\nDiff: ") and "2025-09" in out and "--- Usage Risers ---" in out
@@ -0,0 +1,52 @@
+import io
+import json
+
+import pytest
+
+from . import batch
+from . import synthetic
+
+NAMES = synthetic.pokemon_names(20)
+
+@pytest.fixture
+def data_dir(tmp_path):
+    synthetic.write_dataset(str(tmp_path), month="2025-10", formats=["gen9ou", "gen9uu"], ratings=[0, 1500], pokemon=len(NAMES), spreads=5, teammates=5, counters=5)
+    return str(tmp_path)
+
+def run(queries, data_dir, workers=1):
+    out = io.StringIO()
+    batch.run_batch([json.dumps(query) for query in queries], out, data_dir, workers)
+    return {result["id"]: result for result in map(json.loads, out.getvalue().splitlines())}
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_malformed_queries_do_not_sink_the_batch(data_dir, workers):
+    results = run([
+        {"id": "ok", "format": "gen9ou", "pokemon": NAMES[1], "sections": ["moves"]},
+        {"id": "int", "format": "gen9ou", "pokemon": 5},
+        {"id": "sections", "format": "gen9ou", "sections": [1, 2]},
+        {"id": "format", "format": ["gen9ou"]},
+        {"id": "other", "format": "gen9uu", "sections": "usage"},
+    ], data_dir, workers)
+
+    assert set(results) == {"ok", "int", "sections", "format", "other"}
+    assert results["ok"]["stats"]["name"] == NAMES[1] and "moves" in results["ok"]["stats"]
+    assert results["other"]["file"] == "gen9uu-1500.json" and "stats" in results["other"]
+    assert results["int"]["error"] == "'pokemon' must be a string"
+    assert results["sections"]["error"] == "'sections' must be a string or a list of strings"
+    assert results["format"]["error"] == "'format' must be a string"
+
+def test_failing_query_only_fails_itself(data_dir, monkeypatch):
+    def broken(ctx, name):
+        if name == NAMES[2]:
+            raise KeyError("boom")
+        return []
+    monkeypatch.setitem(batch.SECTIONS, "moves", broken)
+
+    results = run([
+        {"id": 1, "format": "gen9ou", "pokemon": NAMES[1], "sections": ["moves"]},
+        {"id": 2, "format": "gen9ou", "pokemon": NAMES[2], "sections": ["moves"]},
+        {"id": 3, "format": "gen9ou", "pokemon": NAMES[3], "sections": ["moves"]},
+    ], data_dir)
+
+    assert results[2] == {"id": 2, "format": "gen9ou", "error": "KeyError: 'boom'", "file": "gen9ou-1500.json"}
+    assert results[1]["stats"]["moves"] == [] and results[3]["stats"]["moves"] == []
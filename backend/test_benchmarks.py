@@ -0,0 +1,139 @@
+import os
+import sys
+import shutil
+import sqlite3
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.benchmark_suite
+
+from . import process_data
+from . import matchups
+from . import records
+from . import analysis
+from . import synthetic
+
+# build_db is written as a script with flat imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import build_db
+
+# Run through run_benchmarks.py to save baselines and fail on regressions, or
+# with `pytest --run-benchmarks`; plain pytest deselects them (see conftest.py).
+# Dataset size is set with --bench-pokemon/--bench-spreads/...
+
+FORMAT_ID = "gen9ou"
+# Pokemon looked up per round by the per-Pokemon benchmarks, most used first
+SAMPLE = 25
+
+EXTRACTORS = {
+    "usage_stats": lambda ctx, name: process_data.extract_usage_stats(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "base_stats": lambda ctx, name: process_data.extract_base_stats(name, ctx["pokedex"], ctx["pokedex_lookup"]),
+    "types": lambda ctx, name: process_data.extract_types(name, ctx["pokedex"], ctx["pokedex_lookup"]),
+    "possible_abilities": lambda ctx, name: process_data.extract_possible_abilities(name, ctx["pokedex"], ctx["pokedex_lookup"]),
+    "moves": lambda ctx, name: process_data.extract_moves(ctx["usage_data"], name, ctx["moves"], ctx["usage_lookup"]),
+    "teammates": lambda ctx, name: process_data.extract_teammates(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "items": lambda ctx, name: process_data.extract_items(ctx["usage_data"], name, ctx["items"], ctx["usage_lookup"]),
+    "abilities": lambda ctx, name: process_data.extract_abilities(ctx["usage_data"], name, ctx["abilities"], ctx["usage_lookup"]),
+    "natures": lambda ctx, name: process_data.extract_natures(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "spreads": lambda ctx, name: process_data.extract_spreads(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "evs": lambda ctx, name: process_data.extract_evs(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "tera_types": lambda ctx, name: process_data.extract_tera_types(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "checks_and_counters": lambda ctx, name: process_data.extract_checks_and_counters(ctx["usage_data"], name, ctx["usage_lookup"]),
+    "dominates": lambda ctx, name: process_data.extract_dominates(ctx["usage_data"], name, ctx["usage_lookup"]),
+}
+
+@pytest.fixture(scope="session")
+def dataset(request, tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("synthetic"))
+    option = request.config.getoption
+    paths = synthetic.write_dataset(
+        root, formats=[FORMAT_ID],
+        pokemon=option("--bench-pokemon"), spreads=option("--bench-spreads"),
+        teammates=option("--bench-teammates"), counters=option("--bench-counters"),
+    )
+    return {
+        "root": root,
+        "meta_dir": os.path.join(root, "meta"),
+        "month_dir": os.path.join(root, synthetic.DEFAULT_MONTH),
+        "stats_file": paths[-1],
+    }
+
+@pytest.fixture(scope="session")
+def ctx(dataset):
+    usage_data = process_data.load_data(dataset["stats_file"])["data"]
+    pokedex, moves, items, abilities = records.load_meta(dataset["meta_dir"])
+    ranked = sorted(usage_data, key=lambda name: usage_data[name]["usage"], reverse=True)
+    return {
+        "usage_data": usage_data,
+        "usage_lookup": process_data.create_lookup_map(usage_data.keys()),
+        "pokedex": pokedex,
+        "pokedex_lookup": process_data.create_lookup_map(pokedex.keys()),
+        "moves": moves,
+        "items": items,
+        "abilities": abilities,
+        "sample": ranked[:SAMPLE],
+    }
+
+@pytest.fixture(scope="session")
+def graph(ctx):
+    return matchups.MatchupGraph(ctx["usage_data"])
+
+@pytest.mark.parametrize("section", sorted(EXTRACTORS))
+def test_extract(benchmark, ctx, section):
+    extract = EXTRACTORS[section]
+    result = benchmark(lambda: [extract(ctx, name) for name in ctx["sample"]])
+    assert any(result)
+
+def test_collect_pokemon_stats(benchmark, ctx):
+    def collect():
+        return [process_data.collect_pokemon_stats(
+            name, ctx["usage_data"], ctx["pokedex"], ctx["moves"], ctx["items"], ctx["abilities"],
+            ctx["pokedex_lookup"], ctx["usage_lookup"]
+        ) for name in ctx["sample"]]
+
+    result = benchmark(collect)
+    assert all(result)
+
+def test_build_db_format(benchmark, dataset, tmp_path, monkeypatch):
+    # Full rebuild of one format: records stage, format database and rankings
+    db_dir = tmp_path / "dbs"
+    monkeypatch.setattr(build_db, "DB_DIR", str(db_dir))
+    monkeypatch.setattr(build_db, "META_DIR", dataset["meta_dir"])
+    meta = records.load_meta(dataset["meta_dir"])
+    index_path = str(tmp_path / "db.png")
+
+    def reset():
+        shutil.rmtree(records.records_dir(dataset["month_dir"]), ignore_errors=True)
+        shutil.rmtree(db_dir, ignore_errors=True)
+        db_dir.mkdir()
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+    def build():
+        index_conn = sqlite3.connect(index_path)
+        try:
+            build_db.init_index_db(index_conn)
+            return build_db.process_formats(index_conn, *meta, dataset["month_dir"], build_db.metrics.Metrics("benchmark"))
+        finally:
+            index_conn.close()
+
+    failed = benchmark.pedantic(build, setup=reset, rounds=3, iterations=1)
+    assert failed == []
+    assert os.path.exists(db_dir / f"{FORMAT_ID}.png")
+
+def test_matchup_graph(benchmark, ctx):
+    graph = benchmark(matchups.MatchupGraph, ctx["usage_data"])
+    assert len(graph) == len(ctx["usage_data"])
+
+def test_counters_countered_by(benchmark, ctx, graph):
+    result = benchmark(lambda: [analysis.find_pokemon_countered_by(name, None, graph=graph) for name in ctx["sample"]])
+    assert any(result)
+
+def test_counters_two_hop(benchmark, ctx, graph):
+    result = benchmark(lambda: [analysis.find_two_hop_checks(name, None, graph=graph) for name in ctx["sample"]])
+    assert any(result)
+
+def test_counters_leaderboard(benchmark, graph):
+    result = benchmark(graph.leaderboard)
+    assert result
@@ -0,0 +1,96 @@
+import os
+import sys
+import sqlite3
+
+import pytest
+
+from . import metrics
+from . import records
+from . import synthetic
+
+# build_db is written as a script with flat imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import build_db
+
+@pytest.fixture
+def builder(synthetic_month, tmp_path, monkeypatch):
+    monkeypatch.setattr(build_db, "DB_DIR", str(tmp_path / "dbs"))
+    monkeypatch.setattr(build_db, "META_DIR", synthetic_month["meta_dir"])
+    os.makedirs(build_db.DB_DIR)
+    index_path = str(tmp_path / "db.png")
+    meta = records.load_meta(synthetic_month["meta_dir"])
+
+    def build(formats=None):
+        index_conn = sqlite3.connect(index_path)
+        try:
+            build_db.init_index_db(index_conn)
+            return build_db.process_formats(index_conn, *meta, synthetic_month["month_dir"], metrics.Metrics("test"), formats)
+        finally:
+            index_conn.close()
+
+    build.index_path = index_path
+    return build
+
+def rows(index_path, table, format_id):
+    with sqlite3.connect(index_path) as conn:
+        return sorted(conn.execute(f"SELECT * FROM {table} WHERE format_id = ?", (format_id,)).fetchall())
+
+def details(format_id):
+    with sqlite3.connect(os.path.join(build_db.DB_DIR, f"{format_id}.png")) as conn:
+        return sorted(conn.execute("SELECT pokemon_name, rating, data FROM pokemon_details").fetchall())
+
+def index_state(index_path, format_id):
+    return {table: rows(index_path, table, format_id) for table in ["rankings", "pokemon_profiles"]}
+
+def rewrite_format(synthetic_month, format_id, names, seed):
+    # New chaos files with a different Pokemon pool, as if the month was re-downloaded
+    data_dir = os.path.join(synthetic_month["month_dir"], "data")
+    for filename in os.listdir(data_dir):
+        if filename.startswith(format_id + "-"):
+            synthetic.write_json(os.path.join(data_dir, filename), synthetic.generate_chaos(names, spreads=5, teammates=5, counters=5, seed=seed))
+
+def test_formats_reload_only_touches_those_formats(synthetic_month, builder):
+    assert builder() == []
+    other = index_state(builder.index_path, "gen9uu")
+    other_details = details("gen9uu")
+    assert other["rankings"] and other["pokemon_profiles"]
+
+    names = synthetic.pokemon_names(30)
+    kept = names[:12]
+    rewrite_format(synthetic_month, "gen9ou", kept, seed=7)
+    assert builder(formats=["gen9ou"]) == []
+
+    assert index_state(builder.index_path, "gen9uu") == other
+    assert details("gen9uu") == other_details
+
+    # Fully replaced: no Pokemon from the old pool is left anywhere
+    with sqlite3.connect(builder.index_path) as conn:
+        for table in ["rankings", "pokemon_profiles"]:
+            names_left = {name for (name,) in conn.execute(f"SELECT pokemon_name FROM {table} WHERE format_id = 'gen9ou'")}
+            assert names_left == set(kept)
+    assert {name for name, _, _ in details("gen9ou")} == set(kept)
+
+    # The cross-format table still covers the format that was not reloaded
+    with sqlite3.connect(builder.index_path) as conn:
+        assert {format_id for (format_id,) in conn.execute("SELECT DISTINCT format_id FROM similar_pokemon")} == {"gen9ou", "gen9uu"}
+
+def test_failed_format_keeps_its_previous_rows(synthetic_month, builder, monkeypatch):
+    assert builder() == []
+    before = index_state(builder.index_path, "gen9ou")
+    before_details = details("gen9ou")
+
+    rewrite_format(synthetic_month, "gen9ou", synthetic.pokemon_names(30)[:10], seed=3)
+    encode = build_db.payload.encode_details
+    calls = []
+
+    def failing(stats, version):
+        calls.append(stats["name"])
+        if len(calls) == 5:
+            raise RuntimeError("disk full")
+        return encode(stats, version)
+
+    monkeypatch.setattr(build_db.payload, "encode_details", failing)
+    assert builder(formats=["gen9ou"]) == ["gen9ou"]
+
+    assert index_state(builder.index_path, "gen9ou") == before
+    assert details("gen9ou") == before_details
@@ -0,0 +1,56 @@
+import os
+import json
+
+from . import catalog
+
+def write_stats(path, battles, padding=0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"info": {"number of battles": battles}, "data": {"Pad": "x" * padding}}, f)
+
+def backdate(path):
+    # Directory mtimes can be coarse; an old stamp makes the next change visible
+    os.utime(path, ns=(10 ** 9, 10 ** 9))
+
+def test_new_months_and_files_are_picked_up(tmp_path):
+    root = str(tmp_path)
+    write_stats(os.path.join(root, "2025-09", "data", "gen9ou-1500.json"), 100)
+    index = catalog.Catalog(root)
+    assert index.months() == ["2025-09"]
+    backdate(root)
+    backdate(os.path.join(root, "2025-09", "data"))
+
+    write_stats(os.path.join(root, "2025-10", "data", "gen9ou-1500.json"), 200)
+    assert index.latest_month() == "2025-10"
+
+    write_stats(os.path.join(root, "2025-09", "data", "gen9ou-1825.json"), 50)
+    assert [entry["rating"] for entry in index.ratings("2025-09", "gen9ou")] == [1500, 1825]
+    # A fresh instance reads the same index back from the cache file
+    assert catalog.Catalog(root).ratings("2025-09", "gen9ou") == index.ratings("2025-09", "gen9ou")
+
+def test_files_rewritten_in_place_are_noticed(tmp_path):
+    root = str(tmp_path)
+    path = os.path.join(root, "2025-10", "data", "gen9ou-1500.json")
+    write_stats(path, 100)
+    index = catalog.Catalog(root)
+    assert index.best_file("2025-10", "gen9ou")["battles"] == 100
+    first_hash = index.file_hash("2025-10", "gen9ou-1500.json")
+
+    # Same inode, so the directory mtime doesn't move
+    write_stats(path, 250, padding=10)
+    assert index.best_file("2025-10", "gen9ou")["battles"] == 250
+    assert index.file_hash("2025-10", "gen9ou-1500.json") == catalog.hash_file(path) != first_hash
+    assert catalog.Catalog(root).file_hash("2025-10", "gen9ou-1500.json") == catalog.hash_file(path)
+
+def test_hyphenated_format_names(tmp_path):
+    root = str(tmp_path)
+    for filename in ["gen9nationaldex-ag-0.json", "gen9nationaldex-ag-1825.json", "gen9nationaldex-ag.json"]:
+        write_stats(os.path.join(root, "2025-10", "data", filename), 10)
+    index = catalog.Catalog(root)
+
+    assert catalog.parse_filename("gen9nationaldex-ag-1825.json") == ("gen9nationaldex-ag", 1825)
+    assert list(index.formats("2025-10")) == ["gen9nationaldex-ag"]
+    assert [entry["rating"] for entry in index.ratings("2025-10", "gen9nationaldex-ag")] == [None, 0, 1825]
+    assert index.best_file("2025-10", "gen9nationaldex-ag")["filename"] == "gen9nationaldex-ag-1825.json"
+    assert index.best_file("2025-10", "gen9nationaldex-ag-0")["filename"] == "gen9nationaldex-ag-0.json"
+    assert index.best_file("2025-10", "gen9nationaldex") is None
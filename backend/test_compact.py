@@ -0,0 +1,41 @@
+import json
+
+from . import compact
+from . import matchups
+
+def test_collect_pokemon_stats_matches_dicts(synthetic_stats):
+    stats = synthetic_stats(60)
+    compact_data = compact.compact_usage(stats["usage_data"])
+    for name in stats["usage_data"]:
+        assert json.dumps(stats["collect"](name, compact_data)) == json.dumps(stats["collect"](name))
+
+def test_sections_behave_like_dicts(synthetic_stats):
+    usage_data = synthetic_stats(20)["usage_data"]
+    compact_data = compact.compact_usage(usage_data)
+    for name, data in usage_data.items():
+        pokemon = compact_data[name]
+        assert set(pokemon) == set(data)
+        assert dict(pokemon["Moves"].items()) == data["Moves"]
+        assert list(pokemon["Teammates"]) == list(data["Teammates"])
+        counters = pokemon["Checks and Counters"]
+        for counter, stats in data["Checks and Counters"].items():
+            assert counter in counters
+            assert list(counters[counter]) == stats
+        assert "missing" not in counters
+        assert counters.get("missing", 0) == 0
+        assert pokemon.get("Tera Types") is not None
+        assert pokemon.get("Unknown section", {}) == {}
+
+def test_matchup_graph_on_compact(synthetic_stats):
+    usage_data = synthetic_stats(60)["usage_data"]
+    expected = matchups.MatchupGraph(usage_data).leaderboard()
+    assert matchups.MatchupGraph(compact.compact_usage(usage_data)).leaderboard() == expected
+
+def test_shared_string_table(synthetic_stats):
+    usage_data = synthetic_stats(20)["usage_data"]
+    strings = compact.StringTable()
+    first = compact.compact_usage(usage_data, strings)
+    count = len(strings)
+    second = compact.compact_usage(usage_data, strings)
+    assert len(strings) == count
+    assert list(first) == list(second)
@@ -0,0 +1,112 @@
+import os
+import uuid
+
+import psycopg
+import pytest
+from psycopg import sql
+from psycopg.conninfo import make_conninfo
+
+from . import direct_load
+
+# Runs against a scratch database, e.g.
+#   TEST_DATABASE_URL=postgresql://postgres@localhost/postgres pytest backend/test_direct_load.py
+# Each test gets its own schema, dropped afterwards.
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+FORMATS = [{"id": "gen9ou", "name": "OU"}, {"id": "gen9uu", "name": "UU"}]
+POKEMON = [
+    {"format_id": "gen9ou", "name": "Great Tusk", "usage": 30.5, "data": {"moves": ["rapidspin"]}},
+    {"format_id": "gen9ou", "name": "Kingambit", "usage": 25.0, "data": {"moves": ["suckerpunch"]}},
+    {"format_id": "gen9uu", "name": "Mamoswine", "usage": 12.0, "data": {"moves": ["iceshard"]}},
+]
+
+@pytest.fixture
+def conninfo():
+    schema = f"direct_load_test_{uuid.uuid4().hex[:8]}"
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        conn.execute(sql.SQL("CREATE SCHEMA {}").format(sql.Identifier(schema)))
+        conn.execute(sql.SQL("SET search_path TO {}").format(sql.Identifier(schema)))
+        conn.execute("CREATE TABLE formats (id text PRIMARY KEY, name text NOT NULL)")
+        conn.execute("""
+        CREATE TABLE pokemon (
+            format_id text NOT NULL REFERENCES formats(id),
+            name text NOT NULL,
+            usage float8 NOT NULL,
+            data jsonb,
+            content_hash text,
+            PRIMARY KEY (format_id, name)
+        )
+        """)
+    try:
+        yield make_conninfo(DATABASE_URL, options=f"-c search_path={schema}")
+    finally:
+        with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+            conn.execute(sql.SQL("DROP SCHEMA {} CASCADE").format(sql.Identifier(schema)))
+
+def load(conninfo, formats, pokemon, prune=False):
+    # Fresh dicts each time: stage_records writes content_hash into them
+    results = direct_load.load_tables(conninfo, [
+        {"table": "formats", "records": [dict(row) for row in formats], "key": ["id"], "hashed": False},
+        {"table": "pokemon", "records": [dict(row) for row in pokemon], "key": ["format_id", "name"]},
+    ], prune=prune)
+    return {result["table"]: result for result in results}
+
+def pokemon_rows(conninfo):
+    # xmin changes whenever a row gets a new tuple version
+    with psycopg.connect(conninfo) as conn:
+        rows = conn.execute("SELECT format_id, name, usage, xmin::text FROM pokemon ORDER BY format_id, name").fetchall()
+    return {(format_id, name): (usage, xmin) for format_id, name, usage, xmin in rows}
+
+def format_rows(conninfo):
+    with psycopg.connect(conninfo) as conn:
+        return dict(conn.execute("SELECT id, name FROM formats").fetchall())
+
+def test_insert_skip_and_update(conninfo):
+    results = load(conninfo, FORMATS, POKEMON)
+    assert results["pokemon"]["inserted"] == 3 and results["pokemon"]["updated"] == 0
+    before = pokemon_rows(conninfo)
+
+    changed = [dict(POKEMON[0], usage=31.0)] + POKEMON[1:] + [
+        {"format_id": "gen9uu", "name": "Hydreigon", "usage": 8.0, "data": {}},
+    ]
+    results = load(conninfo, FORMATS, changed)
+    assert results["pokemon"]["inserted"] == 1
+    assert results["pokemon"]["updated"] == 1
+    assert results["pokemon"]["unchanged"] == 2
+
+    after = pokemon_rows(conninfo)
+    assert after[("gen9ou", "Great Tusk")][0] == 31.0
+    assert after[("gen9ou", "Great Tusk")][1] != before[("gen9ou", "Great Tusk")][1]
+    # Rows with an unchanged hash are not rewritten at all
+    for key in [("gen9ou", "Kingambit"), ("gen9uu", "Mamoswine")]:
+        assert after[key] == before[key]
+    assert ("gen9uu", "Hydreigon") in after
+
+def test_prune_removes_missing_rows(conninfo):
+    load(conninfo, FORMATS, POKEMON)
+
+    # Without --prune rows that disappeared from the source stay
+    load(conninfo, FORMATS[:1], POKEMON[:1])
+    assert len(pokemon_rows(conninfo)) == 3
+
+    results = load(conninfo, FORMATS[:1], POKEMON[:1], prune=True)
+    assert results["pokemon"]["deleted"] == 2
+    # gen9uu goes too: children are pruned first, so its foreign key never blocks
+    assert results["formats"]["deleted"] == 1
+    assert list(pokemon_rows(conninfo)) == [("gen9ou", "Great Tusk")]
+    assert format_rows(conninfo) == {"gen9ou": "OU"}
+
+def test_failed_merge_rolls_back_everything(conninfo):
+    load(conninfo, FORMATS, POKEMON)
+    before = pokemon_rows(conninfo)
+
+    # formats merges fine, then pokemon violates NOT NULL during its merge
+    renamed = [dict(row, name=row["name"] + " (renamed)") for row in FORMATS]
+    broken = [dict(POKEMON[0], usage=99.0), dict(POKEMON[1], usage=None)]
+    with pytest.raises(psycopg.errors.NotNullViolation):
+        load(conninfo, renamed, broken, prune=True)
+
+    assert format_rows(conninfo) == {"gen9ou": "OU", "gen9uu": "UU"}
+    assert pokemon_rows(conninfo) == before
@@ -0,0 +1,66 @@
+import os
+import json
+
+import pytest
+import requests
+
+from . import download_meta
+
+PAGES = {
+    "items.js": 'exports.BattleItems = {leftovers: {name: "Leftovers", spritenum: 242,},};',
+    "abilities.js": 'exports.BattleAbilities = {intimidate: {name: "Intimidate"}};',
+    "moves.json": json.dumps({"tackle": {"name": "Tackle"}}),
+    "pokedex.json": json.dumps({"pikachu": {"name": "Pikachu"}}),
+    "ps-pokemon.sheet.mjs": "export const BattlePokemonIconIndexes = {pikachualola: 1200,};",
+}
+
+class StubResponse:
+    def __init__(self, status, text):
+        self.status_code = status
+        self.text = text
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Server Error")
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    # Maps a file name to (status, body); defaults to the good pages above
+    overrides = {}
+
+    def get(url, **kwargs):
+        name = url.rsplit("/", 1)[-1]
+        return StubResponse(*overrides.get(name, (200, PAGES[name])))
+
+    monkeypatch.setattr(download_meta.requests, "get", get)
+    monkeypatch.setattr(download_meta, "META_DIR", str(tmp_path / "meta"))
+    return overrides
+
+def meta_files():
+    return {name: os.stat(os.path.join(download_meta.META_DIR, name)).st_mtime_ns for name in os.listdir(download_meta.META_DIR)}
+
+def test_writes_valid_json(server):
+    assert download_meta.download_meta()
+    with open(os.path.join(download_meta.META_DIR, "items.json"), "r", encoding="utf-8") as f:
+        assert json.load(f) == {"leftovers": {"name": "Leftovers", "spritenum": 242}}
+    assert set(meta_files()) == {"items.json", "abilities.json", "moves.json", "pokedex.json", "forms_index.json"}
+
+def test_unchanged_files_keep_their_mtime(server):
+    assert download_meta.download_meta()
+    for path in meta_files():
+        os.utime(os.path.join(download_meta.META_DIR, path), ns=(10 ** 9, 10 ** 9))
+    before = meta_files()
+    assert download_meta.download_meta()
+    assert meta_files() == before
+
+def test_errors_keep_the_previous_files(server):
+    assert download_meta.download_meta()
+    before = meta_files()
+
+    server["moves.json"] = (503, "<html>Service Unavailable</html>")
+    server["pokedex.json"] = (200, "<html>Maintenance</html>")
+    server["items.js"] = (404, "Not Found")
+    assert download_meta.download_meta() is False
+    assert meta_files() == before
+    with open(os.path.join(download_meta.META_DIR, "moves.json"), "r", encoding="utf-8") as f:
+        assert json.load(f) == {"tackle": {"name": "Tackle"}}
@@ -0,0 +1,37 @@
+import tracemalloc
+
+from . import metrics
+
+MB = 1024 * 1024
+
+def test_nested_stage_keeps_the_parent_peak():
+    was_tracing = tracemalloc.is_tracing()
+    tracker = metrics.Metrics("test", trace_memory=True)
+    try:
+        with tracker.stage("outer") as outer:
+            data = bytearray(8 * MB)
+            del data
+            # The inner stage resets tracemalloc's peak; outer must not forget its 8 MB
+            with tracker.stage("inner") as inner:
+                data = bytearray(MB)
+                del data
+            data = bytearray(2 * MB)
+            del data
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    assert MB <= inner.traced_peak < 4 * MB
+    assert outer.traced_peak >= 8 * MB
+
+def test_stage_reports_process_peak_and_growth():
+    tracker = metrics.Metrics("test")
+    with tracker.stage("load") as stage:
+        pass
+    result = stage.to_dict()
+    assert result["process_peak_rss_bytes"] == stage.peak_rss
+    if stage.peak_rss is not None:
+        assert result["peak_rss_growth_bytes"] >= 0
+
+    # Set up front, not only once the stage has finished
+    assert metrics.StageMetrics("fresh", {}).to_dict()["process_peak_rss_bytes"] is None
@@ -0,0 +1,54 @@
+import json
+import pytest
+
+from . import payload
+
+@pytest.fixture
+def make_stats(synthetic_stats):
+    def make(pokemon=40):
+        stats = synthetic_stats(pokemon)
+        return [stats["collect"](name) for name in stats["usage_data"]], stats["display_names"]
+    return make
+
+def assert_close(expected, actual):
+    # Percentages keep two decimals and counts go through float32
+    if isinstance(expected, dict):
+        assert list(actual) == list(expected)
+        for key in expected:
+            assert_close(expected[key], actual[key])
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected)
+        for a, b in zip(expected, actual):
+            assert_close(a, b)
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, abs=0.5 / payload.BP_SCALE + 1e-9, rel=1e-6)
+    else:
+        assert actual == expected
+
+def test_v2_round_trip(make_stats):
+    stats, names = make_stats()
+    for entry in stats:
+        assert_close(entry, payload.decode_details(payload.encode_details(entry), names))
+
+def test_v2_is_smaller(make_stats):
+    stats, _ = make_stats()
+    v1 = sum(len(payload.encode_details(entry, 1).encode("utf-8")) for entry in stats)
+    v2 = sum(len(payload.encode_details(entry)) for entry in stats)
+    assert v1 / v2 > 3
+
+def test_v1_is_json(make_stats):
+    stats, _ = make_stats(5)
+    encoded = payload.encode_details(stats[0], 1)
+    assert json.loads(encoded) == stats[0]
+    assert payload.decode_details(encoded) == stats[0]
+
+def test_missing_names_fall_back_to_ids(make_stats):
+    stats, _ = make_stats(5)
+    decoded = payload.decode_details(payload.encode_details(stats[0]))
+    assert all(move["name"] == move["id"] for move in decoded["moves"])
+
+def test_rejects_unknown_blobs():
+    with pytest.raises(ValueError):
+        payload.decode_details(b"not a payload")
+    with pytest.raises(ValueError):
+        payload.decode_details(payload.MAGIC + bytes([payload.VERSION + 1]))
@@ -0,0 +1,93 @@
+import os
+import json
+
+from . import pipeline
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+class Step:
+    # Stub stage body: counts its calls and writes its output file
+    def __init__(self, output=None, result=None, error=None):
+        self.output = output
+        self.result = result
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        if self.output:
+            write(self.output, f"run {self.calls}")
+        return self.result
+
+def run(stages, state_path, **kwargs):
+    runner = pipeline.Pipeline(stages, state_path, workers=2, **kwargs)
+    ok = runner.run()
+    return ok, {name: result["status"] for name, result in runner.results.items()}
+
+def test_unchanged_stages_are_skipped(tmp_path):
+    state = str(tmp_path / "state.json")
+    source, output = str(tmp_path / "in.txt"), str(tmp_path / "out.txt")
+    write(source, "a")
+    step = Step(output)
+
+    def stages():
+        return [pipeline.Stage("build", step, inputs=lambda: [source], outputs=lambda: [output])]
+
+    assert run(stages(), state) == (True, {"build": "ran"})
+    assert run(stages(), state) == (True, {"build": "skipped"})
+
+    # A changed input, a deleted output and --force each rerun the stage
+    write(source, "bb")
+    assert run(stages(), state)[1] == {"build": "ran"}
+    os.remove(output)
+    assert run(stages(), state)[1] == {"build": "ran"}
+    assert run(stages(), state, force=True)[1] == {"build": "ran"}
+    assert step.calls == 4
+
+def test_max_age_expires_the_cache(tmp_path):
+    state = str(tmp_path / "state.json")
+    output = str(tmp_path / "meta.json")
+    step = Step(output)
+
+    def stages():
+        return [pipeline.Stage("meta", step, outputs=lambda: [output], max_age=3600)]
+
+    run(stages(), state)
+    assert run(stages(), state)[1] == {"meta": "skipped"}
+
+    with open(state, "r", encoding="utf-8") as f:
+        saved = json.load(f)
+    saved["meta"]["finished_at"] -= 7200
+    write(state, json.dumps(saved))
+    assert run(stages(), state)[1] == {"meta": "ran"}
+
+def test_failures_block_dependents(tmp_path):
+    state = str(tmp_path / "state.json")
+    stages = [
+        pipeline.Stage("download", Step(error=OSError("offline"))),
+        pipeline.Stage("extract", Step(str(tmp_path / "x")), deps=["download"]),
+        pipeline.Stage("build", Step(str(tmp_path / "y")), deps=["extract"]),
+        pipeline.Stage("meta", Step(result=False)),
+        pipeline.Stage("other", Step(str(tmp_path / "z"))),
+    ]
+    ok, statuses = run(stages, state)
+
+    assert not ok
+    assert statuses == {"download": "failed", "extract": "blocked", "build": "blocked", "meta": "failed", "other": "ran"}
+    # Failed stages are never cached
+    with open(state, "r", encoding="utf-8") as f:
+        assert set(json.load(f)) == {"other"}
+
+def test_unscheduled_stages_fail_the_run(tmp_path):
+    stages = [
+        pipeline.Stage("a", Step(), deps=["b"]),
+        pipeline.Stage("b", Step(), deps=["a"]),
+        pipeline.Stage("c", Step()),
+    ]
+    ok, statuses = run(stages, str(tmp_path / "state.json"))
+    assert not ok
+    assert statuses == {"a": "blocked", "b": "blocked", "c": "ran"}
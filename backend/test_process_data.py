@@ -1,47 +1,20 @@
 import os
 import json
 import sys
-import re
 from . import process_data
+from . import catalog
 
-DATE = process_data.get_latest_date()
-if not DATE:
-    print("No date folder found in data directory.")
-    exit(1)
-    
-DATA_DIR = os.path.join("data", DATE, "data")
 META_DIR = os.path.join("data", "meta")
 
-def find_stats_file(format_name):
-    if not os.path.exists(DATA_DIR):
-        print(f"Data directory {DATA_DIR} does not exist.")
+def find_stats_file(format_name, date=None):
+    date = date or process_data.get_latest_date()
+    if not date:
+        print("No date folder found in data directory.")
         return None
 
-    files = os.listdir(DATA_DIR)
-    pattern = re.compile(r"^(.*)-(\d+)\.json$")
-    
-    best_file = None
-    max_elo = -1
-    
-    if format_name.endswith(".json") and os.path.exists(os.path.join(DATA_DIR, format_name)):
-        return os.path.join(DATA_DIR, format_name)
-
-    for filename in files:
-        match = pattern.match(filename)
-        if not match:
-            continue
-            
-        fmt = match.group(1)
-        elo = int(match.group(2))
-        
-        if fmt == format_name:
-            if elo > max_elo:
-                max_elo = elo
-                best_file = filename
-                
-    if best_file:
-        return os.path.join(DATA_DIR, best_file)
-    return None
+    # Accepts "gen9ou", "gen9ou-1825" or "gen9ou-1825.json"
+    entry = catalog.get_catalog("data").best_file(date, os.path.splitext(format_name)[0])
+    return entry["path"] if entry else None
 
 def test_extraction(format_name="gen9ou"):
     stats_file_path = find_stats_file(format_name)
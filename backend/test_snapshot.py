@@ -0,0 +1,48 @@
+import os
+import json
+
+from . import process_data
+from . import snapshot
+from . import synthetic
+
+def write_stats(tmp_path, stats):
+    stats_path = os.path.join(tmp_path, "2025-10", "data", "gen9ou-1500.json")
+    os.makedirs(os.path.dirname(stats_path))
+    synthetic.write_json(stats_path, stats["content"])
+    return stats_path
+
+def test_collect_pokemon_stats_matches_json(tmp_path, synthetic_stats):
+    stats = synthetic_stats()
+    content, usage_data = stats["content"], stats["usage_data"]
+    stats_path = write_stats(tmp_path, stats)
+
+    snapshot.write_snapshot(stats_path)
+    snap = snapshot.open_for(stats_path)
+    assert snap["info"] == content["info"]
+    assert list(snap["data"]) == list(usage_data)
+    for name in usage_data:
+        assert json.dumps(stats["collect"](name, snap["data"])) == json.dumps(stats["collect"](name))
+    snap["data"].close()
+
+def test_stale_snapshots_are_ignored(tmp_path, synthetic_stats):
+    stats = synthetic_stats(5)
+    content = stats["content"]
+    stats_path = write_stats(tmp_path, stats)
+    path = snapshot.write_snapshot(stats_path)
+    assert path == snapshot.snapshot_path(stats_path)
+    assert snapshot.is_fresh(path, stats_path)
+
+    # Rewriting the JSON changes its signature
+    content["info"]["number of battles"] += 1
+    synthetic.write_json(stats_path, content)
+    os.utime(stats_path, ns=(1, 1))
+    assert not snapshot.is_fresh(path, stats_path)
+    assert snapshot.open_for(stats_path) is None
+    assert process_data.load_stats(stats_path)["info"] == content["info"]
+
+def test_rejects_other_files(tmp_path):
+    path = os.path.join(tmp_path, "bad.snap")
+    with open(path, "wb") as f:
+        f.write(b"not a snapshot")
+    assert snapshot.open_snapshot(path) is None
+    assert snapshot.open_snapshot(os.path.join(tmp_path, "missing.snap")) is None
@@ -0,0 +1,93 @@
+import os
+import sys
+import gzip
+import json
+
+from . import metrics
+from . import records
+
+# static_site is written for build_db's flat imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import static_site
+
+def build(record_paths, out_dir):
+    return static_site.build_static(record_paths, out_dir, metrics.Metrics("test"), workers=1)
+
+def documents(out_dir):
+    return {
+        os.path.relpath(os.path.join(root, name), out_dir): os.stat(os.path.join(root, name)).st_mtime_ns
+        for root, _, files in os.walk(out_dir) for name in files
+    }
+
+def test_writes_compressed_siblings(synthetic_month, tmp_path):
+    record_paths = records.build_month_records(synthetic_month["month_dir"], meta_dir=synthetic_month["meta_dir"])
+    out_dir = str(tmp_path / "static")
+    assert build(record_paths, out_dir) == []
+
+    with open(os.path.join(out_dir, static_site.FORMATS_FILE), "rb") as f:
+        formats = json.load(f)["formats"]
+    assert [entry["id"] for entry in formats] == ["gen9ou", "gen9uu"]
+
+    index_path = os.path.join(out_dir, "gen9ou", "1500", static_site.INDEX_FILE)
+    with open(index_path, "rb") as f:
+        data = f.read()
+    rows = json.loads(data)["rows"]
+    assert rows and all(slug == static_site.slugify(name) for name, slug, _, _ in rows)
+
+    for name, slug, _, _ in rows[:3] + [(None, "index", None, None)]:
+        path = os.path.join(out_dir, "gen9ou", "1500", f"{slug}.json")
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path + ".gz", "rb") as f:
+            assert gzip.decompress(f.read()) == data
+        if static_site.brotli is not None:
+            with open(path + ".br", "rb") as f:
+                assert static_site.brotli.decompress(f.read()) == data
+        if name:
+            assert json.loads(data)["name"] == name
+
+def test_rebuild_keeps_unchanged_and_removes_stale(synthetic_month, tmp_path):
+    record_paths = records.build_month_records(synthetic_month["month_dir"], meta_dir=synthetic_month["meta_dir"])
+    out_dir = str(tmp_path / "static")
+    build(record_paths, out_dir)
+
+    # Backdate everything so a rewrite would be visible even on coarse clocks
+    for path in documents(out_dir):
+        os.utime(os.path.join(out_dir, path), ns=(10 ** 9, 10 ** 9))
+    before = documents(out_dir)
+
+    stale = os.path.join(out_dir, "gen9ou", "1500", "gone.json")
+    for suffix in ["", ".gz"]:
+        with open(stale + suffix, "wb") as f:
+            f.write(b"{}")
+    # Not created by the export (no index.json), so it must survive
+    os.makedirs(os.path.join(out_dir, "assets"))
+
+    assert build({"gen9ou": record_paths["gen9ou"]}, out_dir) == []
+    after = documents(out_dir)
+
+    assert not os.path.exists(stale) and not os.path.exists(stale + ".gz")
+    assert not os.path.exists(os.path.join(out_dir, "gen9uu"))
+    assert os.path.isdir(os.path.join(out_dir, "assets"))
+    # Every gen9ou document is byte-identical, so none was rewritten
+    kept = {path: mtime for path, mtime in before.items() if path.startswith("gen9ou" + os.sep)}
+    assert kept and all(after[path] == mtime for path, mtime in kept.items())
+    # formats.json lost gen9uu, so it was rewritten
+    assert after[static_site.FORMATS_FILE] != before[static_site.FORMATS_FILE]
+
+def test_failed_format_keeps_its_previous_entry(synthetic_month, tmp_path):
+    record_paths = records.build_month_records(synthetic_month["month_dir"], meta_dir=synthetic_month["meta_dir"])
+    out_dir = str(tmp_path / "static")
+    build(record_paths, out_dir)
+    with open(os.path.join(out_dir, static_site.FORMATS_FILE), "rb") as f:
+        before = json.load(f)
+
+    # An unreadable records file makes the export raise in the worker
+    broken = dict(record_paths, gen9uu=str(tmp_path / "broken.ndjson.gz"))
+    with open(broken["gen9uu"], "wb") as f:
+        f.write(b"not gzip")
+    assert build(broken, out_dir) == ["gen9uu"]
+
+    with open(os.path.join(out_dir, static_site.FORMATS_FILE), "rb") as f:
+        assert json.load(f) == before
+    assert os.path.exists(os.path.join(out_dir, "gen9uu", "1500", static_site.INDEX_FILE))
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pytest
+
+from . import synthetic
+
+# update_all is a script with flat imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import update_all
+
+MONTHS = ["2025-09", "2025-10"]
+
+@pytest.fixture
+def backfill(tmp_path, monkeypatch):
+    # data/ is relative to the working directory; the server is replaced by a
+    # stub that "extracts" a synthetic month and counts the downloads
+    monkeypatch.chdir(tmp_path)
+    meta_dir = os.path.join("data", "meta")
+    monkeypatch.setattr(update_all.build_db, "META_DIR", meta_dir)
+    monkeypatch.setattr(update_all.download_meta, "META_DIR", meta_dir)
+    os.makedirs(meta_dir)
+    for name, data in zip(update_all.records.META_FILES, synthetic.generate_meta(synthetic.pokemon_names(10))):
+        synthetic.write_json(os.path.join(meta_dir, name), data)
+
+    downloads = []
+
+    def download_all(month, session=None, workers=1):
+        downloads.append(month)
+        os.makedirs(os.path.join("data", month, "raw"), exist_ok=True)
+        return True
+
+    def extract_all(month, workers=1):
+        synthetic.write_dataset("data", month=month, formats=["gen9ou"], ratings=[1500], pokemon=10, spreads=3, teammates=3, counters=3)
+        return True
+
+    def refresh_meta():
+        # What an expired max_age does: the metadata files get new mtimes
+        for name in os.listdir(meta_dir):
+            os.utime(os.path.join(meta_dir, name))
+        return True
+
+    monkeypatch.setattr(update_all.download_stats, "download_all", download_all)
+    monkeypatch.setattr(update_all.download_stats, "extract_all", extract_all)
+    monkeypatch.setattr(update_all.download_meta, "download_meta", refresh_meta)
+    monkeypatch.setattr(update_all.build_db, "main", lambda month: True)
+
+    def run(budget_bytes=None):
+        stages = update_all.build_backfill_stages(MONTHS, 1, False, update_all.DiskBudget(budget_bytes, MONTHS[-1]), None)
+        return update_all.pipeline.Pipeline(stages, str(tmp_path / "state.json"), workers=2).run()
+
+    run.downloads = downloads
+    return run
+
+def test_rerun_does_not_download_again(backfill):
+    assert backfill()
+    assert sorted(backfill.downloads) == MONTHS
+    assert not os.path.exists(os.path.join("data", MONTHS[0], "raw"))
+
+    # download_meta reruns once its max_age expires; the months must not follow
+    assert backfill()
+    assert sorted(backfill.downloads) == MONTHS
+
+def test_json_dropped_by_the_budget_is_not_fetched_again(backfill):
+    # A 1 byte budget drops the extracted JSON of every finished month but the newest
+    assert backfill(budget_bytes=1)
+    assert not os.path.exists(os.path.join("data", MONTHS[0], "data"))
+
+    assert backfill(budget_bytes=1)
+    assert sorted(backfill.downloads) == MONTHS
+    assert os.listdir(os.path.join("data", MONTHS[0], "records"))
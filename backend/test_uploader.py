@@ -0,0 +1,249 @@
+import json
+import threading
+import time
+
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+
+from . import uploader
+
+class StubResponse:
+    def __init__(self, client, table, batch):
+        self.client = client
+        self.table = table
+        self.batch = batch
+
+    def execute(self):
+        return self.client.handle(self.table, self.batch)
+
+class StubTable:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def upsert(self, batch, on_conflict="", returning=None):
+        return StubResponse(self.client, self.name, list(batch))
+
+    def select(self, columns):
+        return StubQuery(self.client, self.name, "select", columns.split(","))
+
+    def delete(self, returning=None):
+        return StubQuery(self.client, self.name, "delete")
+
+class StubQuery:
+    # select/delete chains; filters are applied to the client's stored rows on execute()
+    def __init__(self, client, table, action, columns=None):
+        self.client = client
+        self.table = table
+        self.action = action
+        self.columns = columns
+        self.filters = []
+        self.order_by = []
+        self.bounds = None
+
+    def eq(self, column, value):
+        self.filters.append((column, [value]))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append((column, list(values)))
+        return self
+
+    def order(self, column):
+        self.order_by.append(column)
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def execute(self):
+        return self.client.query(self)
+
+class StubClient:
+    # Stands in for supabase.Client: client.table(name).upsert(rows).execute().
+    # `failures` is a list of exceptions raised by the next requests, in order.
+    def __init__(self, failures=None, max_rows=None, delay=0):
+        self.failures = list(failures or [])
+        self.max_rows = max_rows
+        self.delay = delay
+        self.received = []
+        self.rows = {}
+        self.deletes = []
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def table(self, name):
+        return StubTable(self, name)
+
+    def handle(self, table, batch):
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            failure = self.failures.pop(0) if self.failures else None
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if failure:
+                raise failure
+            if self.max_rows and len(batch) > self.max_rows:
+                raise APIError({"code": "413", "message": "Payload Too Large"})
+            with self.lock:
+                self.received.extend(batch)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def query(self, query):
+        matches = [row for row in self.rows.get(query.table, []) if all(row[column] in values for column, values in query.filters)]
+        if query.action == "delete":
+            self.deletes.append(query.filters)
+            self.rows[query.table] = [row for row in self.rows[query.table] if row not in matches]
+            return StubResult([])
+        matches.sort(key=lambda row: [row[column] for column in query.order_by])
+        if query.bounds:
+            matches = matches[query.bounds[0]:query.bounds[1] + 1]
+        return StubResult([{column: row.get(column) for column in query.columns} for row in matches])
+
+class StubResult:
+    def __init__(self, data):
+        self.data = data
+
+def make_records(count, padding=100):
+    return [{"id": i, "data": "x" * (padding + i % 7)} for i in range(count)]
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(uploader.time, "sleep", delays.append)
+    return delays
+
+def test_batches_are_sized_by_bytes():
+    records = make_records(200)
+    batches = list(uploader.iter_batches(records, max_bytes=2000, max_rows=50))
+
+    assert [record for batch, _ in batches for record in batch] == records
+    for batch, batch_bytes in batches:
+        assert len(json.dumps(batch, separators=(",", ":"))) <= batch_bytes <= 2000
+        assert len(batch) <= 50
+    # Every batch but the last was closed because the next record would not fit
+    for (batch, batch_bytes), (following, _) in zip(batches, batches[1:]):
+        assert batch_bytes + uploader.record_size(following[0]) + 1 > 2000
+
+def test_oversized_record_gets_its_own_batch():
+    records = [{"id": 0, "data": "x" * 5000}] + make_records(3)
+    batches = [batch for batch, _ in uploader.iter_batches(records, max_bytes=1000)]
+    assert batches[0] == records[:1]
+    assert batches[1] == records[1:]
+
+def test_retries_transient_errors(sleeps):
+    client = StubClient([APIError({"code": "503", "message": "Service Unavailable"}), httpx.ReadTimeout("timed out")])
+    stats = uploader.upload_records(client, "t", make_records(10), workers=1, backoff=0.5, verbose=False)
+
+    assert stats["rows"] == 10 and stats["retries"] == 2
+    assert client.received == make_records(10)
+    # Full jitter below an exponentially growing cap
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+
+def test_gives_up_after_retries(sleeps):
+    client = StubClient([APIError({"code": "502", "message": "Bad Gateway"})] * 4)
+    with pytest.raises(APIError):
+        uploader.upload_records(client, "t", make_records(5), workers=1, retries=3, verbose=False)
+    assert client.requests == 4 and len(sleeps) == 3
+
+def test_client_errors_are_not_retried(sleeps):
+    client = StubClient([APIError({"code": "23502", "message": "null value"})])
+    with pytest.raises(APIError):
+        uploader.upload_records(client, "t", make_records(5), workers=1, verbose=False)
+    assert client.requests == 1 and not sleeps
+
+def test_payload_too_large_halves_the_batch(sleeps):
+    client = StubClient(max_rows=3)
+    records = make_records(10)
+    stats = uploader.upload_records(client, "t", records, workers=1, verbose=False)
+
+    assert sorted(client.received, key=lambda record: record["id"]) == records
+    assert stats["rows"] == 10
+    # 10 -> 5 + 5 -> (2 + 3) + (2 + 3)
+    assert stats["splits"] == 3 and stats["batches"] == 4
+    assert not sleeps
+
+def test_in_flight_requests_are_bounded():
+    client = StubClient(delay=0.02)
+    records = make_records(60)
+    stats = uploader.upload_records(client, "t", records, max_batch_rows=2, workers=3, verbose=False)
+
+    assert stats["rows"] == 60 and stats["batches"] == 30
+    assert client.max_in_flight == 3
+    assert sorted(client.received, key=lambda record: record["id"]) == records
+
+def stats_row(rating, name, usage):
+    return {"format_id": "gen9ou", "rating": rating, "pokemon_name": name, "usage_percent": usage}
+
+def stored(record, content_hash=None):
+    row = dict(record)
+    row["content_hash"] = content_hash or uploader.content_hash(record)
+    return row
+
+KEY = ["format_id", "rating", "pokemon_name"]
+
+@pytest.fixture
+def synced_client():
+    # One unchanged row, one with a stale hash and one that is no longer produced
+    client = StubClient()
+    client.rows["pokemon_stats"] = [
+        stored(stats_row(1500, "Alpha", 10.0)),
+        stored(stats_row(1500, "Beta", 5.0), "stale"),
+        stored(stats_row(0, "Gamma", 1.0)),
+    ]
+    return client
+
+def sync_rows():
+    return [stats_row(1500, "Alpha", 10.0), stats_row(1500, "Beta", 6.0), stats_row(1500, "Delta", 2.0)]
+
+def test_sync_only_sends_new_and_changed_rows(synced_client):
+    stats = uploader.sync_records(synced_client, "pokemon_stats", sync_rows(), KEY, {"format_id": "gen9ou"}, workers=1)
+
+    assert (stats["inserted"], stats["updated"], stats["unchanged"], stats["deleted"]) == (1, 1, 1, 0)
+    assert [row["pokemon_name"] for row in synced_client.received] == ["Beta", "Delta"]
+    assert all(row["content_hash"] == uploader.content_hash(row) for row in synced_client.received)
+    # Without prune the missing row stays
+    assert not synced_client.deletes
+    assert len(synced_client.rows["pokemon_stats"]) == 3
+
+def test_sync_prunes_missing_rows(synced_client):
+    stats = uploader.sync_records(synced_client, "pokemon_stats", sync_rows(), KEY, {"format_id": "gen9ou"}, prune=True, workers=1)
+
+    assert stats["deleted"] == 1
+    assert [row["pokemon_name"] for row in synced_client.rows["pokemon_stats"]] == ["Alpha", "Beta"]
+
+def test_sync_force_resends_unchanged_rows(synced_client):
+    stats = uploader.sync_records(synced_client, "pokemon_stats", sync_rows(), KEY, {"format_id": "gen9ou"}, force=True, workers=1)
+
+    assert (stats["inserted"], stats["updated"], stats["unchanged"]) == (1, 2, 0)
+    assert [row["pokemon_name"] for row in synced_client.received] == ["Alpha", "Beta", "Delta"]
+
+def test_existing_hashes_are_paged():
+    client = StubClient()
+    client.rows["moves"] = [stored({"id": f"move{i:02}", "name": f"Move {i}"}) for i in range(25)]
+    existing = uploader.fetch_existing_hashes(client, "moves", ["id"], page_size=10)
+    assert sorted(existing) == [(row["id"],) for row in client.rows["moves"]]
+    assert all(existing[(row["id"],)] == row["content_hash"] for row in client.rows["moves"])
+
+def test_deletes_group_by_key_prefix():
+    client = StubClient()
+    keys = [("gen9ou", rating, f"Mon{i}") for rating in (0, 1500) for i in range(5)]
+    client.rows["pokemon_stats"] = [stats_row(rating, name, 1.0) for _, rating, name in keys]
+
+    assert uploader.delete_keys(client, "pokemon_stats", KEY, keys, {"format_id": "gen9ou"}, chunk_size=3) == 10
+    assert not client.rows["pokemon_stats"]
+    # One IN filter per (format, rating) prefix, chunked
+    for filters in client.deletes:
+        assert [column for column, _ in filters] == ["format_id", "format_id", "rating", "pokemon_name"]
+        assert len(filters[-1][1]) <= 3
+    assert sorted(len(filters[-1][1]) for filters in client.deletes) == [2, 2, 3, 3]
@@ -1,7 +1,10 @@
 import os
 import sys
 import datetime
-import time
+import argparse
+import threading
+
+import requests
 
 # Add the current directory to sys.path to allow imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -9,39 +12,203 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 import download_stats
 import download_meta
 import build_db
-import process_data
+import records
+import pipeline
+
+STATE_PATH = os.path.join("data", ".pipeline_state.json")
+# Showdown's data files change far more often than monthly stats, but not hourly
+META_MAX_AGE = 24 * 60 * 60
+
+def build_stages(target_month, files_in_flight=1):
+    raw_dir = os.path.join("data", target_month, "raw")
+    data_dir = os.path.join("data", target_month, "data")
+    meta_files = [os.path.join(download_meta.META_DIR, name) for name in records.META_FILES]
+
+    return [
+        pipeline.Stage(
+            "download_meta", download_meta.download_meta,
+            outputs=lambda: meta_files + [os.path.join(download_meta.META_DIR, "forms_index.json")],
+            max_age=META_MAX_AGE,
+        ),
+        # Published months never change, so the stats download only reruns if its files do
+        pipeline.Stage(
+            "download_stats", lambda: download_stats.download_all(target_month, workers=files_in_flight),
+            outputs=lambda: [raw_dir],
+        ),
+        pipeline.Stage(
+            "extract", lambda: download_stats.extract_all(target_month, files_in_flight),
+            deps=["download_stats"],
+            inputs=lambda: [raw_dir],
+            outputs=lambda: [data_dir],
+        ),
+        pipeline.Stage(
+            "build_db", lambda: build_db.main(target_month),
+            deps=["download_meta", "extract"],
+            inputs=lambda: [data_dir] + meta_files,
+            outputs=lambda: [build_db.INDEX_DB_PATH, build_db.DB_DIR],
+        ),
+    ]
+
+def parse_range(value):
+    start, sep, end = value.partition("..")
+    if not sep:
+        raise argparse.ArgumentTypeError("expected YYYY-MM..YYYY-MM")
+    try:
+        first = datetime.date(*map(int, start.split("-")), 1)
+        last = datetime.date(*map(int, end.split("-")), 1)
+    except (TypeError, ValueError):
+        raise argparse.ArgumentTypeError("expected YYYY-MM..YYYY-MM")
+    if first > last:
+        raise argparse.ArgumentTypeError("range start is after its end")
+
+    months = []
+    while first <= last:
+        months.append(first.strftime("%Y-%m"))
+        first = (first + datetime.timedelta(days=32)).replace(day=1)
+    return months
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for filename in files:
+            try:
+                total += os.path.getsize(os.path.join(root, filename))
+            except OSError:
+                pass
+    return total
+
+class DiskBudget:
+    # Once a month's records are built its extracted JSON is only a cache, so
+    # the oldest finished months give theirs up first when data/ is over budget.
+
+    def __init__(self, max_bytes, keep_month):
+        self.max_bytes = max_bytes
+        self.keep_month = keep_month
+        self.finished = []
+        self.lock = threading.Lock()
+
+    def month_done(self, month):
+        with self.lock:
+            self.finished.append(month)
+            if not self.max_bytes:
+                return
+            usage = dir_size("data")
+            for old_month in sorted(self.finished):
+                if usage <= self.max_bytes:
+                    break
+                if old_month == self.keep_month:
+                    continue
+                data_dir = os.path.join("data", old_month, "data")
+                if os.path.exists(data_dir):
+                    freed = dir_size(data_dir)
+                    download_stats.delete_all(old_month)
+                    usage -= freed
+            if usage > self.max_bytes:
+                print(f"Warning: data/ uses {usage / 1024 ** 3:.2f} GB, over the {self.max_bytes / 1024 ** 3:.2f} GB budget")
+
+def build_backfill_stages(months, files_in_flight, keep_raw, budget, session):
+    meta_files = [os.path.join(download_meta.META_DIR, name) for name in records.META_FILES]
+    latest = months[-1]
+    meta_lock = threading.Lock()
+    shared = {}
+
+    def shared_meta():
+        # Parsed once and reused by every month's records build
+        with meta_lock:
+            if "meta" not in shared:
+                shared["meta"] = records.load_meta(build_db.META_DIR)
+            return shared["meta"]
+
+    def process_month(month):
+        date_dir = os.path.join("data", month)
+        # Records are only built once extraction finished, so a month that has them
+        # needs nothing from the server: its JSON is either still there or was
+        # dropped on purpose (raw cleanup, disk budget)
+        if records.has_records(date_dir):
+            print(f"Records for {month} exist, not downloading again")
+        else:
+            if not download_stats.download_all(month, session, files_in_flight):
+                return False
+            if not download_stats.extract_all(month, files_in_flight):
+                return False
+        records.build_month_records(date_dir, shared_meta(), build_db.META_DIR)
+        if not keep_raw:
+            download_stats.delete_raw(month)
+        budget.month_done(month)
+        return True
+
+    stages = [
+        pipeline.Stage(
+            "download_meta", download_meta.download_meta,
+            outputs=lambda: meta_files + [os.path.join(download_meta.META_DIR, "forms_index.json")],
+            max_age=META_MAX_AGE,
+        ),
+    ]
+    for month in months:
+        stages.append(pipeline.Stage(
+            f"month:{month}", lambda month=month: process_month(month),
+            deps=["download_meta"],
+            # Keyed on the month's own files: download_meta refreshing the metadata
+            # must not send every month back to the server
+            inputs=lambda month=month: [os.path.join("data", month, "data")],
+            outputs=lambda month=month: [records.records_dir(os.path.join("data", month))],
+        ))
+    # The SQLite databases describe a single month, so only the newest one is built
+    stages.append(pipeline.Stage(
+        "build_db", lambda: build_db.main(latest),
+        deps=["download_meta", f"month:{latest}"],
+        inputs=lambda: [records.records_dir(os.path.join("data", latest))] + meta_files,
+        outputs=lambda: [build_db.INDEX_DB_PATH, build_db.DB_DIR],
+    ))
+    return stages
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download stats and metadata and rebuild the SQLite databases")
+    parser.add_argument("month", nargs="?", help="Month to fetch (YYYY-MM, default: previous month)")
+    parser.add_argument("--force", action="store_true", help="Run every stage even if its inputs and outputs are unchanged")
+    parser.add_argument("--workers", type=int, default=2, help="Stages run in parallel (default: 2)")
+    parser.add_argument("--range", type=parse_range, dest="months", metavar="YYYY-MM..YYYY-MM", help="Backfill every month in this range")
+    parser.add_argument("--months-in-flight", type=int, default=2, help="Months processed at once with --range (default: 2)")
+    parser.add_argument("--files-in-flight", type=int, default=4, help="Files downloaded/extracted at once per month (default: 4)")
+    parser.add_argument("--keep-raw", action="store_true", help="Keep the downloaded .json.gz files after a month is built")
+    parser.add_argument("--disk-budget-gb", type=float, help="With --range, drop extracted JSON of finished months once data/ exceeds this size")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     print("=== Starting Data Update Process ===")
-    
-    # 1. Download Metadata
-    print("\n--- Step 1: Downloading Metadata ---")
-    download_meta.download_meta()
-    
-    # 2. Determine Target Date and Download Stats
-    print("\n--- Step 2: Downloading Stats ---")
-    
-    if len(sys.argv) > 1:
-        target_month = sys.argv[1]
+
+    if args.months:
+        print(f"Backfilling {len(args.months)} months: {args.months[0]} to {args.months[-1]}")
+        budget_bytes = int(args.disk_budget_gb * 1024 ** 3) if args.disk_budget_gb else None
+        budget = DiskBudget(budget_bytes, args.months[-1])
+        # One pooled session for every month's downloads
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=args.months_in_flight, pool_maxsize=args.months_in_flight * args.files_in_flight)
+        session.mount("https://", adapter)
+        try:
+            stages = build_backfill_stages(args.months, args.files_in_flight, args.keep_raw, budget, session)
+            runner = pipeline.Pipeline(stages, STATE_PATH, force=args.force, workers=args.months_in_flight)
+            ok = runner.run()
+        finally:
+            session.close()
+        print("\n=== Backfill Complete ===" if ok else "\n=== Backfill Failed ===")
+        return ok
+
+    if args.month:
+        target_month = args.month
         print(f"Using provided target month: {target_month}")
     else:
         today = datetime.date.today()
         current_month_str = today.strftime("%Y-%m")
         target_month = download_stats.get_prev_month(current_month_str)
         print(f"Targeting stats for: {target_month}")
-    
-    download_stats.download_all(target_month)
-    download_stats.extract_all(target_month)
-    
-    # 3. Update Database
-    print("\n--- Step 3: Building SQLite Database ---")
-    
-    try:
-        build_db.main()
-    except Exception as e:
-        print(f"Error during database update: {e}")
-        
-    print("\n=== Update Process Complete ===")
+
+    runner = pipeline.Pipeline(build_stages(target_month, args.files_in_flight), STATE_PATH, force=args.force, workers=args.workers)
+    ok = runner.run()
+
+    print("\n=== Update Process Complete ===" if ok else "\n=== Update Process Failed ===")
+    return ok
 
 if __name__ == "__main__":
-    main()
+    sys.exit(0 if main() else 1)
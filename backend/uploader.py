@@ -0,0 +1,232 @@
+import hashlib
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import httpx
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+
+# PostgREST rejects request bodies above its configured limit (1MB-ish on most
+# hosted setups), so batches are sized by serialized bytes instead of row count.
+DEFAULT_MAX_BATCH_BYTES = 768 * 1024
+DEFAULT_MAX_BATCH_ROWS = 1000
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF = 0.5
+
+TRANSIENT_HTTP_CODES = {"408", "425", "429", "500", "502", "503", "504", "520", "522", "524"}
+TRANSIENT_PG_CODES = {"40001", "40P01", "55P03", "57014", "57P01", "PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+TRANSIENT_PG_CLASSES = ("08", "53")
+
+def record_size(record):
+    return len(json.dumps(record, separators=(",", ":"), default=str).encode("utf-8"))
+
+def iter_batches(records, max_bytes=DEFAULT_MAX_BATCH_BYTES, max_rows=DEFAULT_MAX_BATCH_ROWS):
+    batch = []
+    batch_bytes = 2  # surrounding []
+
+    for record in records:
+        size = record_size(record) + 1  # separating comma
+        if batch and (batch_bytes + size > max_bytes or len(batch) >= max_rows):
+            yield batch, batch_bytes
+            batch = []
+            batch_bytes = 2
+        batch.append(record)
+        batch_bytes += size
+
+    if batch:
+        yield batch, batch_bytes
+
+def error_code(error):
+    if isinstance(error, APIError):
+        return str(error.code) if error.code is not None else ""
+    return ""
+
+def is_payload_too_large(error):
+    return error_code(error) == "413"
+
+def is_transient(error):
+    if isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+
+    code = error_code(error)
+    if not code:
+        return False
+    return code in TRANSIENT_HTTP_CODES or code in TRANSIENT_PG_CODES or code.startswith(TRANSIENT_PG_CLASSES)
+
+def call_with_retries(fn, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, label="request"):
+    attempt = 0
+    while True:
+        try:
+            return fn(), attempt
+        except Exception as e:
+            if attempt >= retries or not is_transient(e):
+                raise
+            # Full jitter keeps parallel workers from retrying in lockstep
+            delay = random.uniform(0, backoff * (2 ** attempt))
+            attempt += 1
+            print(f"  Transient error on {label} ({e.__class__.__name__}: {error_code(e) or e}), retry {attempt}/{retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+def send_batch(client, table, batch, batch_bytes, on_conflict="", retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    result = {"rows": 0, "bytes": 0, "batches": 0, "retries": 0, "splits": 0}
+
+    def request():
+        return client.table(table).upsert(batch, on_conflict=on_conflict, returning=ReturnMethod.minimal).execute()
+
+    try:
+        _, attempts = call_with_retries(request, retries, backoff, label=f"{table} batch of {len(batch)}")
+    except Exception as e:
+        if not is_payload_too_large(e) or len(batch) < 2:
+            raise
+        # The server limit is lower than our byte budget, halve and resend
+        mid = len(batch) // 2
+        result["splits"] += 1
+        for half in (batch[:mid], batch[mid:]):
+            half_result = send_batch(client, table, half, record_size(half), on_conflict, retries, backoff)
+            for key in result:
+                result[key] += half_result[key]
+        return result
+
+    result["rows"] = len(batch)
+    result["bytes"] = batch_bytes
+    result["batches"] = 1
+    result["retries"] = attempts
+    return result
+
+def print_upload_stats(stats):
+    seconds = max(stats["seconds"], 1e-9)
+    mb = stats["bytes"] / (1024 * 1024)
+    print(
+        f"  {stats['table']}: {stats['rows']} rows in {stats['batches']} batches, "
+        f"{mb:.2f} MB in {stats['seconds']:.2f}s "
+        f"({stats['rows'] / seconds:.0f} rows/s, {mb / seconds:.2f} MB/s, "
+        f"{stats['retries']} retries, {stats['splits']} splits)"
+    )
+
+def upload_records(client, table, records, on_conflict="", max_batch_bytes=DEFAULT_MAX_BATCH_BYTES,
+                   max_batch_rows=DEFAULT_MAX_BATCH_ROWS, workers=DEFAULT_WORKERS,
+                   retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, verbose=True):
+    stats = {"table": table, "rows": 0, "bytes": 0, "batches": 0, "retries": 0, "splits": 0}
+    start = time.perf_counter()
+
+    def collect(done):
+        for future in done:
+            for key, value in future.result().items():
+                stats[key] += value
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for batch, batch_bytes in iter_batches(records, max_batch_bytes, max_batch_rows):
+            # Keep at most `workers` requests in flight so batches are built lazily
+            if len(pending) >= workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(pool.submit(send_batch, client, table, batch, batch_bytes, on_conflict, retries, backoff))
+
+        done, _ = wait(pending)
+        collect(done)
+
+    stats["seconds"] = time.perf_counter() - start
+    if verbose:
+        print_upload_stats(stats)
+    return stats
+
+def content_hash(record):
+    payload = {key: value for key, value in record.items() if key != "content_hash"}
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+def fetch_existing_hashes(client, table, key_columns, filters=None, hash_column="content_hash", page_size=1000,
+                          retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    columns = ",".join(list(key_columns) + ([hash_column] if hash_column else []))
+    existing = {}
+    offset = 0
+
+    while True:
+        def request():
+            query = client.table(table).select(columns)
+            for column, value in (filters or {}).items():
+                query = query.eq(column, value)
+            for column in key_columns:
+                query = query.order(column)
+            return query.range(offset, offset + page_size - 1).execute()
+
+        response, _ = call_with_retries(request, retries, backoff, label=f"{table} hash page {offset // page_size}")
+        rows = response.data or []
+        for row in rows:
+            existing[tuple(row[column] for column in key_columns)] = row.get(hash_column) if hash_column else None
+
+        if len(rows) < page_size:
+            return existing
+        offset += page_size
+
+def delete_keys(client, table, key_columns, keys, filters=None, chunk_size=100, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    # Group on all but the last key column so each request is a single IN filter
+    groups = {}
+    for key in keys:
+        groups.setdefault(key[:-1], []).append(key[-1])
+
+    deleted = 0
+    for prefix, values in groups.items():
+        for i in range(0, len(values), chunk_size):
+            chunk = values[i:i + chunk_size]
+
+            def request():
+                query = client.table(table).delete(returning=ReturnMethod.minimal)
+                for column, value in (filters or {}).items():
+                    query = query.eq(column, value)
+                for column, value in zip(key_columns[:-1], prefix):
+                    query = query.eq(column, value)
+                return query.in_(key_columns[-1], chunk).execute()
+
+            call_with_retries(request, retries, backoff, label=f"{table} delete of {len(chunk)}")
+            deleted += len(chunk)
+
+    return deleted
+
+def sync_records(client, table, records, key_columns, filters=None, prune=False, force=False,
+                 max_batch_bytes=DEFAULT_MAX_BATCH_BYTES, max_batch_rows=DEFAULT_MAX_BATCH_ROWS,
+                 workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    key_columns = tuple(key_columns)
+    existing = fetch_existing_hashes(client, table, key_columns, filters, retries=retries, backoff=backoff)
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+    seen = set()
+
+    def changed_records():
+        for record in records:
+            key = tuple(record[column] for column in key_columns)
+            seen.add(key)
+            record["content_hash"] = content_hash(record)
+
+            if key not in existing:
+                counts["inserted"] += 1
+            elif existing[key] != record["content_hash"] or force:
+                counts["updated"] += 1
+            else:
+                counts["unchanged"] += 1
+                continue
+            yield record
+
+    stats = upload_records(
+        client, table, changed_records(), on_conflict=",".join(key_columns),
+        max_batch_bytes=max_batch_bytes, max_batch_rows=max_batch_rows,
+        workers=workers, retries=retries, backoff=backoff, verbose=False
+    )
+
+    if prune:
+        stale = [key for key in existing if key not in seen]
+        if stale:
+            counts["deleted"] = delete_keys(client, table, key_columns, stale, filters, retries=retries, backoff=backoff)
+
+    stats.update(counts)
+    print_sync_stats(stats)
+    return stats
+
+def print_sync_stats(stats):
+    label = stats["table"]
+    print(f"  {label}: {stats['inserted']} inserted, {stats['updated']} updated, {stats['unchanged']} unchanged, {stats['deleted']} deleted")
+    if stats["rows"]:
+        print_upload_stats(stats)
@@ -1,4 +1,5 @@
 import { getIndexDb, getFormatDb } from '../db';
+import { decodeDetails, isPayload, type MetaNames } from './payload';
 
 export const getFormats = async () => {
   const worker = await getIndexDb();
@@ -73,6 +74,23 @@ export const getFormatData = async (formatId: string, rating: number | null) =>
   };
 };
 
+// Move/item/ability display names for v2 payloads, loaded once per session
+let metaNames: Promise<MetaNames> | null = null;
+
+const getMetaNames = () => {
+  if (!metaNames) {
+    metaNames = (async () => {
+      const worker = await getIndexDb();
+      const [moves, items, abilities] = await Promise.all(['moves', 'items', 'abilities'].map(async table => {
+        const rows = await worker.db.query(`SELECT id, name FROM ${table}`);
+        return Object.fromEntries(rows.map((row: any) => [row.id, row.name]));
+      }));
+      return { moves, items, abilities };
+    })();
+  }
+  return metaNames;
+};
+
 export const getPokemonData = async (formatId: string, pokemonSlug: string, rating: number | null) => {
   // First get the pokemon name from the slug using the Index DB (Rankings)
   // This is safer than trying to guess the name from the slug
@@ -127,8 +145,10 @@ export const getPokemonData = async (formatId: string, pokemonSlug: string, rati
     
   if (!data) throw new Error("Pokemon details not found");
   
-  // Parse the JSON data column
-  const parsedData = typeof data.data === 'string' ? JSON.parse(data.data) : data.data;
+  // The data column is JSON text (v1) or a packed payload blob (v2)
+  const parsedData = typeof data.data === 'string'
+    ? JSON.parse(data.data)
+    : isPayload(data.data) ? decodeDetails(data.data, await getMetaNames()) : data.data;
   
   return { ...data, ...parsedData, slug: pokemonSlug };
 };
@@ -0,0 +1,143 @@
+// Decoder for the v2 pokemon_details.data payload written by backend/payload.py:
+// magic "UMP", version byte, a per-row string table, then each section as
+// parallel columns (string ids, basis-point percentages as varints, float32 counts).
+// Moves, items and abilities carry their meta table id; names come from MetaNames.
+
+export type MetaNames = {
+  moves: Record<string, string>;
+  items: Record<string, string>;
+  abilities: Record<string, string>;
+};
+
+const MAGIC = [0x55, 0x4d, 0x50]; // "UMP"
+const VERSION = 2;
+const BP_SCALE = 100;
+
+type Kind = 's' | 'p' | 'f';
+type Fields = [string, Kind][];
+
+// Same order as LIST_SECTIONS in backend/payload.py
+const LIST_SECTIONS: [string, Fields, keyof MetaNames | null][] = [
+  ['moves', [['id', 's'], ['usage_percent', 'p']], 'moves'],
+  ['teammates', [['name', 's'], ['usage_percent', 'p']], null],
+  ['items', [['id', 's'], ['usage_percent', 'p']], 'items'],
+  ['abilities', [['id', 's'], ['usage_percent', 'p']], 'abilities'],
+  ['natures', [['name', 's'], ['usage_percent', 'p']], null],
+  ['spreads', [['spread', 's'], ['usage_percent', 'p']], null],
+  ['evs', [['ev_string', 's'], ['usage_percent', 'p']], null],
+  ['tera_types', [['tera_type', 's'], ['usage_percent', 'p']], null],
+  ['counters', [['name', 's'], ['score', 'p'], ['count', 'f'], ['usage_percent', 'p']], null],
+  ['dominates', [['name', 's'], ['score', 'p'], ['count', 'f'], ['usage_percent', 'p']], null],
+];
+
+class Reader {
+  pos = 0;
+  strings: string[] = [];
+  private view: DataView;
+  private bytes: Uint8Array;
+
+  constructor(bytes: Uint8Array) {
+    this.bytes = bytes;
+    this.view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  }
+
+  varint() {
+    let value = 0;
+    let scale = 1;
+    for (;;) {
+      const byte = this.bytes[this.pos++];
+      value += (byte & 0x7f) * scale;
+      if (byte < 0x80) return value;
+      scale *= 128;
+    }
+  }
+
+  signed() {
+    const value = this.varint();
+    return value % 2 === 0 ? value / 2 : -(value + 1) / 2;
+  }
+
+  string() {
+    return this.strings[this.varint()];
+  }
+
+  bp() {
+    return this.varint() / BP_SCALE;
+  }
+
+  stringTable() {
+    const decoder = new TextDecoder();
+    const count = this.varint();
+    for (let i = 0; i < count; i++) {
+      const length = this.varint();
+      this.strings.push(decoder.decode(this.bytes.subarray(this.pos, this.pos + length)));
+      this.pos += length;
+    }
+  }
+
+  stringsList() {
+    const count = this.varint();
+    return Array.from({ length: count }, () => this.string());
+  }
+
+  rows(fields: Fields) {
+    const count = this.varint();
+    const rows: Record<string, any>[] = Array.from({ length: count }, () => ({}));
+    for (const [key, kind] of fields) {
+      for (const row of rows) {
+        if (kind === 's') {
+          row[key] = this.string();
+        } else if (kind === 'p') {
+          row[key] = this.bp();
+        } else {
+          // float32 keeps ~7 digits; drop the noise past them
+          row[key] = Math.round(this.view.getFloat32(this.pos, true) * 1000) / 1000;
+          this.pos += 4;
+        }
+      }
+    }
+    return rows;
+  }
+}
+
+export const isPayload = (data: unknown): data is Uint8Array =>
+  data instanceof Uint8Array && MAGIC.every((byte, i) => data[i] === byte);
+
+export const decodeDetails = (bytes: Uint8Array, names?: MetaNames) => {
+  if (!isPayload(bytes)) throw new Error('Not a pokemon_details payload');
+  if (bytes[MAGIC.length] !== VERSION) throw new Error(`Unsupported payload version ${bytes[MAGIC.length]}`);
+
+  const reader = new Reader(bytes);
+  reader.pos = MAGIC.length + 1;
+  reader.stringTable();
+
+  const name = reader.string();
+  const rank = reader.signed();
+  const stats: Record<string, any> = {
+    name,
+    usage: { name, rank, usage_percent: reader.bp() },
+  };
+  stats.base_stats = Array.from({ length: reader.varint() }, () => reader.signed());
+  stats.types = reader.stringsList();
+  stats.possible_abilities = reader.stringsList();
+
+  for (const [section, fields, metaTable] of LIST_SECTIONS) {
+    if (section === 'evs') {
+      const evs: Record<string, any[]> = {};
+      const count = reader.varint();
+      for (let i = 0; i < count; i++) {
+        const category = reader.string();
+        evs[category] = reader.rows(fields);
+      }
+      stats.evs = evs;
+      continue;
+    }
+    let rows = reader.rows(fields);
+    if (metaTable) {
+      const table = names?.[metaTable] ?? {};
+      rows = rows.map(row => ({ name: table[row.id] ?? row.id, id: row.id, usage_percent: row.usage_percent }));
+    }
+    stats[section] = rows;
+  }
+  return stats;
+};
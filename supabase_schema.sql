@@ -9,19 +9,79 @@ create table if not exists formats (
   created_at timestamptz default now()
 );
 
--- Create pokemon_stats table
+-- Move a pre-partitioning pokemon_stats out of the way; its rows are copied below
+do $$
+begin
+  if exists (select 1 from pg_class where relname = 'pokemon_stats' and relkind = 'r') then
+    alter table pokemon_stats rename to pokemon_stats_unpartitioned;
+    alter table pokemon_stats_unpartitioned rename constraint pokemon_stats_pkey to pokemon_stats_unpartitioned_pkey;
+    alter table pokemon_stats_unpartitioned rename constraint pokemon_stats_format_id_pokemon_name_rating_key to pokemon_stats_unpartitioned_key;
+  end if;
+end $$;
+
+-- Create pokemon_stats table, one list partition per format
 create table if not exists pokemon_stats (
-  id uuid default gen_random_uuid() primary key,
-  format_id text references formats(id) on delete cascade,
+  format_id text not null references formats(id) on delete cascade,
   pokemon_name text not null,
   slug text, -- For URL lookups
   rating int not null,
   usage_percent float,
   rank int,
+  types text[],
+  top_moves text[], -- Move ids used by at least 5% of sets
+  top_items text[], -- Item ids used by at least 5% of sets
+  top_abilities text[],
+  top_tera_types text[],
   data jsonb not null, -- Stores the full stats object (moves, items, etc.)
+  content_hash text, -- Digest of the uploaded row, used to skip unchanged rows
   created_at timestamptz default now(),
-  unique(format_id, pokemon_name, rating)
-);
+  primary key (format_id, pokemon_name, rating)
+) partition by list (format_id);
+
+create table if not exists pokemon_stats_default partition of pokemon_stats default;
+
+-- Leaderboards ("top 50 at rating R") read straight from the index
+create index if not exists pokemon_stats_leaderboard_idx
+  on pokemon_stats (format_id, rating, rank) include (pokemon_name, slug, usage_percent);
+create index if not exists pokemon_stats_slug_idx
+  on pokemon_stats (format_id, slug, rating);
+-- Containment filters such as top_moves @> array['knockoff']
+create index if not exists pokemon_stats_top_moves_idx on pokemon_stats using gin (top_moves);
+create index if not exists pokemon_stats_top_items_idx on pokemon_stats using gin (top_items);
+create index if not exists pokemon_stats_types_idx on pokemon_stats using gin (types);
+
+-- Called by the loader before it writes a format, so each format gets its own partition
+create or replace function ensure_pokemon_stats_partition(fmt text) returns void
+language plpgsql security definer set search_path = public as $$
+declare
+  part text := 'pokemon_stats_' || regexp_replace(lower(fmt), '[^a-z0-9_]', '_', 'g');
+begin
+  if to_regclass(part) is not null then
+    return;
+  end if;
+
+  -- Rows that landed in the default partition have to move before attaching
+  execute format('create table %I (like pokemon_stats including defaults including constraints)', part);
+  execute format('insert into %I select * from pokemon_stats_default where format_id = %L', part, fmt);
+  delete from pokemon_stats_default where format_id = fmt;
+  execute format('alter table pokemon_stats attach partition %I for values in (%L)', part, fmt);
+  -- Partitions are reachable as tables through the API, keep them closed
+  execute format('alter table %I enable row level security', part);
+end $$;
+
+revoke execute on function ensure_pokemon_stats_partition(text) from public, anon, authenticated;
+
+do $$
+begin
+  if to_regclass('pokemon_stats_unpartitioned') is not null then
+    perform ensure_pokemon_stats_partition(format_id) from (select distinct format_id from pokemon_stats_unpartitioned where format_id is not null) f;
+    insert into pokemon_stats (format_id, pokemon_name, slug, rating, usage_percent, rank, data, created_at)
+      select format_id, pokemon_name, slug, rating, usage_percent, rank, data, created_at
+      from pokemon_stats_unpartitioned where format_id is not null
+      on conflict do nothing;
+    drop table pokemon_stats_unpartitioned;
+  end if;
+end $$;
 
 -- Create moves table
 create table if not exists moves (
@@ -32,6 +92,7 @@ create table if not exists moves (
   base_power int,
   accuracy int,
   description text,
+  content_hash text,
   created_at timestamptz default now()
 );
 
@@ -41,6 +102,7 @@ create table if not exists items (
   name text,
   description text,
   spritenum int,
+  content_hash text,
   created_at timestamptz default now()
 );
 
@@ -49,6 +111,7 @@ create table if not exists abilities (
   id text primary key,
   name text,
   description text,
+  content_hash text,
   created_at timestamptz default now()
 );
 
@@ -58,12 +121,14 @@ create table if not exists pokedex (
   types text[],
   base_stats jsonb,
   abilities jsonb,
+  content_hash text,
   created_at timestamptz default now()
 );
 
 -- Enable Row Level Security (RLS)
 alter table formats enable row level security;
 alter table pokemon_stats enable row level security;
+alter table pokemon_stats_default enable row level security;
 alter table moves enable row level security;
 alter table items enable row level security;
 alter table abilities enable row level security;
@@ -119,3 +184,11 @@ create policy "Service role can manage abilities"
 create policy "Service role can manage pokedex"
   on pokedex for all
   using ( auth.role() = 'service_role' );
+
+
+-- Content hashes for diff-based sync (for databases created before the column existed)
+alter table pokemon_stats add column if not exists content_hash text;
+alter table moves add column if not exists content_hash text;
+alter table items add column if not exists content_hash text;
+alter table abilities add column if not exists content_hash text;
+alter table pokedex add column if not exists content_hash text;